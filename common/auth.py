@@ -0,0 +1,20 @@
+from typing import Annotated
+from fastapi import Depends, Header
+from data.database import run_async
+from services.users_service import authenticate_user
+
+
+async def get_current_user(token: Annotated[str, Header()]) -> dict:
+
+    """
+    Authenticate the request's token. FastAPI caches dependencies per request, so however many
+    parameters depend on this, the token is checked once and the same user is handed to each of them.
+
+    :param token:  JWT token for authentication.
+    :return:  The authenticated user's token payload.
+    """
+
+    return await run_async(authenticate_user, token)
+
+
+CurrentUser = Annotated[dict, Depends(get_current_user)]
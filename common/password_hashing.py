@@ -0,0 +1,252 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import bcrypt
+from common.settings import get_settings
+
+try:
+    import argon2
+except ImportError:  # argon2-cffi is only needed when PASSWORD_HASH_SCHEME=argon2
+    argon2 = None
+
+BCRYPT = 'bcrypt'
+ARGON2 = 'argon2'
+SCHEMES = (BCRYPT, ARGON2)
+
+
+class HashingQueueFullError(Exception):
+    """Raised when a password hash is requested while the hashing queue is full."""
+
+
+@dataclass(frozen=True)
+class HashingStats:
+    workers: int
+    max_queue: int
+    running: int
+    queued: int
+    completed: int
+    rejected: int
+    avg_wait_ms: float
+    max_wait_ms: float
+
+
+class PasswordHashingPool:
+
+    """
+    Dedicated threads for password hashing. bcrypt and argon2 release the GIL while hashing,
+    so `workers` threads hash in parallel without competing with the request threadpool for anything but CPU.
+
+    At most `workers` hashes run at once and at most `max_queue` more wait for a thread.
+    Anything beyond that is refused immediately with HashingQueueFullError, so a burst of logins
+    fails fast instead of piling up request threads behind the hasher.
+    """
+
+    def __init__(self, workers: int = 4, max_queue: int = 32):
+        if workers < 1 or max_queue < 0:
+            raise ValueError('workers must be at least 1 and max_queue at least 0')
+
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hashing')
+        self._lock = threading.Lock()
+        self._running = 0
+        self._queued = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+
+    def run(self, func, *args):
+
+        """
+        Run `func(*args)` on a hashing thread and wait for its result.
+
+        :raises HashingQueueFullError:  If all threads are busy and the queue is full.
+        """
+
+        with self._lock:
+            if self._running + self._queued >= self.workers + self.max_queue:
+                self._rejected += 1
+                raise HashingQueueFullError(
+                    f'{self._queued} password hashes are already waiting for one of {self.workers} threads')
+            self._queued += 1
+
+        submitted_at = time.monotonic()
+        try:
+            future = self._executor.submit(self._run, submitted_at, func, *args)
+        except BaseException:
+            with self._lock:
+                self._queued -= 1
+            raise
+
+        return future.result()
+
+    def stats(self) -> HashingStats:
+
+        """
+        Snapshot of the hashing counters.
+
+        :return:  HashingStats object.
+        """
+
+        with self._lock:
+            return HashingStats(workers=self.workers,
+                                max_queue=self.max_queue,
+                                running=self._running,
+                                queued=self._queued,
+                                completed=self._completed,
+                                rejected=self._rejected,
+                                avg_wait_ms=(self._wait_time_total / self._completed * 1000
+                                             if self._completed else 0.0),
+                                max_wait_ms=self._wait_time_max * 1000)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+    def _run(self, submitted_at, func, *args):
+        waited = time.monotonic() - submitted_at
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+                self._wait_time_total += waited
+                self._wait_time_max = max(self._wait_time_max, waited)
+
+
+_pool: PasswordHashingPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_hashing_pool() -> PasswordHashingPool:
+    global _pool
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                settings = get_settings()
+                _pool = PasswordHashingPool(settings.password_hashing_workers,
+                                            settings.password_hashing_queue_size)
+
+    return _pool
+
+
+def shutdown_hashing_pool():
+    global _pool
+
+    with _pool_lock:
+        pool, _pool = _pool, None
+
+    if pool is not None:
+        pool.shutdown()
+
+
+def hashing_stats() -> HashingStats | None:
+    return _pool.stats() if _pool is not None else None
+
+
+def _argon2_hasher():
+    if argon2 is None:
+        raise RuntimeError('argon2 password hashes require the argon2-cffi package')
+
+    settings = get_settings()
+    return argon2.PasswordHasher(time_cost=settings.argon2_time_cost,
+                                 memory_cost=settings.argon2_memory_cost,
+                                 parallelism=settings.argon2_parallelism)
+
+
+def scheme_of(hashed: str) -> str:
+
+    """
+    Tell which scheme produced a stored hash. Both bcrypt and argon2 hashes carry their scheme
+    and cost parameters in the hash itself.
+
+    :param hashed:  The stored hash.
+    :return:  BCRYPT or ARGON2.
+    :raises ValueError:  If the hash was produced by neither.
+    """
+
+    if hashed.startswith('$argon2'):
+        return ARGON2
+    if hashed.startswith(('$2a$', '$2b$', '$2y$')):
+        return BCRYPT
+    raise ValueError('Unknown password hash format')
+
+
+def _hash(password: str) -> str:
+    settings = get_settings()
+
+    if settings.password_hash_scheme == ARGON2:
+        return _argon2_hasher().hash(password)
+
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(settings.bcrypt_rounds)).decode('ascii')
+
+
+def _check(password: str, hashed: str) -> bool:
+    if scheme_of(hashed) == ARGON2:
+        try:
+            return _argon2_hasher().verify(hashed, password)
+        except argon2.exceptions.VerificationError:
+            return False
+
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('ascii'))
+
+
+def hash_password(password: str) -> str:
+
+    """
+    Hash a password on the hashing pool with the configured scheme and cost.
+
+    :param password:  The plain text password.
+    :return:  The hash, carrying its scheme and parameters.
+    :raises HashingQueueFullError:  If the hashing queue is full.
+    """
+
+    return get_hashing_pool().run(_hash, password)
+
+
+def check_password(password: str, hashed: str | bytes) -> bool:
+
+    """
+    Check a password against a stored hash on the hashing pool. The scheme is read from the hash,
+    so hashes made under earlier settings keep working.
+
+    :param password:  The plain text password.
+    :param hashed:  The stored hash.
+    :return:  True if the password matches, False otherwise.
+    :raises HashingQueueFullError:  If the hashing queue is full.
+    """
+
+    if isinstance(hashed, bytes):
+        hashed = hashed.decode('ascii')
+
+    return get_hashing_pool().run(_check, password, hashed)
+
+
+def needs_rehash(hashed: str | bytes) -> bool:
+
+    """
+    Check if a stored hash was made with a different scheme or cost than the configured ones.
+    Only parses the hash, so it is cheap enough to call on every login.
+
+    :param hashed:  The stored hash.
+    :return:  True if the password should be hashed again, False otherwise.
+    """
+
+    if isinstance(hashed, bytes):
+        hashed = hashed.decode('ascii')
+
+    settings = get_settings()
+    scheme = scheme_of(hashed)
+
+    if scheme != settings.password_hash_scheme:
+        return True
+    if scheme == ARGON2:
+        return _argon2_hasher().check_needs_rehash(hashed)
+
+    return int(hashed.split('$')[2]) != settings.bcrypt_rounds
@@ -0,0 +1,142 @@
+import os
+import threading
+from dataclasses import dataclass
+from dotenv import load_dotenv
+from credentials_reader.credentials_reader import credentials_reader
+
+
+@dataclass(frozen=True)
+class Settings:
+    db_user: str
+    db_password: str
+    db_host: str
+    db_port: int
+    db_name: str
+    db_pool_min_size: int = 1
+    db_pool_max_size: int = 10
+    db_pool_idle_timeout: float = 300.0
+    db_pool_checkout_timeout: float = 30.0
+    db_pool_health_check_interval: float = 30.0
+    db_executor_workers: int = 10
+    request_threads: int = 40
+    jwt_secret_key: str | None = None
+    token_blacklist_sync_interval: float = 5.0
+    token_blacklist_purge_interval: float = 3600.0
+    token_blacklist_purge_batch_size: int = 1000
+    identity_cache_size: int = 10000
+    identity_cache_ttl: float = 60.0
+    access_cache_size: int = 10000
+    access_cache_ttl: float = 60.0
+    category_snapshot_ttl: float = 30.0
+    category_miss_reload_interval: float = 1.0
+    hot_half_life: float = 43200.0
+    password_hashing_workers: int = 4
+    password_hashing_queue_size: int = 12
+    password_hash_scheme: str = 'bcrypt'
+    bcrypt_rounds: int = 12
+    argon2_time_cost: int = 3
+    argon2_memory_cost: int = 65536
+    argon2_parallelism: int = 4
+
+
+_settings: Settings | None = None
+_lock = threading.Lock()
+
+
+def load_settings() -> Settings:
+
+    """
+    Build the settings from credentials_reader/credentials.txt and the environment (.env included).
+    Environment variables take precedence over the credentials file. .env is re-read with override,
+    so values edited there replace the ones loaded by an earlier call.
+
+    :return:  A new Settings object.
+    """
+
+    load_dotenv(override=True)
+    credentials = credentials_reader()
+
+    password_hash_scheme = os.getenv('PASSWORD_HASH_SCHEME', Settings.password_hash_scheme)
+    if password_hash_scheme not in ('bcrypt', 'argon2'):
+        raise ValueError(f'Unknown PASSWORD_HASH_SCHEME {password_hash_scheme!r}, expected bcrypt or argon2')
+
+    request_threads = int(os.getenv('REQUEST_THREADS', Settings.request_threads))
+    password_hashing_workers = int(os.getenv('PASSWORD_HASHING_WORKERS', Settings.password_hashing_workers))
+    password_hashing_queue_size = int(os.getenv('PASSWORD_HASHING_QUEUE_SIZE', Settings.password_hashing_queue_size))
+    # Every hash in flight blocks a request thread, so a burst of logins must not be able to take them all.
+    if password_hashing_workers + password_hashing_queue_size > request_threads // 2:
+        raise ValueError(f'PASSWORD_HASHING_WORKERS + PASSWORD_HASHING_QUEUE_SIZE may be at most half of '
+                         f'REQUEST_THREADS ({request_threads})')
+
+    return Settings(
+        db_user=os.getenv('DB_USER', credentials['user']),
+        db_password=os.getenv('DB_PASSWORD', credentials['password']),
+        db_host=os.getenv('DB_HOST', credentials['host']),
+        db_port=int(os.getenv('DB_PORT', credentials['port'])),
+        db_name=os.getenv('DB_NAME', credentials['database']),
+        db_pool_min_size=int(os.getenv('DB_POOL_MIN_SIZE', Settings.db_pool_min_size)),
+        db_pool_max_size=int(os.getenv('DB_POOL_MAX_SIZE', Settings.db_pool_max_size)),
+        db_pool_idle_timeout=float(os.getenv('DB_POOL_IDLE_TIMEOUT', Settings.db_pool_idle_timeout)),
+        db_pool_checkout_timeout=float(os.getenv('DB_POOL_CHECKOUT_TIMEOUT', Settings.db_pool_checkout_timeout)),
+        db_pool_health_check_interval=float(os.getenv('DB_POOL_HEALTH_CHECK_INTERVAL',
+                                                      Settings.db_pool_health_check_interval)),
+        db_executor_workers=int(os.getenv('DB_EXECUTOR_WORKERS',
+                                          os.getenv('DB_POOL_MAX_SIZE', Settings.db_executor_workers))),
+        request_threads=request_threads,
+        jwt_secret_key=os.getenv('JWT_SECRET_KEY'),
+        token_blacklist_sync_interval=float(os.getenv('TOKEN_BLACKLIST_SYNC_INTERVAL',
+                                                      Settings.token_blacklist_sync_interval)),
+        token_blacklist_purge_interval=float(os.getenv('TOKEN_BLACKLIST_PURGE_INTERVAL',
+                                                       Settings.token_blacklist_purge_interval)),
+        token_blacklist_purge_batch_size=int(os.getenv('TOKEN_BLACKLIST_PURGE_BATCH_SIZE',
+                                                       Settings.token_blacklist_purge_batch_size)),
+        identity_cache_size=int(os.getenv('IDENTITY_CACHE_SIZE', Settings.identity_cache_size)),
+        identity_cache_ttl=float(os.getenv('IDENTITY_CACHE_TTL', Settings.identity_cache_ttl)),
+        access_cache_size=int(os.getenv('ACCESS_CACHE_SIZE', Settings.access_cache_size)),
+        access_cache_ttl=float(os.getenv('ACCESS_CACHE_TTL', Settings.access_cache_ttl)),
+        category_snapshot_ttl=float(os.getenv('CATEGORY_SNAPSHOT_TTL', Settings.category_snapshot_ttl)),
+        category_miss_reload_interval=float(os.getenv('CATEGORY_MISS_RELOAD_INTERVAL',
+                                                      Settings.category_miss_reload_interval)),
+        hot_half_life=float(os.getenv('HOT_HALF_LIFE', Settings.hot_half_life)),
+        password_hashing_workers=password_hashing_workers,
+        password_hashing_queue_size=password_hashing_queue_size,
+        password_hash_scheme=password_hash_scheme,
+        bcrypt_rounds=int(os.getenv('BCRYPT_ROUNDS', Settings.bcrypt_rounds)),
+        argon2_time_cost=int(os.getenv('ARGON2_TIME_COST', Settings.argon2_time_cost)),
+        argon2_memory_cost=int(os.getenv('ARGON2_MEMORY_COST', Settings.argon2_memory_cost)),
+        argon2_parallelism=int(os.getenv('ARGON2_PARALLELISM', Settings.argon2_parallelism)))
+
+
+def get_settings() -> Settings:
+
+    """
+    Get the application settings, loading them on first use.
+
+    :return:  The current Settings object.
+    """
+
+    global _settings
+
+    if _settings is None:
+        with _lock:
+            if _settings is None:
+                _settings = load_settings()
+
+    return _settings
+
+
+def reload_settings() -> Settings:
+
+    """
+    Re-read the credentials file and the environment and replace the current settings.
+
+    :return:  The new Settings object.
+    """
+
+    global _settings
+
+    settings = load_settings()
+    with _lock:
+        _settings = settings
+
+    return settings
@@ -0,0 +1,63 @@
+import hashlib
+import threading
+import time
+
+
+def token_hash(token: str) -> bytes:
+
+    """
+    Hash a token for the blacklist, so the set never holds usable credentials.
+
+    :param token:  The JWT token.
+    :return:  The SHA-256 digest of the token.
+    """
+
+    return hashlib.sha256(token.encode('utf-8')).digest()
+
+
+class TokenBlacklist:
+
+    """
+    In-process set of revoked token hashes, each with the unix time its token expires (None if unknown).
+    Membership checks are a single dict lookup and never touch the database. Expired entries can be
+    dropped with `purge_expired`: an expired token is rejected by signature verification anyway.
+    """
+
+    def __init__(self):
+        self._entries: dict[bytes, float | None] = {}
+        self._lock = threading.Lock()
+        self.loaded = False
+        self.synced_until = None  # Latest revoked_at seen in the database
+
+    def __contains__(self, digest: bytes) -> bool:
+        return digest in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, digest: bytes, expires_at: float | None = None):
+        with self._lock:
+            self._entries[digest] = expires_at
+
+    def update(self, entries, synced_until=None):
+        with self._lock:
+            self._entries.update(entries)
+            if synced_until is not None and (self.synced_until is None or synced_until > self.synced_until):
+                self.synced_until = synced_until
+
+    def replace(self, entries, synced_until=None):
+        with self._lock:
+            self._entries = dict(entries)
+            self.synced_until = synced_until
+            self.loaded = True
+
+    def purge_expired(self, now: float | None = None) -> int:
+        now = time.time() if now is None else now
+
+        with self._lock:
+            expired = [digest for digest, expires_at in self._entries.items()
+                       if expires_at is not None and expires_at <= now]
+            for digest in expired:
+                del self._entries[digest]
+
+        return len(expired)
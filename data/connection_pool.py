@@ -0,0 +1,246 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection could be checked out within the checkout timeout."""
+
+
+class PoolClosedError(Exception):
+    """Raised when a connection is requested from a pool that has been closed."""
+
+
+@dataclass(frozen=True)
+class PoolStats:
+    size: int
+    idle: int
+    in_use: int
+    waiting: int
+    max_size: int
+    checkouts: int
+    timeouts: int
+    discarded: int
+    avg_checkout_ms: float
+    max_checkout_ms: float
+
+
+class ConnectionPool:
+
+    """
+    Bounded pool of database connections.
+
+    Connections are created lazily by `connect` up to `max_size`. Idle connections older than
+    `idle_timeout` seconds are closed on checkout (keeping at least `min_size` around), and
+    connections that sat idle longer than `health_check_interval` seconds are pinged before
+    being handed out, so a dropped server connection never reaches a query.
+    """
+
+    def __init__(self, connect, min_size: int = 1, max_size: int = 10, idle_timeout: float = 300.0,
+                 checkout_timeout: float = 30.0, health_check_interval: float = 30.0):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError('Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1')
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self.health_check_interval = health_check_interval
+
+        self._idle = deque()  # (connection, returned_at), most recently returned on the right
+        self._size = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+
+        self._checkouts = 0
+        self._timeouts = 0
+        self._discarded = 0
+        self._checkout_time_total = 0.0
+        self._checkout_time_max = 0.0
+
+    def acquire(self):
+
+        """
+        Check out a connection, waiting up to `checkout_timeout` seconds if the pool is exhausted.
+
+        :return:  A live connection. Must be handed back with `release`.
+        :raises PoolTimeoutError:  If no connection became available in time.
+        """
+
+        started = time.monotonic()
+        deadline = started + self.checkout_timeout
+
+        while True:
+            conn, returned_at, create = self._reserve(deadline)
+
+            if create:
+                try:
+                    conn = self._connect()
+                except BaseException:
+                    self._forget()
+                    raise
+            elif not self._is_healthy(conn, returned_at):
+                self._close_quietly(conn)
+                with self._lock:
+                    self._discarded += 1
+                    self._size -= 1
+                    self._in_use -= 1
+                    self._available.notify()
+                continue
+
+            self._record_checkout(time.monotonic() - started)
+            return conn
+
+    def release(self, conn, discard: bool = False):
+
+        """
+        Return a connection to the pool.
+
+        :param conn:  A connection previously obtained from `acquire`.
+        :param discard:  Close the connection instead of reusing it, e.g. after a driver error.
+        """
+
+        with self._lock:
+            self._in_use -= 1
+            if discard or self._closed:
+                self._size -= 1
+                self._discarded += discard
+            else:
+                self._idle.append((conn, time.monotonic()))
+                conn = None
+            self._available.notify()
+
+        if conn is not None:
+            self._close_quietly(conn)
+
+    def warm_up(self):
+
+        """
+        Open connections until the pool holds at least `min_size` of them.
+        """
+
+        while True:
+            with self._lock:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                conn = self._connect()
+            except BaseException:
+                with self._lock:
+                    self._size -= 1
+                raise
+            with self._lock:
+                self._idle.append((conn, time.monotonic()))
+                self._available.notify()
+
+    def stats(self) -> PoolStats:
+
+        """
+        Snapshot of the pool counters.
+
+        :return:  PoolStats object.
+        """
+
+        with self._lock:
+            return PoolStats(size=self._size,
+                             idle=len(self._idle),
+                             in_use=self._in_use,
+                             waiting=self._waiting,
+                             max_size=self.max_size,
+                             checkouts=self._checkouts,
+                             timeouts=self._timeouts,
+                             discarded=self._discarded,
+                             avg_checkout_ms=(self._checkout_time_total / self._checkouts * 1000
+                                              if self._checkouts else 0.0),
+                             max_checkout_ms=self._checkout_time_max * 1000)
+
+    def close(self):
+
+        """
+        Close all idle connections and refuse new checkouts.
+        Connections still in use are closed when they are released.
+        """
+
+        with self._lock:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._available.notify_all()
+
+        for conn in idle:
+            self._close_quietly(conn)
+
+    def _reserve(self, deadline):
+        stale = []
+        try:
+            with self._lock:
+                while True:
+                    if self._closed:
+                        raise PoolClosedError('Connection pool is closed')
+
+                    now = time.monotonic()
+                    # The oldest idle connections sit on the left; evict them while above min_size.
+                    while self._idle and self._size > self.min_size \
+                            and now - self._idle[0][1] > self.idle_timeout:
+                        stale.append(self._idle.popleft()[0])
+                        self._size -= 1
+
+                    if self._idle:
+                        conn, returned_at = self._idle.pop()
+                        self._in_use += 1
+                        return conn, returned_at, False
+
+                    if self._size < self.max_size:
+                        self._size += 1
+                        self._in_use += 1
+                        return None, None, True
+
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeoutError(
+                            f'Timed out after {self.checkout_timeout}s waiting for a database connection')
+
+                    self._waiting += 1
+                    try:
+                        self._available.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+        finally:
+            for conn in stale:
+                self._close_quietly(conn)
+
+    def _forget(self):
+        with self._lock:
+            self._size -= 1
+            self._in_use -= 1
+            self._available.notify()
+
+    def _is_healthy(self, conn, returned_at) -> bool:
+        if time.monotonic() - returned_at < self.health_check_interval:
+            return True
+        try:
+            conn.ping()
+            return True
+        except Exception:
+            return False
+
+    def _record_checkout(self, elapsed):
+        with self._lock:
+            self._checkouts += 1
+            self._checkout_time_total += elapsed
+            self._checkout_time_max = max(self._checkout_time_max, elapsed)
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
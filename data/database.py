@@ -1,40 +1,265 @@
-from mariadb import connect
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from functools import partial, wraps
+from mariadb import connect, InterfaceError, OperationalError
 from mariadb.connections import Connection
-from credentials_reader.credentials_reader import credentials_reader
+from common.settings import Settings, get_settings
+from data.connection_pool import ConnectionPool, PoolStats
 
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
 
-def _get_connection() -> Connection:
-    credentials = credentials_reader()
-    return connect(
-        user=credentials['user'],
-        password=credentials['password'],
-        host=credentials['host'],
-        port=credentials['port'],
-        database=credentials['database']
+
+def _connect(settings: Settings) -> Connection:
+    conn = connect(
+        user=settings.db_user,
+        password=settings.db_password,
+        host=settings.db_host,
+        port=settings.db_port,
+        database=settings.db_name
     )
+    conn.autocommit = True
+    return conn
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                settings = get_settings()
+                pool = ConnectionPool(
+                    partial(_connect, settings),
+                    min_size=settings.db_pool_min_size,
+                    max_size=settings.db_pool_max_size,
+                    idle_timeout=settings.db_pool_idle_timeout,
+                    checkout_timeout=settings.db_pool_checkout_timeout,
+                    health_check_interval=settings.db_pool_health_check_interval)
+                pool.warm_up()
+                _pool = pool
+
+    return _pool
+
+
+def close_pool():
+    global _pool
+
+    with _pool_lock:
+        pool, _pool = _pool, None
+
+    if pool is not None:
+        pool.close()
+
+
+def pool_stats() -> PoolStats | None:
+    return _pool.stats() if _pool is not None else None
+
+
+class _UnitOfWork:
+
+    """
+    Connection and transaction shared by every query run inside `transaction()`.
+    The connection is checked out and the transaction started on the first query only,
+    so a request that bails out early never touches the pool.
+    """
+
+    def __init__(self):
+        self.pool = None
+        self.conn = None
+        self.on_commit = []
+
+    def connection(self) -> Connection:
+        if self.conn is None:
+            self.pool = get_pool()
+            conn = self.pool.acquire()
+            try:
+                conn.begin()
+            except BaseException:
+                self.pool.release(conn, discard=True)
+                raise
+            self.conn = conn
+        return self.conn
+
+    def finish(self, commit: bool):
+        if self.conn is not None:
+            conn, self.conn = self.conn, None
+            try:
+                if commit:
+                    conn.commit()
+                else:
+                    conn.rollback()
+            except BaseException:
+                self.pool.release(conn, discard=True)
+                if commit:
+                    raise
+                # A failed rollback must not hide the error that caused it.
+                return
+            self.pool.release(conn)
+
+        if commit:
+            for callback in self.on_commit:
+                callback()
+
+
+_current_unit_of_work: ContextVar[_UnitOfWork | None] = ContextVar('current_unit_of_work', default=None)
+
+
+@contextmanager
+def transaction():
+
+    """
+    Run every query issued inside the block on one connection and commit them together.
+    The transaction is rolled back if the block raises. Nested blocks join the outer transaction.
+    """
+
+    if _current_unit_of_work.get() is not None:
+        yield
+        return
+
+    unit_of_work = _UnitOfWork()
+    reset_token = _current_unit_of_work.set(unit_of_work)
+    try:
+        yield
+    except BaseException:
+        unit_of_work.finish(commit=False)
+        raise
+    else:
+        unit_of_work.finish(commit=True)
+    finally:
+        _current_unit_of_work.reset(reset_token)
+
+
+def on_commit(callback):
+
+    """
+    Run `callback` once the current transaction has committed, or right away outside a transaction.
+    Dropped if the transaction rolls back. Used to refresh in-memory copies of data only after
+    the change is visible to other connections.
+    """
+
+    unit_of_work = _current_unit_of_work.get()
+    if unit_of_work is None:
+        callback()
+    else:
+        unit_of_work.on_commit.append(callback)
+
+
+def transactional(func):
+
+    """
+    Decorator running a route handler inside `transaction()`, i.e. one unit of work per request.
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with transaction():
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+@contextmanager
+def _get_connection():
+    unit_of_work = _current_unit_of_work.get()
+    if unit_of_work is not None:
+        yield unit_of_work.connection()
+        return
+
+    pool = get_pool()
+    conn = pool.acquire()
+    try:
+        yield conn
+    except (InterfaceError, OperationalError):
+        # The connection itself may be broken; never hand it out again.
+        pool.release(conn, discard=True)
+        raise
+    except BaseException:
+        pool.release(conn)
+        raise
+    else:
+        pool.release(conn)
 
 
 def read_query(sql: str, sql_params=()):
     with _get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute(sql, sql_params)
+        with conn.cursor() as cursor:
+            cursor.execute(sql, sql_params)
 
-        return list(cursor)
+            return list(cursor)
 
 
 def insert_query(sql: str, sql_params=()) -> int:
     with _get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute(sql, sql_params)
-        conn.commit()
+        with conn.cursor() as cursor:
+            cursor.execute(sql, sql_params)
 
-        return cursor.lastrowid
+            return cursor.lastrowid
 
 
 def update_query(sql: str, sql_params=()) -> bool:
     with _get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute(sql, sql_params)
-        conn.commit()
+        with conn.cursor() as cursor:
+            cursor.execute(sql, sql_params)
+
+            return cursor.rowcount
+
+
+def update_many(sql: str, seq_params) -> int:
+    with _get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.executemany(sql, seq_params)
+
+            return cursor.rowcount
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=get_settings().db_executor_workers,
+                                               thread_name_prefix='db')
+
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+
+    with _executor_lock:
+        executor, _executor = _executor, None
+
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+
+async def run_async(func, *args, **kwargs):
+
+    """
+    Run blocking database work on the dedicated database executor and await its result.
+    The executor is sized independently of Starlette's threadpool, so requests waiting on the
+    database queue here instead of holding a request thread.
+    """
+
+    loop = asyncio.get_running_loop()
+    context = copy_context()
+    return await loop.run_in_executor(_get_executor(), partial(context.run, func, *args, **kwargs))
+
+
+async def read_query_async(sql: str, sql_params=()):
+    return await run_async(read_query, sql, sql_params)
+
+
+async def insert_query_async(sql: str, sql_params=()) -> int:
+    return await run_async(insert_query, sql, sql_params)
+
 
-        return cursor.rowcount
\ No newline at end of file
+async def update_query_async(sql: str, sql_params=()) -> bool:
+    return await run_async(update_query, sql, sql_params)
@@ -0,0 +1,104 @@
+-- Baseline forum schema. Every statement is guarded with IF NOT EXISTS so the
+-- migration can be recorded against a database created before migrations existed.
+
+CREATE TABLE IF NOT EXISTS users (
+    id INT(11) NOT NULL AUTO_INCREMENT,
+    email VARCHAR(45) NOT NULL,
+    username VARCHAR(45) NOT NULL,
+    user_pass VARCHAR(255) NOT NULL,
+    first_name VARCHAR(45) NOT NULL,
+    last_name VARCHAR(45) NOT NULL,
+    is_admin INT(11) NOT NULL DEFAULT 0,
+    PRIMARY KEY (id),
+    UNIQUE INDEX email_UNIQUE (email),
+    UNIQUE INDEX username_UNIQUE (username)
+) ENGINE = InnoDB;
+
+CREATE TABLE IF NOT EXISTS categories (
+    id INT(11) NOT NULL AUTO_INCREMENT,
+    cat_name VARCHAR(45) NOT NULL,
+    creator_id INT(11) NOT NULL,
+    is_locked INT(11) NOT NULL DEFAULT 0,
+    is_private INT(11) NOT NULL DEFAULT 0,
+    PRIMARY KEY (id),
+    UNIQUE INDEX cat_name_UNIQUE (cat_name),
+    INDEX fk_categories_users1_idx (creator_id),
+    CONSTRAINT fk_categories_users1 FOREIGN KEY (creator_id) REFERENCES users (id)
+) ENGINE = InnoDB;
+
+CREATE TABLE IF NOT EXISTS topics (
+    id INT(11) NOT NULL AUTO_INCREMENT,
+    top_name VARCHAR(45) NOT NULL,
+    category_id INT(11) NOT NULL,
+    user_id INT(11) NOT NULL,
+    topic_date DATETIME NOT NULL,
+    is_locked INT(11) NOT NULL DEFAULT 0,
+    best_reply_id INT(11) NULL,
+    PRIMARY KEY (id),
+    UNIQUE INDEX top_name_UNIQUE (top_name),
+    INDEX fk_topics_categories_idx (category_id),
+    INDEX fk_topics_users1_idx (user_id),
+    INDEX fk_topics_replies1_idx (best_reply_id),
+    CONSTRAINT fk_topics_categories FOREIGN KEY (category_id) REFERENCES categories (id),
+    CONSTRAINT fk_topics_users1 FOREIGN KEY (user_id) REFERENCES users (id)
+) ENGINE = InnoDB;
+
+CREATE TABLE IF NOT EXISTS replies (
+    id INT(11) NOT NULL AUTO_INCREMENT,
+    topic_id INT(11) NOT NULL,
+    user_id INT(11) NOT NULL,
+    reply_date DATETIME NOT NULL,
+    reply_text VARCHAR(200) NOT NULL,
+    replies_reply_id INT(11) NULL,
+    PRIMARY KEY (id, topic_id),
+    INDEX fk_replies_topics1_idx (topic_id),
+    INDEX fk_replies_users1_idx (user_id),
+    INDEX fk_replies_replies1_idx (replies_reply_id),
+    CONSTRAINT fk_replies_topics1 FOREIGN KEY (topic_id) REFERENCES topics (id),
+    CONSTRAINT fk_replies_users1 FOREIGN KEY (user_id) REFERENCES users (id),
+    CONSTRAINT fk_replies_replies1 FOREIGN KEY (replies_reply_id) REFERENCES replies (id)
+) ENGINE = InnoDB;
+
+-- topics and replies reference each other, so this key can only be added once both exist.
+ALTER TABLE topics
+    ADD CONSTRAINT fk_topics_replies1 FOREIGN KEY IF NOT EXISTS (best_reply_id) REFERENCES replies (id);
+
+CREATE TABLE IF NOT EXISTS votes (
+    user_id INT(11) NOT NULL,
+    reply_id INT(11) NOT NULL,
+    vote INT(11) NOT NULL,
+    PRIMARY KEY (user_id, reply_id),
+    INDEX fk_users_has_replies_users1_idx (user_id),
+    INDEX fk_users_has_replies_replies1_idx (reply_id),
+    CONSTRAINT fk_users_has_replies_users1 FOREIGN KEY (user_id) REFERENCES users (id),
+    CONSTRAINT fk_users_has_replies_replies1 FOREIGN KEY (reply_id) REFERENCES replies (id)
+) ENGINE = InnoDB;
+
+CREATE TABLE IF NOT EXISTS messages (
+    id INT(11) NOT NULL AUTO_INCREMENT,
+    sender_id INT(11) NOT NULL,
+    receiver_id INT(11) NOT NULL,
+    message_date DATETIME NOT NULL,
+    message_text VARCHAR(500) NOT NULL,
+    PRIMARY KEY (id),
+    INDEX fk_messages_users1_idx (sender_id),
+    INDEX fk_messages_users2_idx (receiver_id),
+    CONSTRAINT fk_messages_users1 FOREIGN KEY (sender_id) REFERENCES users (id),
+    CONSTRAINT fk_messages_users2 FOREIGN KEY (receiver_id) REFERENCES users (id)
+) ENGINE = InnoDB;
+
+CREATE TABLE IF NOT EXISTS private_cat_access (
+    category_id INT(11) NOT NULL,
+    user_id INT(11) NOT NULL,
+    access_type INT(11) NOT NULL DEFAULT 0,
+    PRIMARY KEY (category_id, user_id),
+    INDEX fk_categories_has_users_categories1_idx (category_id),
+    INDEX fk_categories_has_users_users1_idx (user_id),
+    CONSTRAINT fk_categories_has_users_categories1 FOREIGN KEY (category_id) REFERENCES categories (id),
+    CONSTRAINT fk_categories_has_users_users1 FOREIGN KEY (user_id) REFERENCES users (id)
+) ENGINE = InnoDB;
+
+CREATE TABLE IF NOT EXISTS tokens_blacklist (
+    token VARCHAR(255) NOT NULL,
+    PRIMARY KEY (token)
+) ENGINE = InnoDB;
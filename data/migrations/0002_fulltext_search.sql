@@ -0,0 +1,6 @@
+-- FULLTEXT indexes used by topic search (GET /topics?search=...).
+-- Searches run MATCH ... AGAINST in boolean mode with prefix terms, so they
+-- are served by these indexes instead of scanning every topic name.
+
+ALTER TABLE topics ADD FULLTEXT INDEX IF NOT EXISTS ft_topics_top_name (top_name);
+ALTER TABLE replies ADD FULLTEXT INDEX IF NOT EXISTS ft_replies_reply_text (reply_text);
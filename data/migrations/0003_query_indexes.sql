@@ -0,0 +1,23 @@
+-- Composite indexes for the query shapes in services/ that the foreign key
+-- indexes of the baseline schema do not serve on their own.
+
+-- messages_service.all_messages: sender/receiver pair ordered by date.
+CREATE INDEX IF NOT EXISTS ix_messages_sender_receiver_date
+    ON messages (sender_id, receiver_id, message_date);
+
+-- messages_service.all_conversations: "sender_id = ? or receiver_id = ?" is an
+-- index merge; this side lets it read the other party without touching rows.
+CREATE INDEX IF NOT EXISTS ix_messages_receiver_sender
+    ON messages (receiver_id, sender_id);
+
+-- Per-user access lookups read the access type straight from the index.
+CREATE INDEX IF NOT EXISTS ix_private_cat_access_user
+    ON private_cat_access (user_id, category_id, access_type);
+
+-- topics_service.get_topics: default keyset page on (topic_date, id).
+CREATE INDEX IF NOT EXISTS ix_topics_topic_date
+    ON topics (topic_date);
+
+-- topics_service.get_topics: keyset page on (is_locked, id).
+CREATE INDEX IF NOT EXISTS ix_topics_is_locked
+    ON topics (is_locked);
@@ -0,0 +1,10 @@
+-- Workers keep the token blacklist in memory and poll for rows revoked since
+-- their last sync. expires_at lets them drop entries once the token is dead.
+-- Both columns are UTC.
+
+ALTER TABLE tokens_blacklist
+    ADD COLUMN IF NOT EXISTS expires_at DATETIME NULL,
+    ADD COLUMN IF NOT EXISTS revoked_at DATETIME(6) NOT NULL DEFAULT UTC_TIMESTAMP(6);
+
+CREATE INDEX IF NOT EXISTS ix_tokens_blacklist_revoked_at
+    ON tokens_blacklist (revoked_at);
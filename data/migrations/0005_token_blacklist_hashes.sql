@@ -0,0 +1,30 @@
+-- Store a fixed-width SHA-256 digest of each revoked token instead of the
+-- token itself, so the primary key stays 32 bytes and a leaked table holds no
+-- usable credentials. The digest matches common.token_blacklist.token_hash.
+ALTER TABLE tokens_blacklist
+    ADD COLUMN IF NOT EXISTS token_hash BINARY(32) NULL FIRST;
+
+-- The backfill and the key swap read the token column, which the swap drops,
+-- so both only run while it still exists and a re-run skips them.
+BEGIN NOT ATOMIC
+    IF EXISTS (SELECT 1 FROM information_schema.columns
+               WHERE table_schema = database()
+                 AND table_name = 'tokens_blacklist'
+                 AND column_name = 'token') THEN
+        UPDATE tokens_blacklist SET token_hash = UNHEX(SHA2(token, 256)) WHERE token_hash IS NULL;
+
+        ALTER TABLE tokens_blacklist
+            DROP PRIMARY KEY,
+            DROP COLUMN token,
+            MODIFY token_hash BINARY(32) NOT NULL,
+            ADD PRIMARY KEY (token_hash);
+    END IF;
+END;
+
+-- Rows revoked before expires_at existed: create_token issues tokens valid for
+-- 9000 minutes, so none of them outlives its revoked_at by more than that.
+UPDATE tokens_blacklist SET expires_at = revoked_at + INTERVAL 9000 MINUTE WHERE expires_at IS NULL;
+
+-- Expired rows are deleted in batches by blacklist_service.purge_expired.
+CREATE INDEX IF NOT EXISTS ix_tokens_blacklist_expires_at
+    ON tokens_blacklist (expires_at);
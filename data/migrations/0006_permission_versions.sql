@@ -0,0 +1,4 @@
+-- Tokens carry a snapshot of the user's private category grants stamped with
+-- perm_ver. Every grant change bumps the version, invalidating the snapshot.
+ALTER TABLE users
+    ADD COLUMN IF NOT EXISTS perm_ver INT UNSIGNED NOT NULL DEFAULT 0;
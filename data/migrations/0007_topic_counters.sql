@@ -0,0 +1,34 @@
+-- Counters maintained by replies_service.create and votes_service.vote, so
+-- topics can be listed and sorted by activity without aggregating replies.
+-- score is the sum of the votes on the topic's replies: +1 per upvote, -1 per
+-- downvote. manage.py repair-topic-counters recomputes all three.
+ALTER TABLE topics
+    ADD COLUMN IF NOT EXISTS reply_count INT UNSIGNED NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS last_activity DATETIME NULL,
+    ADD COLUMN IF NOT EXISTS score INT NOT NULL DEFAULT 0;
+
+UPDATE topics t
+    LEFT JOIN (SELECT topic_id, COUNT(*) AS reply_count, MAX(reply_date) AS last_reply_date
+               FROM replies
+               GROUP BY topic_id) r ON r.topic_id = t.id
+    LEFT JOIN (SELECT r.topic_id, SUM(2 * v.vote - 1) AS score
+               FROM votes v
+               JOIN replies r ON r.id = v.reply_id
+               GROUP BY r.topic_id) v ON v.topic_id = t.id
+SET t.reply_count = COALESCE(r.reply_count, 0),
+    t.last_activity = GREATEST(t.topic_date, COALESCE(r.last_reply_date, t.topic_date)),
+    t.score = COALESCE(v.score, 0);
+
+-- Keyset pagination compares last_activity, so it may not be NULL.
+ALTER TABLE topics
+    MODIFY last_activity DATETIME NOT NULL;
+
+-- topics_service.get_topics: keyset pages on (counter, id).
+CREATE INDEX IF NOT EXISTS ix_topics_last_activity
+    ON topics (last_activity);
+
+CREATE INDEX IF NOT EXISTS ix_topics_reply_count
+    ON topics (reply_count);
+
+CREATE INDEX IF NOT EXISTS ix_topics_score
+    ON topics (score);
@@ -0,0 +1,22 @@
+-- "Hot" ranking of topics, see topics_service.HOT_EPOCH. The positive and
+-- negative weights are kept in separate log-space sums, so each reply and vote
+-- is added to its own topic only and opposite events cancel instead of clamping.
+ALTER TABLE topics
+    ADD COLUMN IF NOT EXISTS hot_pos DOUBLE NOT NULL DEFAULT -1000000000,
+    ADD COLUMN IF NOT EXISTS hot_neg DOUBLE NOT NULL DEFAULT -1000000000;
+
+-- Starting values for the default 12 hour half-life, counting all activity at
+-- the last reply. manage.py recompute-hot-scores replaces them. Topics created
+-- since are never at the default, so a re-run leaves their sums alone.
+UPDATE topics
+SET hot_pos = LN(1 + reply_count + GREATEST(score, 0)) + (UNIX_TIMESTAMP(last_activity) - 1704067200) * LN(2) / 43200
+WHERE hot_pos = -1000000000;
+
+-- topics_service.HOT_FLOOR when the negative weights outweigh the positive ones.
+ALTER TABLE topics
+    ADD COLUMN IF NOT EXISTS hot DOUBLE AS
+        (IF(hot_pos - hot_neg > 1e-9, hot_pos + LN(1 - EXP(hot_neg - hot_pos)), -1000000000)) PERSISTENT;
+
+-- topics_service.get_topics: keyset pages on (hot, id).
+CREATE INDEX IF NOT EXISTS ix_topics_hot
+    ON topics (hot);
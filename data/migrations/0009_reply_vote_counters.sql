@@ -0,0 +1,20 @@
+-- Vote counters maintained by votes_service.vote, so reply scores are read
+-- from the reply instead of aggregating votes. votes.vote is 1 for an upvote
+-- and 0 for a downvote.
+ALTER TABLE replies
+    ADD COLUMN IF NOT EXISTS upvotes INT NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS downvotes INT NOT NULL DEFAULT 0;
+
+UPDATE replies r
+    JOIN (SELECT reply_id, SUM(vote = 1) AS upvotes, SUM(vote = 0) AS downvotes
+          FROM votes
+          GROUP BY reply_id) v ON v.reply_id = r.id
+SET r.upvotes = v.upvotes,
+    r.downvotes = v.downvotes;
+
+ALTER TABLE replies
+    ADD COLUMN IF NOT EXISTS score INT AS (upvotes - downvotes) PERSISTENT;
+
+-- topics_service.get_replies: a topic's replies by score, keyset on (score, id).
+CREATE INDEX IF NOT EXISTS ix_replies_topic_score
+    ON replies (topic_id, score);
@@ -0,0 +1,142 @@
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from data.database import read_query, update_query
+
+MIGRATIONS_DIR = Path(__file__).parent / 'migrations'
+_FILE_NAME = re.compile(r'^(\d{4})_(\w+)\.sql$')
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    path: Path
+
+    def statements(self) -> list[str]:
+        return split_statements(self.path.read_text(encoding='utf-8'))
+
+
+def discover(directory: Path = MIGRATIONS_DIR) -> list[Migration]:
+
+    """
+    Find the migration files (NNNN_name.sql) in a directory.
+
+    :param directory:  The directory holding the migrations.
+    :return:  List of Migration objects ordered by version.
+    """
+
+    migrations = []
+    for path in directory.iterdir():
+        match = _FILE_NAME.match(path.name)
+        if match:
+            migrations.append(Migration(int(match.group(1)), match.group(2), path))
+
+    migrations.sort(key=lambda migration: migration.version)
+
+    versions = [migration.version for migration in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f'Duplicate migration versions in {directory}')
+
+    return migrations
+
+
+def split_statements(sql: str) -> list[str]:
+
+    """
+    Split a migration file into statements. Lines starting with '--' are comments and
+    a ';' at the end of a line ends a statement, so ';' may not end a line inside a string.
+    A compound statement opened by a 'BEGIN NOT ATOMIC' line runs until a line 'END;', so
+    a migration can guard steps that are not re-runnable on their own with IF ... END IF.
+
+    :param sql:  The content of the migration file.
+    :return:  List of SQL statements without the trailing ';'.
+    """
+
+    statements = []
+    current = []
+    in_block = False
+
+    for line in sql.splitlines():
+        if line.strip().startswith('--'):
+            continue
+        if not ''.join(current).strip() and line.strip().upper() == 'BEGIN NOT ATOMIC':
+            in_block = True
+        current.append(line)
+        if in_block:
+            ends = line.strip().upper() == 'END;'
+        else:
+            ends = line.rstrip().endswith(';')
+        if ends:
+            in_block = False
+            statement = '\n'.join(current).strip().rstrip(';').strip()
+            if statement:
+                statements.append(statement)
+            current = []
+
+    statement = '\n'.join(current).strip()
+    if statement:
+        statements.append(statement)
+
+    return statements
+
+
+def ensure_migrations_table():
+    update_query('''create table if not exists schema_migrations (
+                        version int not null primary key,
+                        name varchar(255) not null,
+                        applied_at datetime not null)''')
+
+
+def applied_versions() -> set[int]:
+
+    """
+    Get the versions recorded in schema_migrations.
+
+    :return:  Set of applied migration versions.
+    """
+
+    ensure_migrations_table()
+    return {version for version, in read_query('select version from schema_migrations')}
+
+
+def pending(migrations: list[Migration] | None = None) -> list[Migration]:
+
+    """
+    Get the migrations that have not been applied yet.
+
+    :param migrations:  The known migrations. Default is every file in MIGRATIONS_DIR.
+    :return:  List of pending Migration objects ordered by version.
+    """
+
+    migrations = discover() if migrations is None else migrations
+    applied = applied_versions()
+    return [migration for migration in migrations if migration.version not in applied]
+
+
+def migrate(target: int | None = None, migrations: list[Migration] | None = None) -> list[Migration]:
+
+    """
+    Apply the pending migrations in version order, recording each one in schema_migrations.
+    MariaDB commits DDL implicitly, so a migration is not atomic: statements are written
+    with IF NOT EXISTS guards and a failed migration can simply be run again.
+
+    :param target:  Highest version to apply. Default is None (apply everything).
+    :param migrations:  The known migrations. Default is every file in MIGRATIONS_DIR.
+    :return:  List of the Migration objects that were applied.
+    """
+
+    applied = []
+
+    for migration in pending(migrations):
+        if target is not None and migration.version > target:
+            break
+
+        for statement in migration.statements():
+            update_query(statement)
+
+        update_query('insert into schema_migrations(version, name, applied_at) values(?, ?, now())',
+                     (migration.version, migration.name))
+        applied.append(migration)
+
+    return applied
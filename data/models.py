@@ -29,7 +29,12 @@ class TopicResponse(BaseModel):
     topic_date: str  # date as a string
     is_locked: bool = False
     best_reply_id: Optional[int] = None
+    reply_count: int = 0
+    last_activity: Optional[str] = None  # date of the last reply, or of the topic if it has none
+    score: int = 0  # upvotes minus downvotes over all replies
+    hot: float = 0.0  # decayed activity, see topics_service.HOT_EPOCH
     replies: Optional[list['ReplyResponse']] = None
+    replies_next_cursor: Optional[str] = None
 
     @classmethod
     def from_query_result(cls, top_name, user_id, topic_date, is_locked, best_reply_id):
@@ -42,6 +47,16 @@ class TopicResponse(BaseModel):
         )
 
 
+class TopicPage(BaseModel):
+    topics: list[TopicResponse]
+    next_cursor: Optional[str] = None
+
+
+class ReplyPage(BaseModel):
+    replies: list['ReplyResponse']
+    next_cursor: Optional[str] = None
+
+
 class TopicCreation(BaseModel):
     top_name: str = Field(min_length=3, max_length=20, examples=['Engines'])
     category_id: int
@@ -91,12 +106,16 @@ class ReplyResponse(BaseModel):
     user_id: int
     reply_date: datetime
     reply_text: str
+    upvotes: int = 0
+    downvotes: int = 0
 
     @classmethod
-    def from_query_result(cls, user_id, reply_date, reply_text):
+    def from_query_result(cls, user_id, reply_date, reply_text, upvotes=0, downvotes=0):
         return cls(user_id=user_id,
                    reply_date=reply_date,
-                   reply_text=reply_text
+                   reply_text=reply_text,
+                   upvotes=upvotes,
+                   downvotes=downvotes
                    )
 
 class Reply(BaseModel):
@@ -153,6 +172,18 @@ class UserCategoryAccess(BaseModel):
     user_id: int
     category_id: int
 
+class AccessGrant(BaseModel):
+    user_id: int
+    category_id: int
+    access: Literal['read', 'write', 'none']  # 'none' revokes the user's access
+
+class AccessGrantResult(BaseModel):
+    user_id: int
+    category_id: int
+    access: str
+    status: Literal['granted', 'changed', 'unchanged', 'revoked', 'no_access',
+                    'category_not_found', 'category_not_private', 'user_not_found', 'duplicate']
+
 class UserResponse(BaseModel):
     id: int | None = None
     email: str
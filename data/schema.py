@@ -0,0 +1,85 @@
+from dataclasses import dataclass
+from data.database import read_query
+
+
+@dataclass(frozen=True)
+class IndexRequirement:
+    table: str
+    columns: tuple[str, ...]
+    used_by: str
+    fulltext: bool = False
+
+    def __str__(self):
+        kind = 'FULLTEXT ' if self.fulltext else ''
+        return f"{kind}{self.table}({', '.join(self.columns)}) used by {self.used_by}"
+
+
+# The lookups services/ run on every request. An index satisfies a requirement
+# when its leading columns are the required columns, in order. used_by lists the
+# functions relying on it, separated by ', '.
+REQUIRED_INDEXES = (
+    IndexRequirement('users', ('username',), 'users_service.login_user'),
+    IndexRequirement('users', ('email',), 'users_service.check_if_email_exists'),
+    IndexRequirement('tokens_blacklist', ('token_hash',), 'blacklist_service.revoke'),
+    IndexRequirement('tokens_blacklist', ('revoked_at',), 'blacklist_service.sync'),
+    IndexRequirement('tokens_blacklist', ('expires_at',), 'blacklist_service.purge_expired'),
+    IndexRequirement('categories', ('cat_name',), 'categories_service.cat_name_exists'),
+    IndexRequirement('topics', ('top_name',), 'topics_service.top_name_exists'),
+    IndexRequirement('topics', ('category_id',), 'categories_service.view_topics'),
+    IndexRequirement('topics', ('topic_date',), 'topics_service.get_topics'),
+    IndexRequirement('topics', ('is_locked',), 'topics_service.get_topics'),
+    IndexRequirement('topics', ('last_activity',), 'topics_service.get_topics'),
+    IndexRequirement('topics', ('reply_count',), 'topics_service.get_topics'),
+    IndexRequirement('topics', ('score',), 'topics_service.get_topics'),
+    IndexRequirement('topics', ('hot',), 'topics_service.get_topics'),
+    IndexRequirement('topics', ('top_name',), 'topics_service.get_topics', fulltext=True),
+    IndexRequirement('replies', ('topic_id',), 'topics_service.view_replies_for_topics, topics_service.get_replies'),
+    IndexRequirement('replies', ('topic_id', 'score'), 'topics_service.get_replies'),
+    IndexRequirement('replies', ('reply_text',), 'topics_service.get_topics', fulltext=True),
+    IndexRequirement('votes', ('user_id', 'reply_id'), 'votes_service.vote'),
+    IndexRequirement('messages', ('sender_id', 'receiver_id', 'message_date'), 'messages_service.all_messages'),
+    IndexRequirement('messages', ('receiver_id', 'sender_id'), 'messages_service.all_conversations'),
+    IndexRequirement('private_cat_access', ('category_id', 'user_id'), 'topics_service.get_topics'),
+    IndexRequirement('private_cat_access', ('user_id',), 'users_service.get_access_map'),
+)
+
+
+def existing_indexes() -> dict[str, list[tuple[tuple[str, ...], bool]]]:
+
+    """
+    Read the indexes of the current database from information_schema.
+
+    :return:  Dictionary mapping each table to a list of (columns, is_fulltext) tuples.
+    """
+
+    data = read_query('''select table_name, index_name, column_name, index_type
+                         from information_schema.statistics
+                         where table_schema = database()
+                         order by table_name, index_name, seq_in_index''')
+
+    indexes = {}
+    for table, index, column, index_type in data:
+        indexes.setdefault((table, index), ([], index_type == 'FULLTEXT'))[0].append(column)
+
+    result = {}
+    for (table, _), (columns, fulltext) in indexes.items():
+        result.setdefault(table, []).append((tuple(columns), fulltext))
+
+    return result
+
+
+def missing_indexes(requirements=REQUIRED_INDEXES, indexes=None) -> list[IndexRequirement]:
+
+    """
+    Check the required indexes against the database.
+
+    :param requirements:  The IndexRequirement objects to check. Default is REQUIRED_INDEXES.
+    :param indexes:  The indexes as returned by existing_indexes(). Default is read from the database.
+    :return:  List of the IndexRequirement objects no index satisfies.
+    """
+
+    indexes = existing_indexes() if indexes is None else indexes
+
+    return [requirement for requirement in requirements
+            if not any(fulltext == requirement.fulltext and columns[:len(requirement.columns)] == requirement.columns
+                       for columns, fulltext in indexes.get(requirement.table, ()))]
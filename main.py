@@ -1,20 +1,47 @@
+import asyncio
+import anyio.to_thread
+from contextlib import asynccontextmanager
 import uvicorn
 from fastapi import FastAPI, APIRouter
+from common.password_hashing import shutdown_hashing_pool
+from common.settings import get_settings
+from data.database import close_pool, shutdown_executor
+from routers.admin import admin_router
 from routers.categories import cat_router
 from routers.replies import replies_router
 from routers.users import user_router
 from routers.votes import votes_router
 from routers.messages import message_router
 from routers.topics import topics_router
+from services import blacklist_service
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = get_settings()
+    # Sync endpoints run on anyio's threadpool; size it to match the hashing limits checked against it
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.request_threads
+    blacklist_sync = asyncio.create_task(
+        blacklist_service.sync_periodically(settings.token_blacklist_sync_interval))
+    blacklist_purge = asyncio.create_task(
+        blacklist_service.purge_periodically(settings.token_blacklist_purge_interval,
+                                             settings.token_blacklist_purge_batch_size))
+    yield
+    blacklist_sync.cancel()
+    blacklist_purge.cancel()
+    shutdown_executor()
+    shutdown_hashing_pool()
+    close_pool()
+
+
+app = FastAPI(lifespan=lifespan)
 app.include_router(user_router)
 app.include_router(votes_router)
 app.include_router(replies_router)
 app.include_router(message_router)
 app.include_router(cat_router)
 app.include_router(topics_router)
+app.include_router(admin_router)
 
 if __name__ == "__main__":
     uvicorn.run('main:app', host="127.0.0.1", port=8000)
-
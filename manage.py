@@ -0,0 +1,94 @@
+import argparse
+import sys
+from data import migrator, schema
+from services import topics_service
+from data.database import close_pool
+
+
+def migrate(args) -> int:
+    applied = migrator.migrate(target=args.to)
+
+    for migration in applied:
+        print(f'Applied {migration.version:04d}_{migration.name}')
+
+    if not applied:
+        print('Database is up to date.')
+
+    return 0
+
+
+def status(args) -> int:
+    applied = migrator.applied_versions()
+
+    for migration in migrator.discover():
+        state = 'applied' if migration.version in applied else 'pending'
+        print(f'{migration.version:04d}_{migration.name}  {state}')
+
+    return 0
+
+
+def check_indexes(args) -> int:
+    missing = schema.missing_indexes()
+
+    for requirement in missing:
+        print(f'Missing index: {requirement}')
+
+    if not missing:
+        print(f'All {len(schema.REQUIRED_INDEXES)} required indexes are present.')
+
+    return 1 if missing else 0
+
+
+def repair_topic_counters(args) -> int:
+    repaired = topics_service.recompute_counters(args.batch_size)
+
+    print(f'Repaired the counters of {repaired} topics.')
+
+    return 0
+
+
+def recompute_hot_scores(args) -> int:
+    updated = topics_service.recompute_hot_scores(args.batch_size)
+
+    print(f'Recomputed the hot scores of {updated} topics.')
+
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Forum API management commands.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    migrate_parser = commands.add_parser('migrate', help='Apply pending database migrations.')
+    migrate_parser.add_argument('--to', type=int, default=None, help='Highest migration version to apply.')
+    migrate_parser.set_defaults(handler=migrate)
+
+    status_parser = commands.add_parser('status', help='List migrations and whether they are applied.')
+    status_parser.set_defaults(handler=status)
+
+    check_parser = commands.add_parser('check-indexes',
+                                       help='Report indexes the service queries need but the database lacks.')
+    check_parser.set_defaults(handler=check_indexes)
+
+    repair_parser = commands.add_parser('repair-topic-counters',
+                                        help='Recompute the reply count, last activity and score of every topic.')
+    repair_parser.add_argument('--batch-size', type=int, default=topics_service.REPAIR_BATCH_SIZE,
+                               help='Topics repaired per statement.')
+    repair_parser.set_defaults(handler=repair_topic_counters)
+
+    hot_parser = commands.add_parser('recompute-hot-scores',
+                                     help='Recompute the hot score of every topic from its replies and votes.')
+    hot_parser.add_argument('--batch-size', type=int, default=topics_service.REPAIR_BATCH_SIZE,
+                            help='Topics recomputed per statement.')
+    hot_parser.set_defaults(handler=recompute_hot_scores)
+
+    args = parser.parse_args(argv)
+
+    try:
+        return args.handler(args)
+    finally:
+        close_pool()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,56 @@
+from dataclasses import asdict
+from fastapi import APIRouter
+from common import password_hashing
+from common.auth import CurrentUser
+from common.responses import Forbidden
+from common.settings import reload_settings
+from data import database
+from services import categories_service, users_service
+
+admin_router = APIRouter(prefix='/admin', tags=['Admin'])
+
+
+@admin_router.post('/reload_settings')
+def reload_app_settings(user: CurrentUser):
+
+    """
+    Re-read the credentials file and environment variables. Only admins can reload settings.
+    The connection pool, the database executor, the password hashing pool and the identity, access and
+    category caches are rebuilt with the new settings on next use.
+
+    :param user:  The authenticated user.
+    :return:  A message indicating the settings have been reloaded.
+    """
+
+    if not users_service.is_admin(user['is_admin']):
+        return Forbidden('Only admins can reload settings')
+
+    reload_settings()
+    database.close_pool()
+    database.shutdown_executor()
+    password_hashing.shutdown_hashing_pool()
+    users_service.reset_caches()
+    categories_service.reset_caches()
+
+    return {'message': 'Settings reloaded.'}
+
+
+@admin_router.get('/stats')
+def get_stats(user: CurrentUser):
+
+    """
+    Counters of the database connection pool and the password hashing pool. Only admins can view them.
+    A pool that has not been used since startup or the last settings reload is reported as null.
+
+    :param user:  The authenticated user.
+    :return:  Dictionary with the stats of each pool.
+    """
+
+    if not users_service.is_admin(user['is_admin']):
+        return Forbidden('Only admins can view stats')
+
+    pool_stats = database.pool_stats()
+    hashing_stats = password_hashing.hashing_stats()
+
+    return {'database_pool': asdict(pool_stats) if pool_stats is not None else None,
+            'password_hashing': asdict(hashing_stats) if hashing_stats is not None else None}
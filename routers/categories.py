@@ -1,70 +1,66 @@
-from fastapi import APIRouter, Header
+from fastapi import APIRouter
+from common.auth import CurrentUser
 from services.users_service import *
 from data.models import CategoryResponse, CategoryCreation
 from common.responses import NotFound, BadRequest
 from services import categories_service
-from typing import Annotated, List
+from data.database import run_async, transactional
+from typing import List
 
 cat_router = APIRouter(prefix="/categories", tags=["Categories"])
 
 
 @cat_router.get('/', response_model=List[CategoryResponse])
-def get_all_categories(token: Annotated[str, Header()]):
+def get_all_categories(user: CurrentUser):
 
     """
     Get all categories from the database.
 
-    :param token:  JWT token for authentication.
+    :param user:  The authenticated user.
     :return:  List of CategoryResponse objects.
     """
 
-    authenticate_user(token)
-
     data = categories_service.get_categories()
 
     return data
 
 
 @cat_router.get('/{id}', response_model=CategoryResponse)
-def get_category_by_id(id: int, token: Annotated[str, Header()]):
+async def get_category_by_id(id: int, user: CurrentUser):
 
     """
     Get a category by its ID.
 
     :param id:  The ID of the category. Must exist in the database.
-    :param token:  JWT token for authentication.
+    :param user:  The authenticated user.
     :return:  CategoryResponse object.
     """
 
-    user = authenticate_user(token)
+    context = await run_async(categories_service.get_context, id, user)
 
-    if not categories_service.exists(id):
+    if not context.exists:
         return NotFound('Category not found')
 
-    if categories_service.check_if_private(id):
-        access = categories_service.check_user_access(user['user_id'], id)
+    if context.is_private and context.access is None and not is_admin(user['is_admin']):
+        return Forbidden('Category is private')
 
-        if access is None and not is_admin(user['is_admin']):
-            return Forbidden('Category is private')
-
-    category = categories_service.get_by_id(id)
+    category = await run_async(categories_service.get_by_id, id)
 
     return category
 
 
 @cat_router.post('/')
-def create_category(name: CategoryCreation, token: Annotated[str, Header()]):
+@transactional
+def create_category(name: CategoryCreation, user: CurrentUser):
 
     """
     Create a new category. Only admins can create categories.
 
     :param name:  The name of the category. Can't be empty. Should be unique.
-    :param token:  JWT token for authentication.
+    :param user:  The authenticated user.
     :return:  The created CategoryResponse object.
     """
 
-    user = authenticate_user(token)
-
     if not name.cat_name:
         return BadRequest('Category name cannot be empty')
 
@@ -80,18 +76,17 @@ def create_category(name: CategoryCreation, token: Annotated[str, Header()]):
 
 
 @cat_router.put('/lock/{id}')
-def lock_category(id: int, token: Annotated[str, Header()]):
+@transactional
+def lock_category(id: int, user: CurrentUser):
 
     """
     Lock a category. Only admins can lock categories. Category must exist. Category must not be locked.
 
     :param id:  The ID of the category.
-    :param token:  JWT token for authentication.
+    :param user:  The authenticated user.
     :return: CategoryResponse object.
     """
 
-    user = authenticate_user(token)
-
     if not is_admin(user['is_admin']):
         return Forbidden('Only admins can lock categories')
 
@@ -104,18 +99,17 @@ def lock_category(id: int, token: Annotated[str, Header()]):
 
 
 @cat_router.put('/make_private/{id}')
-def make_category_private(id: int, token: Annotated[str, Header()]):
+@transactional
+def make_category_private(id: int, user: CurrentUser):
 
     """
     Make a category private. Only admins can make categories private. Category must exist. Category must not be private.
 
     :param id:  The ID of the category.
-    :param token:  JWT token for authentication.
+    :param user:  The authenticated user.
     :return:  CategoryResponse object.
     """
 
-    user = authenticate_user(token)
-
     if not is_admin(user['is_admin']):
         return Forbidden('Only admins can make categories private')
 
@@ -128,18 +122,17 @@ def make_category_private(id: int, token: Annotated[str, Header()]):
 
 
 @cat_router.put('/unlock/{id}')
-def unlock_category(id: int, token: Annotated[str, Header()]):
+@transactional
+def unlock_category(id: int, user: CurrentUser):
 
     """
     Unlock a category. Only admins can unlock categories. Category must exist. Category must be locked.
 
     :param id:  The ID of the category.
-    :param token:  JWT token for authentication.
+    :param user:  The authenticated user.
     :return:  CategoryResponse object.
     """
 
-    user = authenticate_user(token)
-
     if not is_admin(user['is_admin']):
         return Forbidden('Only admins can unlock categories')
 
@@ -152,19 +145,18 @@ def unlock_category(id: int, token: Annotated[str, Header()]):
 
 
 @cat_router.put('/make_public/{id}')
-def make_category_public(id: int, token: Annotated[str, Header()]):
+@transactional
+def make_category_public(id: int, user: CurrentUser):
 
     """
     Make a category public.
     Only admins can make categories public. Category must exist. Category must be private. Remove all private access.
 
     :param id:  The ID of the category.
-    :param token:  JWT token for authentication.
+    :param user:  The authenticated user.
     :return:  CategoryResponse object.
     """
 
-    user = authenticate_user(token)
-
     if not is_admin(user['is_admin']):
         return Forbidden('Only admins can make categories public')
 
@@ -1,21 +1,24 @@
-from fastapi import APIRouter, Header
+from fastapi import APIRouter
+from common.auth import CurrentUser
 from data.models import MessageText, Message, UserResponse
 from common.responses import BadRequest, NotFound
 from services import messages_service, users_service
-from typing import Annotated, List
+from data.database import run_async, transactional
+from typing import List
 
 message_router = APIRouter(prefix="/messages/users", tags=["Messages"])
 
 
 @message_router.post('/')
-def create_message(msg: MessageText, token: Annotated[str, Header()]):
+@transactional
+def create_message(msg: MessageText, user: CurrentUser):
 
     """
     Sends a new message to a specified receiver. Validates the receiver's existence and message content.
 
     Args:
         msg (MessageText): The message content, including the receiver ID and text.
-        token (Annotated[str, Header()]): The JWT token for authentication.
+        user (dict): The authenticated user.
 
     Returns:
         Union[Dict[str, Any], BadRequest, NotFound]: A success message if the message is sent, or an error response if validation fails.
@@ -31,7 +34,7 @@ def create_message(msg: MessageText, token: Annotated[str, Header()]):
     if len(msg.text) > 500:
         return BadRequest(content="Reply text cannot be more than 500 characters.")
 
-    message = messages_service.create(msg, token)
+    message = messages_service.create(msg, user)
 
     return message
 
@@ -39,24 +42,24 @@ def create_message(msg: MessageText, token: Annotated[str, Header()]):
 
 
 @message_router.get('/{receiver_id}')
-def view_conversation(receiver_id: int, token: Annotated[str, Header()]):
+async def view_conversation(receiver_id: int, user: CurrentUser):
 
     """
     Retrieves the conversation history between the authenticated user and a specific receiver.
 
     Args:
         receiver_id (int): The ID of the receiver to view the conversation with.
-        token (Annotated[str, Header()]): The JWT token for authentication.
+        user (dict): The authenticated user.
 
     Returns:
         Union[List[Dict[str, Any]], NotFound]: A list of messages if the conversation exists, or an error response if no conversation is found.
     """
 
-    receiver = users_service.get_user_by_id(receiver_id)
+    receiver = await run_async(users_service.get_user_by_id, receiver_id)
     if not receiver:
         return NotFound(content="Receiver does not exist.")
 
-    conversation = messages_service.all_messages(receiver_id, token)
+    conversation = await run_async(messages_service.all_messages, receiver_id, user)
 
     if not conversation:
         return NotFound(content="No conversation found")
@@ -70,19 +73,19 @@ def view_conversation(receiver_id: int, token: Annotated[str, Header()]):
 
 
 @message_router.get('/')
-def view_conversations(token: Annotated[str, Header()]):
+def view_conversations(user: CurrentUser):
 
     """
     Retrieves a list of all conversations for the authenticated user.
 
     Args:
-        token (Annotated[str, Header()]): The JWT token for authentication.
+        user (dict): The authenticated user.
 
     Returns:
         Union[List[Dict[str, Any]], NotFound]: A list of conversation overviews if any exist, or an error response if no conversations are found.
     """
 
-    data = messages_service.all_conversations(token)
+    data = messages_service.all_conversations(user)
 
     if not data:
         return NotFound(content="No conversations found")
@@ -1,95 +1,93 @@
-from fastapi import APIRouter, Header, Query, HTTPException
-from typing import Optional, List
-from data.database import read_query
-from data.models import TopicCreation, TopicResponse
+from fastapi import APIRouter, Query, HTTPException
+from typing import Literal, Optional
+from data.database import run_async, transactional
+from data.models import TopicCreation, TopicResponse, TopicPage, ReplyPage
 from services import topics_service, categories_service, replies_service
 from common.responses import NotFound, BadRequest, Forbidden, Unauthorized
-from typing import Annotated
-from services.users_service import authenticate_user, is_admin
+from services.users_service import is_admin
+from common.auth import CurrentUser
 topics_router = APIRouter(prefix="/topics", tags=["Topics"])
 
 
-@topics_router.get("/", response_model=List[TopicResponse])
-def get_topics(
-    token: Annotated[str, Header()],
+@topics_router.get("/", response_model=TopicPage)
+async def get_topics(
+    user: CurrentUser,
     search: Optional[str] = Query(None, description="Search by topic name"),
+    in_replies: bool = Query(False, description="Also search the text of replies"),
     sort_by: Optional[str] = Query("topic_date", description="Field to sort by"),
     sort_order: Optional[str] = Query("asc", description="Sort order: 'asc' or 'desc'"),
-    limit: int = Query(10, description="Number of topics to return"),
-    offset: int = Query(0, description="Number of topics to skip")
+    limit: int = Query(10, ge=1, le=100, description="Number of topics to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    include: Literal['replies', 'none'] = Query('none', description="'replies' to embed each topic's first replies"),
+    replies_limit: int = Query(10, ge=1, le=100, description="Number of replies embedded in each topic")
 ):
 
     """
     Get all topics from the database.
     Only accessible by users with access to the category. Admins can access all topics.
 
-    :param token:  JWT token for authentication.
-    :param search:  Search by topic name. Default is None.
-    :param sort_by:  Field to sort by.
-    Default is 'topic_date'. Possible values: 'topic_date', 'top_name', 'category_id', 'user_id', 'is_locked'.
+    :param user:  The authenticated user.
+    :param search:  Search by topic name. Every word must match the start of a word in the name. Default is None.
+    :param in_replies:  Also return topics with a reply matching the search. Default is False.
+    :param sort_by:  Field to sort by. Default is 'topic_date'.
+    Possible values: 'topic_date', 'top_name', 'category_id', 'user_id', 'is_locked', 'last_activity', 'reply_count',
+    'score', 'hot', and 'relevance' when searching.
     :param sort_order:  Sort order: 'asc' or 'desc'. Default is 'asc'.
-    :param limit:  Number of topics to return. Default is 10.
-    :param offset:  Number of topics to skip. Default is 0.
-    :return:  List of TopicResponse objects.
+    :param limit:  Number of topics to return. Default is 10, at most 100.
+    :param cursor:  Opaque cursor returned as next_cursor by the previous page. Default is None (first page).
+    :param include:  'replies' to embed the first replies of each topic, 'none' to embed none. Default is 'none'.
+    :param replies_limit:  Number of replies embedded in each topic. Default is 10, at most 100.
+    :return:  TopicPage object with the topics and the cursor of the next page.
     """
-    user = authenticate_user(token)
-    query = "SELECT id, top_name, user_id, topic_date, is_locked, best_reply_id, category_id FROM topics"
-    params = []
+    if sort_by not in topics_service.SORT_COLUMNS and sort_by != topics_service.RELEVANCE:
+        raise HTTPException(status_code=400, detail="Invalid sort field.")
 
-    if search:
-        query += " WHERE top_name LIKE ?"
-        params.append(f"%{search}%")
+    if sort_by == topics_service.RELEVANCE and not search:
+        raise HTTPException(status_code=400, detail="Sorting by relevance requires a search.")
 
-    if sort_by not in ["topic_date", "top_name", "category_id", "user_id", "is_locked"]:
-        raise HTTPException(status_code=400, detail="Invalid sort field.")
-    query += f" ORDER BY {sort_by} {sort_order.upper()}"
-
-    query += " LIMIT ? OFFSET ?"
-    params.extend([limit, offset])
-
-    data = read_query(query, params)
-
-    topics = [
-        TopicResponse(
-            top_name=row[1],
-            user_id=row[2],
-            topic_date=str(row[3]),
-            is_locked=row[4],
-            best_reply_id=row[5],
-            replies=topics_service.view_replies(row[0])
-        )
-        for row in data
-        if is_admin(user['is_admin']) or
-        (categories_service.check_if_private(row[6]) is False) or
-        (categories_service.check_user_access(user['user_id'], row[6]) is not None)
-    ]
-    return topics if topics else NotFound("No topics found for you.")
+    if sort_order.lower() not in ["asc", "desc"]:
+        raise HTTPException(status_code=400, detail="Invalid sort order.")
+
+    topics, next_cursor = await run_async(topics_service.get_topics, user, search, sort_by, sort_order, limit, cursor,
+                                          in_replies, replies_limit if include == 'replies' else 0)
+
+    if not topics and cursor is None:
+        return NotFound("No topics found for you.")
+
+    return TopicPage(topics=topics, next_cursor=next_cursor)
 
 
 @topics_router.get('/{id}')
-def get_topic_by_id(id: int, token: Annotated[str, Header()]):
+async def get_topic_by_id(
+    id: int,
+    user: CurrentUser,
+    include: Literal['replies', 'none'] = Query('replies', description="'none' to leave out the replies"),
+    replies_limit: int = Query(20, ge=1, le=100, description="Number of replies to embed"),
+    replies_cursor: Optional[str] = Query(None, description="replies_next_cursor of the previous response")
+):
 
     """
     Get a topic by its ID. Only accessible by users with access to the category. Admins can access all topics.
 
     :param id:  The ID of the topic. Must exist in the database.
-    :param token:  JWT token for authentication.
+    :param user:  The authenticated user.
+    :param include:  'replies' to embed a page of the topic's replies, 'none' to embed none. Default is 'replies'.
+    :param replies_limit:  Number of replies to embed. Default is 20, at most 100.
+    :param replies_cursor:  Opaque cursor returned as replies_next_cursor by the previous response. Default is None (first replies).
     :return:  TopicResponse object.
     """
 
-    user = authenticate_user(token)
-
-    if not topics_service.exists(id):
+    state = await run_async(topics_service.get_state, id)
+    if state is None:
         return NotFound('Topic not found')
 
-    topic = topics_service.get_by_id(id)
-
-    if categories_service.check_if_private(topics_service.check_category(id)):
+    context = await run_async(categories_service.get_context, state.category_id, user)
 
-        access = categories_service.check_user_access(user['user_id'], topics_service.check_category(id))
+    if context.is_private and context.access is None and not is_admin(user['is_admin']):
+        return Unauthorized('Category is private')
 
-        if access is None and not is_admin(user['is_admin']):
-            return Unauthorized('Category is private')
+    topic = await run_async(topics_service.get_by_id, id, replies_limit if include == 'replies' else 0,
+                            replies_cursor)
 
     if topic is None:
         return NotFound('Topic not found')
@@ -97,34 +95,69 @@ def get_topic_by_id(id: int, token: Annotated[str, Header()]):
     return topic
 
 
+@topics_router.get('/{id}/replies', response_model=ReplyPage)
+async def get_topic_replies(
+    id: int,
+    user: CurrentUser,
+    limit: int = Query(20, ge=1, le=100, description="Number of replies to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    sort_by: Literal['date', 'score'] = Query('date', description="'date' for posting order, 'score' for best first")
+):
+
+    """
+    Get a page of a topic's replies in the order they were posted, or by score.
+    Only accessible by users with access to the category. Admins can access all topics.
+
+    :param id:  The ID of the topic. Must exist in the database.
+    :param user:  The authenticated user.
+    :param limit:  Number of replies to return. Default is 20, at most 100.
+    :param cursor:  Opaque cursor returned as next_cursor by the previous page. Default is None (first page).
+    :param sort_by:  'date' for the order they were posted, 'score' for the highest score (upvotes minus downvotes) first.
+    Default is 'date'.
+    :return:  ReplyPage object with the replies and the cursor of the next page.
+    """
+
+    state = await run_async(topics_service.get_state, id)
+    if state is None:
+        return NotFound('Topic not found')
+
+    context = await run_async(categories_service.get_context, state.category_id, user)
+
+    if context.is_private and context.access is None and not is_admin(user['is_admin']):
+        return Unauthorized('Category is private')
+
+    replies, next_cursor = await run_async(topics_service.get_replies, id, limit, cursor, sort_by)
+
+    return ReplyPage(replies=replies, next_cursor=next_cursor)
+
+
 @topics_router.post('/', response_model=TopicResponse, response_model_exclude={"replies", "user_id"})
-def create_topic(topic: TopicCreation, token: Annotated[str, Header()], ):
+@transactional
+def create_topic(topic: TopicCreation, user: CurrentUser):
 
     """
     Create a new topic.
     Only accessible by users with write access to the category. Admins can create topics in any category.
 
     :param topic:  The topic details.
-    :param token:  JWT token for authentication.
+    :param user:  The authenticated user.
     :return:  TopicResponse object.
     """
 
-    user = authenticate_user(token)
+    context = categories_service.get_context(topic.category_id, user)
 
-    if not categories_service.exists(topic.category_id):
+    if not context.exists:
         return NotFound('Category not found')
 
-    if categories_service.check_if_private(topic.category_id):
+    if context.is_private and not is_admin(user['is_admin']):
 
-        access = categories_service.check_user_access(user['user_id'], topic.category_id)
-
-        if access is None and not is_admin(user['is_admin']):
+        if context.access is None:
             return Unauthorized('Category is private')
 
-        if access == 0 and not is_admin(user['is_admin']):
+        if context.access == 0:
             return Unauthorized('You have only read access to this category')
 
-    if categories_service.check_if_locked(topic.category_id):
+    if context.is_locked:
         return Forbidden('Category is locked')
 
     if topics_service.top_name_exists(topic.top_name):
@@ -136,17 +169,17 @@ def create_topic(topic: TopicCreation, token: Annotated[str, Header()], ):
 
 
 @topics_router.put('/lock/{id}')
-def lock_topic(id: int, token: Annotated[str, Header()]):
+@transactional
+def lock_topic(id: int, user: CurrentUser):
 
     """
     Lock a topic. Only admins can lock topics.
 
     :param id:  The ID of the topic.
-    :param token:  JWT token for authentication.
+    :param user:  The authenticated user.
     :return:  TopicResponse object.
     """
 
-    user = authenticate_user(token)
     if not topics_service.exists(id):
         return NotFound('Topic not found')
 
@@ -159,18 +192,17 @@ def lock_topic(id: int, token: Annotated[str, Header()]):
 
 
 @topics_router.put('/unlock/{id}')
-def unlock_topic(id: int, token: Annotated[str, Header()]):
+@transactional
+def unlock_topic(id: int, user: CurrentUser):
 
     """
     Unlock a topic. Only admins can unlock topics.
 
     :param id:  The ID of the topic.
-    :param token:  JWT token for authentication.
+    :param user:  The authenticated user.
     :return:   TopicResponse object.
     """
 
-    user = authenticate_user(token)
-
     if not topics_service.exists(id):
         return NotFound('Topic not found')
 
@@ -183,19 +215,18 @@ def unlock_topic(id: int, token: Annotated[str, Header()]):
 
 
 @topics_router.put('/{topic_id}/best_reply/{reply_id}')
-def choose_best_reply(topic_id: int, reply_id: int, token: Annotated[str, Header()]):
+@transactional
+def choose_best_reply(topic_id: int, reply_id: int, user: CurrentUser):
 
     """
     Choose the best reply for a topic. Only the topic owner can choose the best reply.
 
     :param topic_id:  The ID of the topic.
     :param reply_id:  The ID of the reply.
-    :param token:  JWT token for authentication.
+    :param user:  The authenticated user.
     :return:  TopicResponse object.
     """
 
-    user = authenticate_user(token)
-
     if not topics_service.exists(topic_id):
         return NotFound('Topic not found')
 
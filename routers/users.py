@@ -1,27 +1,27 @@
 from typing import Annotated
-from fastapi import APIRouter, Header, HTTPException
+from fastapi import APIRouter, Body, Header, HTTPException
 from starlette import status
 
 from services import users_service, categories_service
-from data.models import User, UserResponse, TEmail, TUsername, TPassword, TName, LoginData, UserCategoryAccess, UserAccessResponse
+from data.models import User, UserResponse, TEmail, TUsername, TPassword, TName, LoginData, UserCategoryAccess, UserAccessResponse, AccessGrant, AccessGrantResult
 from common.responses import BadRequest, Forbidden, Unauthorized, NotFound
+from data.database import transactional
+from common.auth import CurrentUser
 
 user_router = APIRouter(prefix='/users', tags=['Users'])
 
 
 @user_router.get('/', response_model=list[UserResponse])
-def get_all_users(token: Annotated[str, Header()]):
+def get_all_users(user_data: CurrentUser):
     """
     Retrieves a list of all users. Only accessible by admins.
 
     Args:
-        token (Annotated[str, Header()]): The JWT token for authentication.
+        user_data (dict): The authenticated user.
 
     Returns:
         List[UserResponse]: A list of UserResponse objects representing all users.
     """
-    user_data = users_service.authenticate_user(token)
-
     if users_service.is_admin(user_data['is_admin']):
         data = users_service.get_users()#response_model=List[schemas.User]
         return data
@@ -32,6 +32,7 @@ def get_all_users(token: Annotated[str, Header()]):
 @user_router.post('/', response_model=User,
                   response_model_exclude={'password', 'is_admin'},
                   status_code=status.HTTP_201_CREATED)
+@transactional
 def register_user(user: User):
     """
     Registers a new user with the provided details.
@@ -70,6 +71,7 @@ def login_user(login_data: LoginData):
         return Unauthorized('The spoon does not exist, but your credentials should! Check them again.')
 
 @user_router.post('/logout')
+@transactional
 def logout_user(token: Annotated[str, Header()]):
     """
     Logs out a user by blacklisting the provided JWT token.
@@ -87,30 +89,31 @@ def logout_user(token: Annotated[str, Header()]):
         return BadRequest(e.detail)
 
 @user_router.put('/read_access')
-def give_user_read_access(user_category_id: UserCategoryAccess, token: Annotated[str, Header()]): # 0 write, 1 read
+@transactional
+def give_user_read_access(user_category_id: UserCategoryAccess, user_data: CurrentUser): # 0 write, 1 read
     """
     Grants read access to a user for a specific category. Only accessible by admins.
 
     Args:
         user_category_id (UserCategoryAccess): The user and category details.
-        token (Annotated[str, Header()]): The JWT token for authentication.
+        user_data (dict): The authenticated user.
 
     Returns:
         Union[str, BadRequest, Forbidden]: A message indicating the access change, or an error response.
     """
     #if UserCategoryAccess.user_id == 1:
     #    return BadRequest('User is admin so he already has read/write access by default!')
-    if not categories_service.exists(user_category_id.category_id):
+    context = categories_service.get_grant_context(user_category_id.category_id, user_category_id.user_id)
+
+    if not context.exists:
         return NotFound('Category does not exist!')
 
-    if not categories_service.check_if_private(user_category_id.category_id):
+    if not context.is_private:
         return BadRequest(f'Category {user_category_id.category_id} is not private.')
 
-    if not users_service.user_id_exists(user_category_id.user_id):
+    if not context.user_exists:
         return NotFound(f'User with id {user_category_id.user_id} does not exist!')
 
-    user_data = users_service.authenticate_user(token)
-
     if users_service.is_admin(user_data['is_admin']):
         data = users_service.give_user_r_access(user_category_id.user_id, user_category_id.category_id)#response_model=List[schemas.User]
         return data or BadRequest(f'User with id {user_category_id.user_id} already has read access for category with id {user_category_id.category_id}!')
@@ -118,28 +121,29 @@ def give_user_read_access(user_category_id: UserCategoryAccess, token: Annotated
     return Forbidden('Only Neo can access this endpoint')
 
 @user_router.put('/write_access')
-def give_user_write_access(user_category_id: UserCategoryAccess, token: Annotated[str, Header()]): # 0 write, 1 read
+@transactional
+def give_user_write_access(user_category_id: UserCategoryAccess, user_data: CurrentUser): # 0 write, 1 read
     """
     Grants write access to a user for a specific category. Only accessible by admins.
 
     Args:
         user_category_id (UserCategoryAccess): The user and category details.
-        token (Annotated[str, Header()]): The JWT token for authentication.
+        user_data (dict): The authenticated user.
 
     Returns:
         Union[str, BadRequest, Forbidden]: A message indicating the access change, or an error response.
     """
-    if not categories_service.exists(user_category_id.category_id):
+    context = categories_service.get_grant_context(user_category_id.category_id, user_category_id.user_id)
+
+    if not context.exists:
         return NotFound('Category does not exist!')
 
-    if not categories_service.check_if_private(user_category_id.category_id):
+    if not context.is_private:
         return BadRequest(f'Category {user_category_id.category_id} is not private.')
 
-    if not users_service.user_id_exists(user_category_id.user_id):
+    if not context.user_exists:
         return NotFound(f'User with id {user_category_id.user_id} does not exist!')
 
-    user_data = users_service.authenticate_user(token)
-
     if users_service.is_admin(user_data['is_admin']):
         data = users_service.give_user_w_access(user_category_id.user_id, user_category_id.category_id)#response_model=List[schemas.User]
         return data or BadRequest(f'User with id {user_category_id.user_id} already has write access for category with id {user_category_id.category_id}!')
@@ -147,58 +151,78 @@ def give_user_write_access(user_category_id: UserCategoryAccess, token: Annotate
     return Forbidden('Only Neo can access this endpoint')
 
 @user_router.delete('/revoke_access', status_code=status.HTTP_204_NO_CONTENT)
-def revoke_user_access(token: Annotated[str, Header()],
+@transactional
+def revoke_user_access(user_data: CurrentUser,
                        user_category_id: UserCategoryAccess
                        ):
     """
     Revokes access for a user from a specific category. Only accessible by admins.
 
     Args:
-        token (Annotated[str, Header()]): The JWT token for authentication.
+        user_data (dict): The authenticated user.
         user_category_id (UserCategoryAccess): The user and category details.
         status_code (int, optional): The status code to return. Defaults to status.HTTP_204_NO_CONTENT.
 
     Returns:
         Union[NoContent, BadRequest, Forbidden]: A message indicating the access revocation, or an error response.
     """
-    if not categories_service.exists(user_category_id.category_id):
+    context = categories_service.get_grant_context(user_category_id.category_id, user_category_id.user_id)
+
+    if not context.exists:
         return NotFound('Category does not exist!')
 
-    if not users_service.check_if_private(user_category_id.category_id):
+    if not context.is_private:
         return BadRequest(f'Category {user_category_id.category_id} is not private.')
 
-    if not users_service.user_id_exists(user_category_id.user_id):
+    if not context.user_exists:
         return NotFound(f'User with id {user_category_id.user_id} does not exist!')
 
-    user_data = users_service.authenticate_user(token)
-
     if users_service.is_admin(user_data['is_admin']):
         data = users_service.revoke_access(user_category_id.user_id, user_category_id.category_id)#response_model=List[schemas.User]
         return data or BadRequest(f'User with id {user_category_id.user_id} has no existing access for category with id {user_category_id.category_id}!')
 
     return Forbidden('Only Neo can access this endpoint')
 
+@user_router.put('/access', response_model=list[AccessGrantResult])
+@transactional
+def update_users_access(grants: Annotated[list[AccessGrant], Body(max_length=10000)], user_data: CurrentUser):
+    """
+    Grants, changes or revokes access for many users and categories at once. Only accessible by admins.
+    The whole batch is applied in one transaction.
+
+    Args:
+        grants (List[AccessGrant]): The changes to apply. access 'none' revokes.
+        user_data (dict): The authenticated user.
+
+    Returns:
+        Union[List[AccessGrantResult], Forbidden]: One result per item, in the order given, or an error response.
+    """
+    if not users_service.is_admin(user_data['is_admin']):
+        return Forbidden('Only Neo can access this endpoint')
+
+    return users_service.apply_access_grants(grants)
+
 @user_router.get('/privileges', response_model=list[UserAccessResponse],
                   response_model_exclude={'password', 'is_admin'})
-def view_privileged_users(token: Annotated[str, Header()], category_id):
+def view_privileged_users(user_data: CurrentUser, category_id: int):
     """
     Retrieves a list of users with access to a specific category. Only accessible by admins.
 
     Args:
-        token (Annotated[str, Header()]): The JWT token for authentication.
+        user_data (dict): The authenticated user.
         category_id (int): The category ID.
 
     Returns:
         List[UserAccessResponse]: A list of UserAccessResponse objects representing users with access to the category.
     """
-    if not categories_service.exists(category_id):
+    context = categories_service.get_context(category_id)
+
+    if not context.exists:
         return NotFound('Category does not exist!')
 
-    if not users_service.check_if_private(category_id):
+    if not context.is_private:
         return BadRequest(f'Category {category_id} is not private.')
 
-    user_data = users_service.authenticate_user(token)
-
     if users_service.is_admin(user_data['is_admin']):
         data = users_service.view_privileged_users(category_id)
         return data
@@ -1,13 +1,15 @@
-from fastapi import APIRouter, Header
+from fastapi import APIRouter
+from common.auth import CurrentUser
 from services import votes_service, replies_service
 from common.responses import NotFound, BadRequest
 from data.models import VoteResult
-from typing import Annotated
+from data.database import transactional
 
 votes_router = APIRouter(prefix="/votes", tags=["Votes"])
 
 @votes_router.put('/{reply_id}')
-def put_vote(reply_id: int, vote: VoteResult, token: Annotated[str, Header()]):
+@transactional
+def put_vote(reply_id: int, vote: VoteResult, user: CurrentUser):
     
     """
     Casts a vote on a specific reply. Verifies the existence of the reply before voting.
@@ -15,7 +17,7 @@ def put_vote(reply_id: int, vote: VoteResult, token: Annotated[str, Header()]):
     Args:
         reply_id (int): The ID of the reply to vote on.
         vote (VoteResult): The vote data, containing details about the vote.
-        token (Annotated[str, Header()]): The JWT token for authentication.
+        user (dict): The authenticated user.
 
     Returns:
         Union[Dict[str, Any], NotFound]: A success message if the vote is cast successfully, or an error message if the reply is not found.
@@ -26,4 +28,4 @@ def put_vote(reply_id: int, vote: VoteResult, token: Annotated[str, Header()]):
     if not replies_service.reply_exists(reply_id):
         return NotFound(content="Reply is not found.")
 
-    return votes_service.vote(reply_id, vote, token)
+    return votes_service.vote(reply_id, vote, user)
@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from common.token_blacklist import TokenBlacklist, token_hash
+from data.database import insert_query, read_query, update_query, run_async
+
+logger = logging.getLogger(__name__)
+
+# Rows are picked up by revoked_at, which is set when the insert runs, not when it commits.
+# Re-reading a short window behind the last row seen catches revocations committed out of order.
+SYNC_OVERLAP = timedelta(seconds=30)
+
+# Rows deleted per statement when purging expired tokens, keeping each delete's locks short.
+PURGE_BATCH_SIZE = 1000
+
+blacklist = TokenBlacklist()
+_load_lock = threading.Lock()
+
+
+def _expiry(expires_at: datetime | None) -> float | None:
+    if expires_at is None:
+        return None
+    return expires_at.replace(tzinfo=timezone.utc).timestamp()
+
+
+def _entries(rows):
+    return {bytes(digest): _expiry(expires_at) for digest, expires_at, _ in rows}
+
+
+def load():
+
+    """
+    Replace the in-memory blacklist with the unexpired rows of tokens_blacklist.
+    """
+
+    rows = read_query('''select token_hash, expires_at, revoked_at from tokens_blacklist
+                         where expires_at is null or expires_at > utc_timestamp()''')
+
+    blacklist.replace(_entries(rows), max((revoked_at for _, _, revoked_at in rows), default=None))
+
+
+def sync():
+
+    """
+    Add the revocations made by other workers since the last sync and drop expired entries.
+    """
+
+    if not blacklist.loaded or blacklist.synced_until is None:
+        load()
+    else:
+        rows = read_query('''select token_hash, expires_at, revoked_at from tokens_blacklist
+                             where revoked_at >= ?''', (blacklist.synced_until - SYNC_OVERLAP,))
+        blacklist.update(_entries(rows), max((revoked_at for _, _, revoked_at in rows), default=None))
+
+    blacklist.purge_expired()
+
+
+def is_revoked(token: str) -> bool:
+
+    """
+    Check if a token has been revoked. The blacklist is loaded on first use; after that the check
+    is served from memory.
+
+    :param token:  The JWT token.
+    :return:  True if the token is blacklisted, False otherwise.
+    """
+
+    if not blacklist.loaded:
+        with _load_lock:
+            if not blacklist.loaded:
+                load()
+
+    return token_hash(token) in blacklist
+
+
+def revoke(token: str, exp: int | None = None):
+
+    """
+    Blacklist a token in the database and in this worker's memory. Other workers see it on their next sync.
+    Only the token's hash is stored.
+
+    :param token:  The JWT token.
+    :param exp:  The 'exp' claim of the token (unix time), if it has one.
+    """
+
+    expires_at = datetime.fromtimestamp(exp, timezone.utc).replace(tzinfo=None) if exp is not None else None
+
+    digest = token_hash(token)
+
+    insert_query('insert into tokens_blacklist(token_hash, expires_at) values(?, ?)', (digest, expires_at))
+    blacklist.add(digest, _expiry(expires_at))
+
+
+def purge_expired(batch_size: int = PURGE_BATCH_SIZE) -> int:
+
+    """
+    Delete the rows of tokens whose 'exp' has passed. An expired token fails signature verification
+    before the blacklist is consulted, so its row is dead weight. Rows are deleted `batch_size` at a time.
+
+    :param batch_size:  Maximum rows deleted by one statement.
+    :return:  The number of rows deleted.
+    """
+
+    total = 0
+    while True:
+        deleted = update_query('''delete from tokens_blacklist where expires_at <= utc_timestamp()
+                                  order by expires_at limit ?''', (batch_size,))
+        total += deleted
+        if deleted < batch_size:
+            return total
+
+
+async def sync_periodically(interval: float):
+
+    """
+    Keep the blacklist in step with the database for the lifetime of the application.
+    The first sync runs immediately, so the blacklist is warm before most requests arrive.
+
+    :param interval:  Seconds between two syncs.
+    """
+
+    while True:
+        try:
+            await run_async(sync)
+        except Exception:
+            logger.exception('Token blacklist sync failed')
+        await asyncio.sleep(interval)
+
+
+async def purge_periodically(interval: float, batch_size: int = PURGE_BATCH_SIZE):
+
+    """
+    Delete expired blacklist rows for the lifetime of the application.
+
+    :param interval:  Seconds between two purges.
+    :param batch_size:  Maximum rows deleted by one statement.
+    """
+
+    while True:
+        try:
+            deleted = await run_async(purge_expired, batch_size)
+            if deleted:
+                logger.info('Purged %d expired tokens from the blacklist', deleted)
+        except Exception:
+            logger.exception('Token blacklist purge failed')
+        await asyncio.sleep(interval)
@@ -1,6 +1,157 @@
-from data.database import insert_query, read_query, update_query
+import threading
+import time
+from typing import NamedTuple
+from data.database import insert_query, read_query, update_query, on_commit
 from data.models import CategoryResponse, TopicResponse
+from common.cache import TTLCache
 from common.responses import BadRequest
+from common.settings import get_settings
+from services import users_service
+
+
+class CategoryMeta(NamedTuple):
+    cat_name: str
+    creator_id: int
+    is_locked: bool
+    is_private: bool
+
+
+class CategoryContext(NamedTuple):
+    exists: bool
+    is_locked: bool = False
+    is_private: bool = False
+    creator_id: int | None = None
+    access: int | None = None  # Access type of the user the context was built for, None if not granted
+    user_exists: bool = True  # Whether that user exists; only checked by get_grant_context
+
+
+_SNAPSHOT = 'categories'
+_MISS_CACHE_SIZE = 10000
+_snapshot_cache: TTLCache | None = None
+_miss_cache: TTLCache | None = None  # IDs found missing after a reload
+_miss_reload_lock = threading.Lock()
+_last_miss_reload = float('-inf')
+
+
+def _get_snapshot_cache() -> TTLCache:
+    global _snapshot_cache
+
+    if _snapshot_cache is None:
+        _snapshot_cache = TTLCache(max_size=1, ttl=get_settings().category_snapshot_ttl)
+
+    return _snapshot_cache
+
+
+def _get_miss_cache() -> TTLCache:
+    global _miss_cache
+
+    if _miss_cache is None:
+        _miss_cache = TTLCache(max_size=_MISS_CACHE_SIZE, ttl=get_settings().category_miss_reload_interval)
+
+    return _miss_cache
+
+
+def reset_caches():
+
+    """
+    Drop the category snapshot and the remembered misses, so both are rebuilt with the current settings on next use.
+    """
+
+    global _snapshot_cache, _miss_cache
+
+    _snapshot_cache = None
+    _miss_cache = None
+
+
+def _claim_miss_reload() -> bool:
+
+    """
+    Check whether a miss may reload the snapshot, recording the reload if so.
+
+    :return:  True at most once per CATEGORY_MISS_RELOAD_INTERVAL seconds, False otherwise.
+    """
+
+    global _last_miss_reload
+
+    with _miss_reload_lock:
+        now = time.monotonic()
+        if now - _last_miss_reload < get_settings().category_miss_reload_interval:
+            return False
+        _last_miss_reload = now
+        return True
+
+
+def categories_snapshot() -> dict[int, CategoryMeta]:
+
+    """
+    Get the metadata of every category, keyed by ID. The table is small and rarely written, so it is
+    held in memory whole and reloaded after a write through this module or once it is
+    CATEGORY_SNAPSHOT_TTL seconds old, which is how changes made by other workers are picked up.
+
+    :return:  Dictionary mapping category IDs to CategoryMeta objects.
+    """
+
+    cache = _get_snapshot_cache()
+    snapshot = cache.get(_SNAPSHOT)
+
+    if snapshot is None:
+        data = read_query('select id, cat_name, creator_id, is_locked, is_private from categories')
+        snapshot = {id: CategoryMeta(cat_name, creator_id, bool(is_locked), bool(is_private))
+                    for id, cat_name, creator_id, is_locked, is_private in data}
+        cache.set(_SNAPSHOT, snapshot)
+
+    return snapshot
+
+
+def get_meta(id: int) -> CategoryMeta | None:
+
+    """
+    Get the metadata of one category from the snapshot. An ID missing from the snapshot reloads it,
+    so a category created by another worker is found without waiting for the snapshot to expire.
+    Reloads on a miss happen at most once per CATEGORY_MISS_RELOAD_INTERVAL seconds, and an ID still
+    missing afterwards is remembered as missing for that long, so unknown IDs cannot reload the table
+    on every request.
+
+    :param id:  The ID of the category.
+    :return:  CategoryMeta object, or None if the category does not exist.
+    """
+
+    meta = categories_snapshot().get(id)
+
+    if meta is not None:
+        return meta
+
+    misses = _get_miss_cache()
+    if misses.get(id):
+        return None
+
+    if _claim_miss_reload():
+        _get_snapshot_cache().invalidate(_SNAPSHOT)
+        meta = categories_snapshot().get(id)
+
+    if meta is None:
+        misses.set(id, True)
+
+    return meta
+
+
+def refresh_snapshot():
+
+    """
+    Drop the category snapshot and the remembered misses so the next check reloads it. Must be called after
+    every write to categories. Both are dropped again when the transaction commits, in case another request
+    reloaded them in between.
+    """
+
+    cache = _get_snapshot_cache()
+    misses = _get_miss_cache()
+
+    def drop():
+        cache.invalidate(_SNAPSHOT)
+        misses.clear()
+
+    drop()
+    on_commit(drop)
 
 
 def get_categories():
@@ -84,10 +235,7 @@ def exists(id: int):
     :return:  True if the category exists, False otherwise.
     """
 
-    return any(
-        read_query(
-            'select id, cat_name from categories where id = ?',
-            (id,)))
+    return get_meta(id) is not None
 
 
 def cat_name_exists(cat_name: str):
@@ -118,6 +266,7 @@ def create(cat_name, creator_id):
     generated_id = insert_query(
         'insert into categories(cat_name, creator_id) values(?,?)',
         (cat_name, creator_id))
+    refresh_snapshot()
     return get_by_id(generated_id)
 
 
@@ -127,11 +276,11 @@ def check_if_locked(id: int):
     Check if a category is locked.
 
     :param id:  The ID of the category.
-    :return:  True if the category is locked, False otherwise.
+    :return:  True if the category is locked, False otherwise or if it does not exist.
     """
 
-    data = read_query('select is_locked from categories where id = ?', (id,))
-    return bool(data[0][0])
+    meta = get_meta(id)
+    return meta is not None and meta.is_locked
 
 
 def check_if_private(id: int):
@@ -140,11 +289,11 @@ def check_if_private(id: int):
     Check if a category is private.
 
     :param id:  The ID of the category.
-    :return:  True if the category is private, False otherwise.
+    :return:  True if the category is private, False otherwise or if it does not exist.
     """
 
-    data = read_query('select is_private from categories where id = ?', (id,))
-    return bool(data[0][0])
+    meta = get_meta(id)
+    return meta is not None and meta.is_private
 
 
 def lock(id: int):
@@ -159,6 +308,7 @@ def lock(id: int):
     if check_if_locked(id):
         return BadRequest('Category is already locked.')
     update_query('update categories set is_locked = 1 where id = ?', (id,))
+    refresh_snapshot()
     return get_by_id(id)
 
 
@@ -174,6 +324,7 @@ def make_private(id: int):
     if check_if_private(id):
         return BadRequest('Category is already private.')
     update_query('update categories set is_private = 1 where id = ?', (id,))
+    refresh_snapshot()
     return get_by_id(id)
 
 
@@ -189,6 +340,7 @@ def unlock(id: int):
     if not check_if_locked(id):
         return BadRequest('Category is already unlocked.')
     update_query('update categories set is_locked = 0 where id = ?', (id,))
+    refresh_snapshot()
     return get_by_id(id)
 
 
@@ -204,7 +356,10 @@ def make_public(id: int):
     if not check_if_private(id):
         return BadRequest('Category is already public.')
     update_query('update categories set is_private = 0 where id = ?', (id,))
+    refresh_snapshot()
+    user_ids = [user_id for user_id, in read_query('select user_id from private_cat_access where category_id = ?', (id,))]
     insert_query('''delete from private_cat_access where category_id = ?''', (id,))
+    users_service.bump_permission_version(*user_ids)
     return get_by_id(id)
 
 
@@ -215,22 +370,91 @@ def is_owner(user_id, category_id):
 
     :param user_id:  The ID of the user.
     :param category_id:  The ID of the category.
-    :return:  True if the user is the owner, False otherwise.
+    :return:  True if the user is the owner, False otherwise or if the category does not exist.
     """
 
-    data = read_query('select creator_id from categories where id = ?', (category_id,))
-    return user_id == data[0][0]
+    meta = get_meta(category_id)
+    return meta is not None and user_id == meta.creator_id
 
 
 def check_user_access(user_id, category_id):
 
     """
-    Check if a user has access to a category.
+    Check if a user has access to a category. Served from the user's cached access map.
+
     :param user_id:  The ID of the user.
     :param category_id:  The ID of the category.
-    :return:  True if the user has access, False otherwise.
+    :return:  The access type (0 for read, 1 for write), or None if the user has no access.
+    """
+
+    return users_service.get_access_map(user_id).get(category_id)
+
+
+def get_user_access(user: dict, category_id: int):
+
+    """
+    Get a user's access to a category, from the permission snapshot in their token while it is current
+    and from the database otherwise.
+
+    :param user:  The authenticated user's token payload.
+    :param category_id:  The ID of the category.
+    :return:  The access type (0 for read, 1 for write), or None if the user has no access.
+    """
+
+    if users_service.permissions_current(user):
+        return user['perms'].get(str(category_id))
+
+    return check_user_access(user['user_id'], category_id)
+
+
+
+def get_context(id: int, user: dict | None = None) -> CategoryContext:
+
+    """
+    Get everything a route checks before acting on a category in one call: existence, lock, privacy,
+    owner, and the user's access when the category is private. Served from the category snapshot
+    and the token's permission snapshot or the user's access map, so a warm call runs no query.
+
+    :param id:  The ID of the category.
+    :param user:  The authenticated user's token payload. Default is None (access is not looked up).
+    :return:  CategoryContext object.
+    """
+
+    meta = get_meta(id)
+
+    if meta is None:
+        return CategoryContext(exists=False)
+
+    access = get_user_access(user, id) if meta.is_private and user is not None else None
+
+    return CategoryContext(True, meta.is_locked, meta.is_private, meta.creator_id, access)
+
+
+def get_grant_context(id: int, user_id: int) -> CategoryContext:
+
+    """
+    Get the context for granting or revoking a user's access to a category: the category facts,
+    whether the user exists and the user's current access, with at most one joined query.
+    The query is skipped when the category does not exist or is not private.
+
+    :param id:  The ID of the category.
+    :param user_id:  The ID of the user whose access is changed.
+    :return:  CategoryContext object.
     """
 
-    data = read_query('select access_type from private_cat_access where user_id = ? and category_id = ?',
-                      (user_id, category_id))
-    return data[0][0] if data else None
+    meta = get_meta(id)
+
+    if meta is None:
+        return CategoryContext(exists=False)
+
+    if not meta.is_private:
+        return CategoryContext(True, meta.is_locked, False, meta.creator_id)
+
+    data = read_query('''select u.id, p.access_type
+                         from users u
+                         left join private_cat_access p on p.user_id = u.id and p.category_id = ?
+                         where u.id = ?''', (id, user_id))
+
+    return CategoryContext(True, meta.is_locked, True, meta.creator_id,
+                           access=data[0][1] if data else None,
+                           user_exists=bool(data))
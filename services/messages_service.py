@@ -1,23 +1,21 @@
 from data.models import Message, MessageText, UserResponseChats, MessageOutput
 from data.database import insert_query, read_query
-from services.users_service import authenticate_user
 
 
-def create(msg: MessageText, token):
+def create(msg: MessageText, user):
 
     """
     Creates a new message from the authenticated user to the specified receiver.
 
     Args:
         msg (MessageText): The message content, including receiver ID and text.
-        token (str): The JWT token for user authentication.
+        user (dict): The authenticated user.
 
     Returns:
         Union[MessageText, dict]: The created message content if successful, or an error dictionary 
                                   if the receiver does not exist.
     """
 
-    user = authenticate_user(token)
     if user:
         
         receiver_exists = read_query('SELECT id FROM users WHERE id = ?', (msg.receiver_id,))
@@ -31,21 +29,20 @@ def create(msg: MessageText, token):
 
         return msg
 
-def all_messages(receiver_id: int, token) -> list[MessageOutput]:
+def all_messages(receiver_id: int, user) -> list[MessageOutput]:
 
     """
     Retrieves the conversation between the authenticated user and the specified receiver.
 
     Args:
         receiver_id (int): The ID of the receiver for the conversation.
-        token (str): The JWT token for user authentication.
+        user (dict): The authenticated user.
 
     Returns:
         list[MessageOutput]: A list of `MessageOutput` objects representing messages exchanged 
                              between the user and the receiver, ordered by message date.
     """
 
-    user = authenticate_user(token)
     if user:
         messages = read_query(
             ''' SELECT sender_id, message_date, message_text 
@@ -60,21 +57,19 @@ def all_messages(receiver_id: int, token) -> list[MessageOutput]:
 
         return data
 
-def all_conversations(token) -> list[UserResponseChats]:
+def all_conversations(user) -> list[UserResponseChats]:
 
     """
     Retrieves a list of users with whom the authenticated user has exchanged messages.
 
     Args:
-        token (str): The JWT token for user authentication.
+        user (dict): The authenticated user.
 
     Returns:
         list[UserResponseChats]: A list of `UserResponseChats` objects representing users involved in 
                                  conversations with the authenticated user.
     """
 
-    user = authenticate_user(token)
-
     user_id = user['user_id']
 
     if user:
@@ -1,51 +1,50 @@
 from data.models import ReplyResponse , ReplyText
-from data.database import insert_query, read_query
-from services.users_service import authenticate_user
+from data.database import insert_query, read_query, update_query
+from services.topics_service import hot_update
 
 
-def get_reply_by_id(id: int, token) -> ReplyResponse:
+def get_reply_by_id(id: int) -> ReplyResponse:
 
     """
-    Retrieves a specific reply by ID. Requires user authentication.
+    Retrieves a specific reply by ID.
 
     Args:
         id (int): The ID of the reply to retrieve.
-        token (str): The JWT token for user authentication.
 
     Returns:
-        ReplyResponse: A `ReplyResponse` object containing the reply details, including user ID, reply date, and reply text.
+        ReplyResponse: A `ReplyResponse` object containing the reply details, including user ID, reply date, reply text and vote counts.
     """
 
-    user = authenticate_user(token)
-    if user:
-        data = read_query('''select user_id, reply_date, reply_text from replies where id = ?''', (id,))
-        return (ReplyResponse(user_id=user_id,
-                    reply_date=reply_date,
-                    reply_text=reply_text,)
-                for user_id, reply_date, reply_text in data)
+    data = read_query('''select user_id, reply_date, reply_text, upvotes, downvotes from replies where id = ?''', (id,))
+    return (ReplyResponse(user_id=user_id,
+                reply_date=reply_date,
+                reply_text=reply_text,
+                upvotes=upvotes,
+                downvotes=downvotes,)
+            for user_id, reply_date, reply_text, upvotes, downvotes in data)
 
 
-def create(reply_text: ReplyText, token):
+def create(reply_text: ReplyText, user):
 
     """
-    Creates a new reply for a specified topic. Requires user authentication.
+    Creates a new reply for a specified topic and updates the topic's reply count, last activity and hot score.
 
     Args:
         reply_text (ReplyText): The reply content, including topic ID and text.
-        token (str): The JWT token for user authentication.
+        user (dict): The authenticated user.
 
     Returns:
-        Union[ReplyResponse, bool]: The created `ReplyResponse` object if successful, or `False` if authentication fails.
+        ReplyResponse: The created `ReplyResponse` object.
     """
 
-    user = authenticate_user(token)
-    if user:
-        generated_id = insert_query(
-            '''INSERT INTO replies(topic_id, user_id, reply_date, reply_text) VALUES (?, ?, now(), ?)''',
-            (reply_text.topic_id, user['user_id'], reply_text.text))
-        return get_reply_by_id(generated_id, token)
-    
-    return False
+    generated_id = insert_query(
+        '''INSERT INTO replies(topic_id, user_id, reply_date, reply_text) VALUES (?, ?, now(), ?)''',
+        (reply_text.topic_id, user['user_id'], reply_text.text))
+    hot, hot_params = hot_update(1)
+    update_query(
+        f'''UPDATE topics SET reply_count = reply_count + 1, last_activity = now(), {hot} WHERE id = ?''',
+        (*hot_params, reply_text.topic_id))
+    return get_reply_by_id(generated_id)
 
 def reply_exists(reply_id: int) -> bool:
 
@@ -1,36 +1,255 @@
-from data.database import insert_query, read_query, update_query
+import base64
+import json
+import math
+import re
+import time
+from datetime import date, datetime
+from typing import NamedTuple
+from fastapi import HTTPException
+from common.settings import get_settings
+from data.database import insert_query, read_query, update_query, update_many
 from data.models import ReplyResponse, TopicResponse
 from common.responses import BadRequest
+from services.users_service import is_admin
 
+SORT_COLUMNS = ('topic_date', 'top_name', 'category_id', 'user_id', 'is_locked', 'last_activity', 'reply_count', 'score',
+                'hot')
+RELEVANCE = 'relevance'
+REPAIR_BATCH_SIZE = 1000
 
-def view_replies(id: int):
+# hot = ln(sum of weight * 2 ** ((time - HOT_EPOCH) / HOT_HALF_LIFE)) over a topic's events: its creation and
+# each reply weigh 1, each vote +1 or -1. Every topic decays by the same factor as time passes, so the ranking
+# never changes on its own and an event only has to be added to the score of its own topic. The positive and
+# negative weights are summed in separate log-space columns, hot_pos and hot_neg, and hot is generated from them.
+HOT_EPOCH = 1704067200  # 2024-01-01 UTC
+HOT_FLOOR = -1e9  # Score of topics whose downvotes outweigh their activity, and the log of an empty sum
+REPLIES = 'replies'  # The sort key of reply cursors, so topic and reply cursors can't be mixed up
+
+
+class TopicState(NamedTuple):
+    category_id: int
+    is_locked: bool
+
+
+def view_replies_for_topics(ids: list[int], limit: int) -> dict[int, tuple[list[ReplyResponse], str | None]]:
 
     """
-    Get all replies for a topic.
+    Get the first replies of several topics with a single query. Each topic is read by its own
+    limited branch of a union, so at most `limit` + 1 rows per topic are read however long the threads are.
 
-    :param id:  The ID of the topic.
-    :return:  List of Reply objects.
+    :param ids:  The IDs of the topics.
+    :param limit:  Maximum number of replies per topic.
+    :return:  Dictionary mapping each topic ID to its list of ReplyResponse objects and the cursor
+    of its next replies (None if there are no more).
     """
 
-    data = read_query('''select user_id, reply_date, reply_text
-                         from replies
-                         where topic_id = ?''', (id,))
+    if not ids:
+        return {}
 
-    if not data:
-        return []
+    branch = '''(select topic_id, id, user_id, reply_date, reply_text, upvotes, downvotes
+                  from replies
+                  where topic_id = ?
+                  order by id
+                  limit ?)'''
+    data = read_query(' union all '.join([branch] * len(ids)) + ' order by topic_id, id',
+                      tuple(param for id in ids for param in (id, limit + 1)))
+
+    rows = {id: [] for id in ids}
+    for topic_id, *row in data:
+        rows[topic_id].append(row)
+
+    return {id: _reply_page(rows[id], limit) for id in ids}
+
+
+def get_replies(topic_id: int, limit: int, cursor: str | None = None,
+                sort_by: str = 'date') -> tuple[list[ReplyResponse], str | None]:
+
+    """
+    Get a page of a topic's replies, using keyset pagination on (sort key, reply ID).
+    Scores are kept on the replies by votes_service.vote, so sorting by score reads the
+    replies(topic_id, score) index instead of aggregating votes.
+
+    :param topic_id:  The ID of the topic.
+    :param limit:  Number of replies to return.
+    :param cursor:  The next cursor of the previous page. None for the first page.
+    :param sort_by:  'date' for the order they were posted, 'score' for the highest score first.
+    :return:  Tuple of the list of ReplyResponse objects and the cursor of the next page (None on the last page).
+    """
+
+    if sort_by == 'score':
+        order, seek = 'score desc, id desc', ' and (score < ? or (score = ? and id < ?))'
+    else:
+        order, seek = 'id', ' and id > ?'
+
+    params = (topic_id,)
+    if cursor:
+        value, id = _decode_cursor(cursor, REPLIES, sort_by)
+        params += (value, value, id) if sort_by == 'score' else (id,)
+    else:
+        seek = ''
+
+    data = read_query(f'''select id, user_id, reply_date, reply_text, upvotes, downvotes
+                          from replies
+                          where topic_id = ?{seek}
+                          order by {order}
+                          limit ?''', (*params, limit + 1))
+
+    return _reply_page(data, limit, sort_by)
+
+
+def _reply_page(rows, limit: int, sort_by: str = 'date') -> tuple[list[ReplyResponse], str | None]:
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        id, *_, upvotes, downvotes = rows[-1]
+        next_cursor = _encode_cursor(REPLIES, sort_by, upvotes - downvotes if sort_by == 'score' else None, id)
 
-    return [ReplyResponse.from_query_result(user_id=user_id,
-                                            reply_date=reply_date,
-                                            reply_text=reply_text)
-            for user_id, reply_date, reply_text in data]
+    return [ReplyResponse.from_query_result(*row) for _, *row in rows], next_cursor
 
 
-def get_by_id(id: int):
+def _encode_cursor(sort_by: str, sort_order: str, value, id: int) -> str:
+    if isinstance(value, (datetime, date)):
+        value = str(value)
+    payload = json.dumps([sort_by, sort_order, value, id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def _decode_cursor(cursor: str, sort_by: str, sort_order: str):
+    try:
+        cursor_sort_by, cursor_sort_order, value, id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, TypeError, UnicodeError):
+        raise HTTPException(status_code=400, detail='Invalid cursor.')
+
+    if (cursor_sort_by, cursor_sort_order) != (sort_by, sort_order) or not isinstance(id, int):
+        raise HTTPException(status_code=400, detail='Cursor does not match the requested sort.')
+
+    return value, id
+
+
+def fulltext_terms(search: str) -> str | None:
+
+    """
+    Turn free text into a boolean-mode full-text query where every word must match as a prefix.
+    Full-text operators typed by the user are dropped so they can't change the meaning of the query.
+
+    :param search:  The search text.
+    :return:  The boolean-mode query (e.g. '+forum* +api*'), or None if the text has no words.
+    """
+
+    words = re.findall(r'\w+', search)
+
+    if not words:
+        return None
+
+    return ' '.join(f'+{word}*' for word in words)
+
+
+def get_topics(user, search: str | None, sort_by: str, sort_order: str, limit: int, cursor: str | None = None,
+               in_replies: bool = False, replies_limit: int = 0):
+
+    """
+    Get a page of topics visible to the user, using keyset pagination on (sort column, id).
+    Access to private categories is filtered in SQL and replies, when asked for, are loaded for the whole
+    page at once, so the number of queries and the rows scanned do not depend on the page size or depth.
+    Searching uses the FULLTEXT indexes on topics.top_name and replies.reply_text with prefix matching.
+
+    :param user:  The authenticated user's token payload.
+    :param search:  Search by topic name. None for no filtering.
+    :param sort_by:  Column to sort by. Must be one of SORT_COLUMNS, or RELEVANCE when searching.
+    :param sort_order:  'asc' or 'desc'.
+    :param limit:  Number of topics to return.
+    :param cursor:  The next_cursor of the previous page. None for the first page.
+    :param in_replies:  Also return topics with a reply matching the search.
+    :param replies_limit:  Number of replies embedded in each topic. 0 (the default) embeds none.
+    :return:  Tuple of the list of TopicResponse objects and the cursor of the next page (None on the last page).
+    """
+
+    sort_order = sort_order.lower()
+    direction = 'desc' if sort_order == 'desc' else 'asc'
+    comparison = '<' if direction == 'desc' else '>'
+    terms = fulltext_terms(search) if search else None
+
+    if search and terms is None:
+        return [], None
+
+    if sort_by == RELEVANCE:
+        if terms is None:
+            raise HTTPException(status_code=400, detail='Sorting by relevance requires a search.')
+        sort_expr = 'match(t.top_name) against (? in boolean mode)'
+        sort_params = [terms]
+    else:
+        sort_expr = f't.{sort_by}'
+        sort_params = []
+
+    query = f'''select t.id, t.top_name, t.user_id, t.topic_date, t.is_locked, t.best_reply_id,
+                      t.reply_count, t.last_activity, t.score, t.hot, {sort_expr}
+               from topics t'''
+    conditions = []
+    params = [*sort_params]
+
+    if not is_admin(user['is_admin']):
+        query += '''
+               join categories c on c.id = t.category_id
+               left join private_cat_access p on p.category_id = t.category_id and p.user_id = ?'''
+        params.append(user['user_id'])
+        conditions.append('(c.is_private = 0 or p.user_id is not null)')
+
+    if terms is not None:
+        if in_replies:
+            conditions.append('''(match(t.top_name) against (? in boolean mode)
+                                  or t.id in (select r.topic_id from replies r
+                                              where match(r.reply_text) against (? in boolean mode)))''')
+            params.extend([terms, terms])
+        else:
+            conditions.append('match(t.top_name) against (? in boolean mode)')
+            params.append(terms)
+
+    if cursor:
+        value, id = _decode_cursor(cursor, sort_by, sort_order)
+        conditions.append(f'({sort_expr} {comparison} ? or ({sort_expr} = ? and t.id {comparison} ?))')
+        params.extend([*sort_params, value, *sort_params, value, id])
+
+    if conditions:
+        query += ' where ' + ' and '.join(conditions)
+
+    query += f' order by {sort_expr} {direction}, t.id {direction} limit ?'
+    params.extend([*sort_params, limit + 1])
+
+    data = read_query(query, tuple(params))
+
+    next_cursor = None
+    if len(data) > limit:
+        data = data[:limit]
+        last = data[-1]
+        next_cursor = _encode_cursor(sort_by, sort_order, last[10], last[0])
+
+    replies = view_replies_for_topics([row[0] for row in data], replies_limit) if replies_limit else {}
+
+    topics = [TopicResponse(top_name=top_name,
+                            user_id=user_id,
+                            topic_date=str(topic_date),
+                            is_locked=is_locked,
+                            best_reply_id=best_reply_id,
+                            reply_count=reply_count,
+                            last_activity=str(last_activity),
+                            score=score,
+                            hot=hot,
+                            replies=replies[id][0] if id in replies else None,
+                            replies_next_cursor=replies[id][1] if id in replies else None)
+              for id, top_name, user_id, topic_date, is_locked, best_reply_id, reply_count, last_activity, score, hot, _
+              in data]
+
+    return topics, next_cursor
+
+
+def get_by_id(id: int, replies_limit: int = 0, replies_cursor: str | None = None):
 
     """
     Get a topic by its ID.
 
     :param id:  The ID of the topic.
+    :param replies_limit:  Number of replies to embed. 0 (the default) embeds none.
+    :param replies_cursor:  The replies_next_cursor of the previous page of replies. None for the first page.
     :return:  TopicResponse object.
     """
 
@@ -40,15 +259,20 @@ def get_by_id(id: int):
                            user_id,
                            topic_date,
                            is_locked,
-                           best_reply_id 
+                           best_reply_id,
+                           reply_count,
+                           last_activity,
+                           score,
+                           hot
                          from topics where id = ?''', (id,))
 
     if not data:
         return None
 
-    category_id, top_name, user_id, topic_date, is_locked, best_reply_id = data[0]
+    (category_id, top_name, user_id, topic_date, is_locked, best_reply_id,
+     reply_count, last_activity, score, hot) = data[0]
 
-    replies = view_replies(id)
+    replies, next_cursor = get_replies(id, replies_limit, replies_cursor) if replies_limit else (None, None)
 
     return TopicResponse(
         top_name=top_name,
@@ -56,10 +280,34 @@ def get_by_id(id: int):
         topic_date=str(topic_date),
         is_locked=is_locked,
         best_reply_id=best_reply_id,
-        replies=replies
+        reply_count=reply_count,
+        last_activity=str(last_activity),
+        score=score,
+        hot=hot,
+        replies=replies,
+        replies_next_cursor=next_cursor
     )
 
 
+def get_state(id: int) -> TopicState | None:
+
+    """
+    Get what the reply path needs to know about a topic with one primary key lookup,
+    without loading its replies.
+
+    :param id:  The ID of the topic.
+    :return:  TopicState object, or None if the topic does not exist.
+    """
+
+    data = read_query('select category_id, is_locked from topics where id = ?', (id,))
+
+    if not data:
+        return None
+
+    category_id, is_locked = data[0]
+    return TopicState(category_id, bool(is_locked))
+
+
 def exists(id: int):
 
     """
@@ -87,25 +335,146 @@ def create(category_id, user_id, top_name):
     """
 
     generated_id = insert_query(
-        'insert into topics(category_id, user_id, top_name, topic_date) values(?,?,?,now())',
-        (category_id, user_id, top_name))
+        '''insert into topics(category_id, user_id, top_name, topic_date, last_activity, hot_pos)
+           values(?,?,?,now(),now(),?)''',
+        (category_id, user_id, top_name, _hot_exponent(1, time.time())))
     return get_by_id(generated_id)
 
 
-def check_category(id: int):
+def recompute_counters(batch_size: int = REPAIR_BATCH_SIZE) -> int:
 
     """
-    Get the category ID of a topic.
+    Recompute reply_count, last_activity and score of every topic from its replies and votes.
+    Topics are repaired `batch_size` at a time in ID order, each batch in its own statement,
+    so the job can run next to live traffic without holding locks on the whole table.
+
+    :param batch_size:  Maximum topics repaired by one statement.
+    :return:  The number of topics whose counters were wrong.
+    """
+
+    repaired = 0
+    after = 0
+    while True:
+        ids = read_query('select id from topics where id > ? order by id limit ?', (after, batch_size))
+        if not ids:
+            return repaired
+
+        first, last = ids[0][0], ids[-1][0]
+        repaired += update_query('''update topics t
+                                    left join (select topic_id, count(*) as reply_count, max(reply_date) as last_reply_date
+                                               from replies
+                                               where topic_id between ? and ?
+                                               group by topic_id) r on r.topic_id = t.id
+                                    left join (select r.topic_id, sum(2 * v.vote - 1) as score
+                                               from votes v
+                                               join replies r on r.id = v.reply_id
+                                               where r.topic_id between ? and ?
+                                               group by r.topic_id) v on v.topic_id = t.id
+                                    set t.reply_count = coalesce(r.reply_count, 0),
+                                        t.last_activity = greatest(t.topic_date, coalesce(r.last_reply_date, t.topic_date)),
+                                        t.score = coalesce(v.score, 0)
+                                    where t.id between ? and ?''', (first, last) * 3)
+        after = last
+
+
+def _hot_exponent(weight: float, at: float) -> float:
+    return math.log(abs(weight)) + (at - HOT_EPOCH) * math.log(2) / get_settings().hot_half_life
+
+
+def hot_update(weight: float, table: str | None = None, at: str | None = None) -> tuple[str, tuple]:
+
+    """
+    Build the assignment adding an event to a topic's hot score. Positive weights are added to hot_pos and
+    negative ones to hot_neg, both logaddexps in log space, so no other topic is touched and an event is
+    never lost: a vote taken back cancels exactly, as both are counted at the same time.
+
+    :param weight:  The weight of the event. Negative for downvotes.
+    :param table:  The name or alias qualifying the columns, if the statement needs one.
+    :param at:  SQL expression of the unix time the event is counted at, such as the date of the reply
+    a vote is on, which is where recompute_hot_scores counts votes. Default is now.
+    :return:  Tuple of the SQL assignment and its parameters.
+    """
+
+    column = 'hot_pos' if weight > 0 else 'hot_neg'
+    if table:
+        column = f'{table}.{column}'
+
+    if at is None:
+        exponent, params = '?', (_hot_exponent(weight, time.time()),)
+    else:
+        exponent = f'(? + ({at} - ?) * ?)'
+        params = (math.log(abs(weight)), HOT_EPOCH, math.log(2) / get_settings().hot_half_life)
+
+    return (f'{column} = greatest({column}, {exponent}) + ln(1 + exp(-abs({column} - {exponent})))',
+            params * 2)
+
+
+def hot_parts(events) -> tuple[float, float]:
+
+    """
+    Compute the hot_pos and hot_neg columns of a topic from scratch.
+
+    :param events:  (unix time, weight) pairs of the topic's events.
+    :return:  Tuple of the log-space sums of the positive and of the negative weights, HOT_FLOOR for an empty sum.
+    """
+
+    parts = []
+    for sign in (1, -1):
+        exponents = [_hot_exponent(weight, at) for at, weight in events if weight * sign > 0]
+        top = max(exponents, default=HOT_FLOOR)
+        parts.append(top + math.log(sum(math.exp(exponent - top) for exponent in exponents)) if exponents else top)
+
+    return parts[0], parts[1]
+
+
+def hot_score(hot_pos: float, hot_neg: float) -> float:
+
+    """
+    Derive the hot score from its two columns, as the generated hot column does.
+
+    :param hot_pos:  The log-space sum of the positive weights.
+    :param hot_neg:  The log-space sum of the negative weights.
+    :return:  The hot score, or HOT_FLOOR if the negative weights outweigh the positive ones.
+    """
+
+    return hot_pos + math.log(1 - math.exp(hot_neg - hot_pos)) if hot_pos - hot_neg > 1e-9 else HOT_FLOOR
+
+
+def recompute_hot_scores(batch_size: int = REPAIR_BATCH_SIZE) -> int:
 
-    :param id:  The ID of the topic.
-    :return:  The ID of the category.
     """
+    Recompute the hot score of every topic from its replies and their vote counters, `batch_size` topics at
+    a time. Votes carry no date, so they are counted at the date of the reply they are on. A topic that got a
+    reply or vote while its batch was being computed is skipped and keeps its incrementally updated score.
+    Run it through manage.py once per deployment, after HOT_HALF_LIFE changes or on a schedule.
 
-    result = read_query(
-            'select category_id from topics where id = ?',
-            (id,))
+    :param batch_size:  Maximum topics recomputed per batch.
+    :return:  The number of topics updated.
+    """
 
-    return result[0][0]
+    updated = 0
+    after = 0
+    while True:
+        topics = read_query('''select id, unix_timestamp(topic_date), reply_count, score from topics
+                               where id > ? order by id limit ?''', (after, batch_size))
+        if not topics:
+            return updated
+
+        first, last = topics[0][0], topics[-1][0]
+        events = {id: [(float(created), 1)] for id, created, _, _ in topics}
+
+        for topic_id, replied, upvotes, downvotes in read_query('''select topic_id, unix_timestamp(reply_date),
+                                                                         upvotes, downvotes
+                                                                  from replies
+                                                                  where topic_id between ? and ?''', (first, last)):
+            if topic_id in events:
+                events[topic_id] += [(float(replied), 1 + upvotes), (float(replied), -downvotes)]
+
+        updated += update_many('''update topics set hot_pos = ?, hot_neg = ?
+                                  where id = ? and reply_count = ? and score = ?''',
+                               [(*hot_parts(events[id]), id, reply_count, score)
+                                for id, _, reply_count, score in topics])
+        after = last
 
 
 def top_name_exists(top_name: str):
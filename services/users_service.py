@@ -2,16 +2,37 @@ from fastapi import HTTPException
 from logging import raiseExceptions
 from starlette.responses import JSONResponse
 from common.responses import BadRequest, Unauthorized, Forbidden, NoContent
-from data.models import User, LoginData, UserResponse, UserCategoryAccess, UserAccessResponse
-from data.database import read_query, update_query, insert_query
-import bcrypt
+from data.models import User, LoginData, UserResponse, UserCategoryAccess, UserAccessResponse, AccessGrant, AccessGrantResult
+from data.database import read_query, update_query, update_many, insert_query, on_commit
+from services import blacklist_service
+from common.password_hashing import HashingQueueFullError, hash_password, check_password, needs_rehash
 # from mariadb import IntegrityError
 import jwt
-from dotenv import load_dotenv
-import os
+from common.cache import TTLCache
+from common.settings import get_settings
 from datetime import timedelta, datetime, timezone
 import time
 
+_identity_cache: TTLCache | None = None
+_access_cache: TTLCache | None = None
+
+# Most IDs bound in one IN (...) list by the bulk access queries
+IN_CHUNK_SIZE = 1000
+ACCESS_TYPES = {'read': 0, 'write': 1}
+
+def _hashing(func, *args):
+    """
+    Runs a password hashing function, turning a full hashing queue into a 503 response.
+
+    Raises:
+        HTTPException: If the hashing queue is full.
+    """
+    try:
+        return func(*args)
+    except HashingQueueFullError:
+        raise HTTPException(status_code=503, detail='Server is busy, try again shortly.',
+                            headers={'Retry-After': '1'})
+
 def get_users():  # Internal to be deleted
     """
     Retrieves a list of all users.
@@ -65,10 +86,13 @@ def create_user(email: str, username: str, password: str, first_name: str, last_
     Returns:
         User: The created User object.
     """
+    # Hash before the first query: the registration runs in a transaction, which would otherwise keep
+    # a pooled connection checked out while the request waits for a hashing thread.
+    hashed_p = _hashing(hash_password, password)
+
     check_if_email_exists(email, 'Email already taken.')
     check_if_username_exists(username, 'Username already taken.')
 
-    hashed_p = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
     # try:
     generated_id = insert_query(
         '''INSERT INTO users(email, username, user_pass, first_name, last_name) VALUES (?,?,?,?,?);''',
@@ -92,11 +116,55 @@ def login_user(login_data):
 
 
 
-    if user_data and bcrypt.checkpw(login_data.password.encode('utf-8'), user_data[0][2].encode('utf-8')):
+    if user_data and _hashing(check_password, login_data.password, user_data[0][2]):
+        rehash_password(user_data[0][0], login_data.password, user_data[0][2])
         return user_data
     else:
         return None
 
+def rehash_password(user_id: int, password: str, stored_hash: str):
+    """
+    Re-hashes a just verified password if its stored hash was made with an outdated scheme or cost,
+    so changing the hashing settings migrates users as they log in. Skipped when the hashing queue
+    is full; the next login tries again.
+
+    Args:
+        user_id (int): The ID of the user.
+        password (str): The verified plain text password.
+        stored_hash (str): The hash the password was verified against.
+    """
+    if not needs_rehash(stored_hash):
+        return
+
+    try:
+        new_hash = hash_password(password)
+    except HashingQueueFullError:
+        return
+
+    # Compare against the old hash so a password changed meanwhile is never overwritten.
+    update_query('''UPDATE users SET user_pass = ? WHERE id = ? AND user_pass = ?''',
+                 (new_hash, user_id, stored_hash))
+
+def get_permissions(user_id: int):
+    """
+    Reads a snapshot of a user's private category grants together with the version it belongs to.
+
+    Args:
+        user_id (int): The user ID.
+
+    Returns:
+        Tuple[int, Dict[str, int]]: The permission version and a mapping of category ID (as a string,
+        to survive JSON) to access type, 0 for read and 1 for write.
+    """
+    data = read_query('''SELECT u.perm_ver, p.category_id, p.access_type
+                         FROM users u
+                         LEFT JOIN private_cat_access p ON p.user_id = u.id
+                         WHERE u.id = ?''', (user_id,))
+
+    perm_ver = data[0][0] if data else 0
+
+    return perm_ver, {str(category_id): access_type for _, category_id, access_type in data if category_id is not None}
+
 def create_token(user_data):
     """
     Creates a JWT token for the authenticated user.
@@ -107,12 +175,15 @@ def create_token(user_data):
     Returns:
         str: The generated JWT token.
     """
+    perm_ver, perms = get_permissions(user_data[0][0])
     payload = {'user_id': user_data[0][0],
                'username': user_data[0][1],
            'is_admin': user_data[0][-1],
+               'perm_ver': perm_ver,
+               'perms': perms,
                'exp': datetime.now(timezone.utc) + timedelta(minutes=9000)} #за презентацията по-дълъг expiration да си подготвим от преди презентацията
 
-    token = jwt.encode(payload, os.getenv('JWT_SECRET_KEY'), algorithm='HS256')
+    token = jwt.encode(payload, get_settings().jwt_secret_key, algorithm='HS256')
 
     return token
 
@@ -130,7 +201,7 @@ def decode_token(token):
         HTTPException: If the token is invalid.
     """
     try:
-        return jwt.decode(token, os.getenv('JWT_SECRET_KEY'), algorithms=['HS256'])
+        return jwt.decode(token, get_settings().jwt_secret_key, algorithms=['HS256'])
     except jwt.InvalidTokenError as e:
         raise HTTPException(status_code=401, detail='Invalid token')
 
@@ -159,9 +230,7 @@ def authenticate_user(token: str):
     Raises:
         HTTPException: If the token is invalid or the user does not exist.
     """
-    the_blacklist = read_query('''select * from tokens_blacklist where token = ?;''', (token,))
-
-    if not the_blacklist:
+    if not blacklist_service.is_revoked(token):
         # try:
         user_data = decode_token(token)
         if user_exists(user_data):
@@ -171,6 +240,53 @@ def authenticate_user(token: str):
     else:
         raise HTTPException(status_code=401, detail='Invalid token')
 
+def _get_identity_cache() -> TTLCache:
+    global _identity_cache
+
+    if _identity_cache is None:
+        settings = get_settings()
+        _identity_cache = TTLCache(settings.identity_cache_size, settings.identity_cache_ttl)
+
+    return _identity_cache
+
+def get_identity(user_id: int, username: str):
+    """
+    Gets the verified identity of a user, serving it from the identity cache when possible.
+
+    Args:
+        user_id (int): The user ID from the token.
+        username (str): The username from the token.
+
+    Returns:
+        Optional[Tuple[int, str, int, int]]: (user_id, username, is_admin, perm_ver) if the user exists with that username, None otherwise.
+    """
+    cache = _get_identity_cache()
+    identity = cache.get(user_id)
+
+    if identity is not None and identity[1] == username:
+        return identity
+
+    data = read_query('''SELECT id, username, is_admin, perm_ver from users where id = ? and username = ?''',
+                      (user_id, username))
+
+    if not data:
+        return None
+
+    identity = tuple(data[0])
+    cache.set(user_id, identity)
+
+    return identity
+
+def invalidate_identity(user_id: int):
+    """
+    Drops a user's cached identity. Must be called whenever a user's username, admin status
+    or permission version changes or the user is removed.
+
+    Args:
+        user_id (int): The ID of the changed user.
+    """
+    _get_identity_cache().invalidate(user_id)
+
 def user_exists(user_data):
     """
     Checks if a user exists in the database based on the provided user data.
@@ -181,21 +297,89 @@ def user_exists(user_data):
     Returns:
         bool: True if the user exists, False otherwise.
     """
-    return any(read_query('''SELECT * from users where id = ? and username = ?''',
-                          (user_data['user_id'], user_data['username'])))
+    return get_identity(user_data['user_id'], user_data['username']) is not None
+
+def permissions_current(user_data) -> bool:
+    """
+    Checks if the permission snapshot in a token is still valid, i.e. no grant of the user changed
+    since the token was issued. Served from the identity cache, so it costs no query on a warm cache.
+    Other workers see a version bump once their cached identity expires.
+
+    Args:
+        user_data (Dict[str, Any]): The decoded token payload.
+
+    Returns:
+        bool: True if the token's 'perms' claim can be trusted, False otherwise.
+    """
+    if 'perm_ver' not in user_data or 'perms' not in user_data:
+        return False
+
+    identity = get_identity(user_data['user_id'], user_data['username'])
+
+    return identity is not None and identity[3] == user_data['perm_ver']
+
+def _get_access_cache() -> TTLCache:
+    global _access_cache
+
+    if _access_cache is None:
+        settings = get_settings()
+        _access_cache = TTLCache(settings.access_cache_size, settings.access_cache_ttl)
+
+    return _access_cache
+
+def reset_caches():
+    """
+    Drops the identity and access caches, so they are rebuilt with the current settings on next use.
+    """
+    global _identity_cache, _access_cache
+
+    _identity_cache = None
+    _access_cache = None
 
-def user_id_exists(user_id):
+def get_access_map(user_id: int) -> dict:
     """
-    Checks if a user ID exists in the database.
+    Gets all private category grants of a user, loading them with one query on first use
+    and serving them from the access cache afterwards.
 
     Args:
-        user_id (int): The user ID to check.
+        user_id (int): The user ID.
 
     Returns:
-        bool: True if the user ID exists, False otherwise.
+        Dict[int, int]: A mapping of category ID to access type, 0 for read and 1 for write.
     """
-    return any(read_query('''SELECT * from users where id = ?''',
-                          (user_id,)))
+    cache = _get_access_cache()
+    access_map = cache.get(user_id)
+
+    if access_map is None:
+        data = read_query('''SELECT category_id, access_type FROM private_cat_access WHERE user_id = ?''', (user_id,))
+        access_map = {category_id: access_type for category_id, access_type in data}
+        cache.set(user_id, access_map)
+
+    return access_map
+
+def bump_permission_version(*user_ids):
+    """
+    Marks the permission snapshots in the given users' tokens as stale and drops their cached
+    identities and access maps. Must be called whenever a user's private category grants change.
+    The caches are dropped again on commit, so a reload racing the change cannot keep old grants.
+
+    Args:
+        user_ids (int): The IDs of the users whose grants changed.
+    """
+    if not user_ids:
+        return
+
+    for chunk in _chunks(user_ids):
+        update_query(f'''UPDATE users SET perm_ver = perm_ver + 1 WHERE id IN ({_placeholders(chunk)})''', chunk)
+
+    def invalidate():
+        access_cache = _get_access_cache()
+        for user_id in user_ids:
+            invalidate_identity(user_id)
+            access_cache.invalidate(user_id)
+
+    invalidate()
+    on_commit(invalidate)
 
 def get_user_by_id(id: int):
     """
@@ -210,9 +394,6 @@ def get_user_by_id(id: int):
     return any(read_query('''SELECT * from users where id = ? ''',
                           (id,)))
 
-load_dotenv()
-secret_key = os.getenv('JWT_SECRET_KEY')
-
 def blacklist_user(token: str):
     """
     Blacklists a token, effectively logging out the user.
@@ -229,22 +410,33 @@ def blacklist_user(token: str):
     authorised_user = authenticate_user(token)
 
     if not isinstance(authorised_user, Unauthorized):
-        insert_query('''insert into tokens_blacklist (tokens_blacklist.token) values (?);''', (token,))
+        blacklist_service.revoke(token, authorised_user.get('exp'))
         return f'User successfully logged out.'
     else:
         raise HTTPException(status_code=401, detail='Invalid token') #return False
 
-def check_if_private(category_id):
+def _upsert_access(user_id, category_id, access_type) -> int:
     """
-    Checks if a category is private based on the provided category ID.
+    Grants a user access to a category in one statement, backed by the (category_id, user_id) primary key.
 
     Args:
-        category_id (int): The category ID to check.
+        user_id (int): The user ID.
+        category_id (int): The category ID.
+        access_type (int): 0 for read, 1 for write.
 
     Returns:
-        bool: True if the category is private, False otherwise.
+        int: The affected rows: 1 if the grant was added, 2 if the access type was changed,
+        0 if the user already had this access type (the connections do not set CLIENT_FOUND_ROWS).
     """
-    return any(read_query('''select * from private_cat_access where category_id = ?''', (category_id,)))
+    changed = update_query('''insert into private_cat_access (user_id, category_id, access_type)
+                              values (?, ?, ?)
+                              on duplicate key update access_type = values(access_type)''',
+                           (user_id, category_id, access_type))
+
+    if changed:
+        bump_permission_version(user_id)
+
+    return changed
 
 def give_user_r_access(user_id, category_id):
     """
@@ -257,24 +449,14 @@ def give_user_r_access(user_id, category_id):
     Returns:
         Optional[str]: A message indicating the access change, or None if the user already has read access.
     """
-    if any(read_query('''select user_id, category_id, access_type from private_cat_access
-                             where user_id = ? and category_id = ? and access_type = 0''',
-                   (user_id, category_id))):
-        return None
-    
-    elif any(read_query('''select user_id, category_id, access_type from private_cat_access
-                        where user_id = ? and category_id = ? and access_type = 1''',
-            (user_id, category_id))):
-        update_query('''update private_cat_access set access_type = 0
-                     where user_id = ? and category_id = ?''',
-                (user_id, category_id))
-        return f'Write access changed to read for user with id {user_id} for category with id {category_id}.'
-    else:
-        insert_query('''insert into private_cat_access (private_cat_access.user_id, private_cat_access.category_id, private_cat_access.access_type) 
-                            values(?,?, 0)''',
-                    (user_id, category_id))
+    changed = _upsert_access(user_id, category_id, 0)
 
+    if changed == 2:
+        return f'Write access changed to read for user with id {user_id} for category with id {category_id}.'
+    elif changed:
         return f'Read access for category with id {category_id} has been given to user with id {user_id}.'
+    else:
+        return None
 
 def give_user_w_access(user_id, category_id):
     """
@@ -287,25 +469,14 @@ def give_user_w_access(user_id, category_id):
     Returns:
         Optional[str]: A message indicating the access change, or None if the user already has write access.
     """
-    if any(read_query('''select user_id, category_id, access_type from private_cat_access
-                             where user_id = ? and category_id = ? and access_type = 1''',
-                   (user_id, category_id))):
-        return None
+    changed = _upsert_access(user_id, category_id, 1)
 
-    elif any(read_query('''select user_id, category_id, access_type from private_cat_access
-                            where user_id = ? and category_id = ? and access_type = 0''',
-                (user_id, category_id))):
-        update_query('''update private_cat_access set access_type = 1
-                     where user_id = ? and category_id = ?''',
-                (user_id, category_id))
+    if changed == 2:
         return f'Read access changed to write for user with id {user_id} for category with id {category_id}.'
-    
-    else:
-        insert_query('''insert into private_cat_access (private_cat_access.user_id, private_cat_access.category_id, private_cat_access.access_type) 
-                            values(?,?, 0)''',
-                    (user_id, category_id))
-
+    elif changed:
         return f'Write access for category with id {category_id} has been given to user with id {user_id}.'
+    else:
+        return None
 
 def revoke_access(user_id, category_id):
     """
@@ -316,17 +487,95 @@ def revoke_access(user_id, category_id):
         category_id (int): The category ID.
 
     Returns:
-        Optional[NoContent]: NoContent if the access was successfully revoked, None otherwise.
-    """
-    if any(read_query('''select user_id, category_id, access_type from private_cat_access
-                            where user_id = ? and category_id = ? and (access_type = 1 or access_type = 0)''',
-                (user_id, category_id))):
-        insert_query('''delete from private_cat_access where user_id = ? and category_id = ? and (access_type = 1 or access_type = 0)''',
-                (user_id, category_id))
-        return NoContent()#f'Successfully delete access for user with id {user_id} for category with id {category_id}'
+        Optional[NoContent]: NoContent if the access was successfully revoked, None if the user had no access.
+    """
+    if update_query('''delete from private_cat_access where user_id = ? and category_id = ?''',
+                    (user_id, category_id)):
+        bump_permission_version(user_id)
+        return NoContent()
     else:
         return None
 
+def _chunks(items: list):
+    for start in range(0, len(items), IN_CHUNK_SIZE):
+        yield items[start:start + IN_CHUNK_SIZE]
+
+def _placeholders(items) -> str:
+    return ', '.join('?' * len(items))
+
+def apply_access_grants(grants: list[AccessGrant]) -> list[AccessGrantResult]:
+    """
+    Grants, changes or revokes access for many (user, category) pairs at once. Categories, users and
+    current grants are validated with a few set-based queries, and the changes are written with one
+    executemany per kind. Run it inside a transaction so the batch is applied as a whole.
+
+    Args:
+        grants (List[AccessGrant]): The changes to apply. access 'none' revokes.
+
+    Returns:
+        List[AccessGrantResult]: One result per item, in the order given.
+    """
+    category_ids = list({grant.category_id for grant in grants})
+    user_ids = list({grant.user_id for grant in grants})
+
+    private = {}
+    for chunk in _chunks(category_ids):
+        private.update(read_query(f'''select id, is_private from categories where id in ({_placeholders(chunk)})''',
+                                  chunk))
+
+    existing_users = set()
+    for chunk in _chunks(user_ids):
+        existing_users.update(user_id for user_id, in read_query(
+            f'''select id from users where id in ({_placeholders(chunk)})''', chunk))
+
+    pairs = list({(grant.user_id, grant.category_id) for grant in grants
+                  if private.get(grant.category_id) and grant.user_id in existing_users})
+
+    current = {}
+    for chunk in _chunks(pairs):
+        current.update(((user_id, category_id), access_type) for user_id, category_id, access_type in read_query(
+            f'''select user_id, category_id, access_type from private_cat_access
+                where (user_id, category_id) in ({', '.join(['(?, ?)'] * len(chunk))})
+                for update''', [id for pair in chunk for id in pair]))
+
+    results, upserts, deletes, seen = [], [], [], set()
+    for grant in grants:
+        key = (grant.user_id, grant.category_id)
+        access_type = ACCESS_TYPES.get(grant.access)
+
+        if key in seen:
+            status = 'duplicate'
+        elif grant.category_id not in private:
+            status = 'category_not_found'
+        elif not private[grant.category_id]:
+            status = 'category_not_private'
+        elif grant.user_id not in existing_users:
+            status = 'user_not_found'
+        elif access_type is None:
+            status = 'revoked' if key in current else 'no_access'
+            if key in current:
+                deletes.append(key)
+        elif current.get(key) == access_type:
+            status = 'unchanged'
+        else:
+            status = 'changed' if key in current else 'granted'
+            upserts.append((*key, access_type))
+
+        seen.add(key)
+        results.append(AccessGrantResult(user_id=grant.user_id, category_id=grant.category_id,
+                                         access=grant.access, status=status))
+
+    if upserts:
+        update_many('''insert into private_cat_access (user_id, category_id, access_type)
+                       values (?, ?, ?)
+                       on duplicate key update access_type = values(access_type)''', upserts)
+    if deletes:
+        update_many('''delete from private_cat_access where user_id = ? and category_id = ?''', deletes)
+
+    bump_permission_version(*{user_id for user_id, *_ in upserts + deletes})
+
+    return results
+
 def view_privileged_users(category_id)-> list[UserAccessResponse]:
     """
     Retrieves a list of users with access to a specific category.
@@ -1,46 +1,90 @@
 from data.models import VoteResult
 from data.database import  update_query, read_query, insert_query
-from services.users_service import authenticate_user
+from services.topics_service import hot_update
 
 
-def vote(reply_id, vote: VoteResult, token):
+def score_of(vote_value: int) -> int:
+
+    """
+    Converts a stored vote value to its contribution to a score.
+
+    Args:
+        vote_value (int): The stored vote (1 for an upvote, 0 for a downvote).
+
+    Returns:
+        int: 1 for an upvote, -1 for a downvote.
+    """
+
+    return 1 if vote_value == 1 else -1
+
+
+def count_vote(reply_id, upvotes: int, downvotes: int):
+
+    """
+    Adds to the vote counters of a reply and to the score and hot score of its topic, in one statement.
+    Votes count towards the hot score at the date of their reply, the same as in recompute_hot_scores,
+    so a fresh vote does not outweigh the topic's older activity.
+
+    Args:
+        reply_id (int): The ID of the reply that was voted on.
+        upvotes (int): The change in the reply's upvotes.
+        downvotes (int): The change in the reply's downvotes.
+    """
+
+    delta = upvotes - downvotes
+    hot, hot_params = hot_update(delta, 't', 'unix_timestamp(r.reply_date)')
+    update_query(
+        f'''UPDATE topics t JOIN replies r ON r.topic_id = t.id
+            SET r.upvotes = r.upvotes + ?, r.downvotes = r.downvotes + ?, t.score = t.score + ?, {hot}
+            WHERE r.id = ?''',
+        (upvotes, downvotes, delta, *hot_params, reply_id)
+    )
+
+
+def vote(reply_id, vote: VoteResult, user):
 
     """
     Casts or updates a vote for a specific reply. Checks if the user has already voted and updates or inserts the vote accordingly.
+    The reply's vote counters and its topic's score are updated in the same transaction.
 
     Args:
         reply_id (int): The ID of the reply to vote on.
         vote (VoteResult): The vote data, containing the vote value.
-        token (str): The JWT token for user authentication.
+        user (dict): The authenticated user.
 
     Returns:
         str: A message indicating the result of the voting action, such as confirmation of the new vote, or information that the vote has been updated.
     """
 
-    user = authenticate_user(token)
-    if user:
-        check = read_query(
-            '''SELECT * FROM votes WHERE user_id = ? AND reply_id = ?''',
-            (user['user_id'], reply_id)
-        )
+    check = read_query(
+        '''SELECT * FROM votes WHERE user_id = ? AND reply_id = ?''',
+        (user['user_id'], reply_id)
+    )
+    
+    if check:
+        existing_vote_value = check[0][2]
         
-        if check:
-            existing_vote_value = check[0][2]
-            
-            if existing_vote_value == vote.vote_value:
-                return f"The vote is already {vote.vote}"
-            
-            _ = update_query(
-                '''UPDATE votes SET vote = ? WHERE user_id = ? AND reply_id = ?''',
-                (vote.vote_value, user['user_id'], reply_id)
-            )
-
-            return f'Vote changed to {vote.vote}'
-
-        else:
-            _ = insert_query(
-                '''INSERT INTO votes(user_id, reply_id, vote) VALUES (?, ?, ?)''',
-                (user['user_id'], reply_id, vote.vote_value)
-            )
+        if existing_vote_value == vote.vote_value:
+            return f"The vote is already {vote.vote}"
         
-            return f'You voted with {vote.vote}'
\ No newline at end of file
+        # Only the statement that actually flips the vote moves the counters, so concurrent changes count once
+        changed = update_query(
+            '''UPDATE votes SET vote = ? WHERE user_id = ? AND reply_id = ? AND vote <> ?''',
+            (vote.vote_value, user['user_id'], reply_id, vote.vote_value)
+        )
+
+        if changed:
+            flip = score_of(vote.vote_value)
+            count_vote(reply_id, flip, -flip)
+
+        return f'Vote changed to {vote.vote}'
+
+    else:
+        _ = insert_query(
+            '''INSERT INTO votes(user_id, reply_id, vote) VALUES (?, ?, ?)''',
+            (user['user_id'], reply_id, vote.vote_value)
+        )
+
+        count_vote(reply_id, *((1, 0) if vote.vote_value == 1 else (0, 1)))
+    
+        return f'You voted with {vote.vote}'
\ No newline at end of file
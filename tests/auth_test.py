@@ -0,0 +1,36 @@
+import asyncio
+from unittest import TestCase
+from unittest.mock import patch
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from common.auth import CurrentUser, get_current_user
+
+
+class Auth_Should(TestCase):
+
+    def test_getCurrentUser_returnsAuthenticatedUser(self):
+        with patch('common.auth.authenticate_user') as mock_authenticate:
+            mock_authenticate.return_value = {'user_id': 1, 'username': 'user'}
+
+            result = asyncio.run(get_current_user('token'))
+
+            self.assertEqual(result, {'user_id': 1, 'username': 'user'})
+            mock_authenticate.assert_called_once_with('token')
+
+    def test_currentUser_authenticatesOncePerRequest(self):
+        app = FastAPI()
+
+        async def also_needs_user(user: CurrentUser):
+            return user
+
+        @app.get('/')
+        def route(user: CurrentUser, same_user: dict = Depends(also_needs_user)):
+            return {'same': user is same_user}
+
+        with patch('common.auth.authenticate_user') as mock_authenticate:
+            mock_authenticate.return_value = {'user_id': 1}
+
+            response = TestClient(app).get('/', headers={'token': 'token'})
+
+            self.assertEqual(response.json(), {'same': True})
+            mock_authenticate.assert_called_once_with('token')
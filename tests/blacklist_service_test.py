@@ -0,0 +1,85 @@
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+from common.token_blacklist import TokenBlacklist, token_hash
+from services import blacklist_service
+
+
+@patch('services.blacklist_service.read_query')
+class BlacklistService_Should(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch('services.blacklist_service.blacklist', TokenBlacklist())
+        self.blacklist = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_isRevoked_loadsOnce_thenServesFromMemory(self, mock_read_query):
+        mock_read_query.return_value = [(token_hash('revoked.token'), None, datetime(2024, 11, 8, 18, 0))]
+
+        first = blacklist_service.is_revoked('revoked.token')
+        second = blacklist_service.is_revoked('other.token')
+
+        self.assertTrue(first)
+        self.assertFalse(second)
+        mock_read_query.assert_called_once()
+
+    @patch('services.blacklist_service.insert_query')
+    def test_revoke_storesTokenAndExpiry_andUpdatesMemory(self, mock_insert_query, mock_read_query):
+        self.blacklist.replace({})
+
+        blacklist_service.revoke('some.token', 1731088800)
+
+        mock_insert_query.assert_called_once_with('insert into tokens_blacklist(token_hash, expires_at) values(?, ?)',
+                                                  (token_hash('some.token'), datetime(2024, 11, 8, 18, 0)))
+        self.assertTrue(blacklist_service.is_revoked('some.token'))
+        mock_read_query.assert_not_called()
+
+    def test_sync_readsOnlyRowsSinceLastSync(self, mock_read_query):
+        synced_until = datetime(2024, 11, 8, 18, 0)
+        self.blacklist.replace({}, synced_until)
+        later = datetime(2024, 11, 8, 18, 5)
+        mock_read_query.return_value = [(bytearray(token_hash('new.token')), None, later)]
+
+        blacklist_service.sync()
+
+        self.assertEqual(mock_read_query.call_args.args[1], (synced_until - blacklist_service.SYNC_OVERLAP,))
+        self.assertIn(token_hash('new.token'), self.blacklist)
+        self.assertEqual(self.blacklist.synced_until, later)
+
+    def test_sync_dropsExpiredEntries(self, mock_read_query):
+        self.blacklist.replace({token_hash('old.token'): 1.0}, datetime(2024, 11, 8, 18, 0))
+        mock_read_query.return_value = []
+
+        blacklist_service.sync()
+
+        self.assertNotIn(token_hash('old.token'), self.blacklist)
+
+    def test_sync_loadsEverything_whenNotLoaded(self, mock_read_query):
+        mock_read_query.return_value = []
+
+        blacklist_service.sync()
+
+        self.assertTrue(self.blacklist.loaded)
+        self.assertIn('expires_at is null or expires_at > utc_timestamp()', mock_read_query.call_args.args[0])
+
+    @patch('services.blacklist_service.update_query')
+    def test_purgeExpired_deletesInBatches_untilShortBatch(self, mock_update_query, mock_read_query):
+        mock_update_query.side_effect = [100, 100, 42]
+
+        deleted = blacklist_service.purge_expired(batch_size=100)
+
+        self.assertEqual(deleted, 242)
+        self.assertEqual(mock_update_query.call_count, 3)
+        self.assertEqual(mock_update_query.call_args.args[1], (100,))
+        self.assertIn('expires_at <= utc_timestamp()', mock_update_query.call_args.args[0])
+
+    @patch('services.blacklist_service.update_query')
+    def test_purgeExpired_runsOnce_whenNothingExpired(self, mock_update_query, mock_read_query):
+        mock_update_query.return_value = 0
+
+        self.assertEqual(blacklist_service.purge_expired(), 0)
+        mock_update_query.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
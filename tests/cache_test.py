@@ -0,0 +1,62 @@
+import unittest
+from common.cache import TTLCache
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TTLCache_Should(unittest.TestCase):
+
+    def test_get_returnsStoredValue(self):
+        cache = TTLCache(max_size=2, ttl=10)
+
+        cache.set('a', 1)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_get_treatsExpiredEntryAsMissing(self):
+        clock = FakeClock()
+        cache = TTLCache(max_size=2, ttl=10, clock=clock)
+        cache.set('a', 1)
+
+        clock.now = 10
+
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+    def test_set_evictsLeastRecentlyUsed(self):
+        cache = TTLCache(max_size=2, ttl=10)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_invalidate_removesEntry(self):
+        cache = TTLCache()
+        cache.set('a', 1)
+
+        cache.invalidate('a')
+        cache.invalidate('missing')
+
+        self.assertIsNone(cache.get('a'))
+
+    def test_init_rejectsEmptyCache(self):
+        with self.assertRaises(ValueError):
+            TTLCache(max_size=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,10 @@
+import asyncio
 import unittest
 from unittest.mock import patch, Mock
 from fastapi.testclient import TestClient
 from data.models import CategoryResponse, Category, CategoryCreation
 from routers import categories
+from services.categories_service import CategoryContext
 from main import app  # Assuming your FastAPI app is in main.py
 
 mock_categories_service = Mock(spec='services.categories_service')
@@ -28,26 +30,39 @@ class TestCategoriesRouter(unittest.TestCase):
         mock_categories_service.reset_mock()
 
     def test_get_all_categories(self):
-        with patch('routers.categories.authenticate_user') as authenticate_user:
-            authenticate_user.return_value = {'user_id': 1}
-            test_category = fake_category()
-            mock_categories_service.get_categories = lambda: [test_category]
+        user = {'user_id': 1}
+        test_category = fake_category()
+        mock_categories_service.get_categories = lambda: [test_category]
 
-            result = categories.get_all_categories('token')
+        result = categories.get_all_categories(user)
 
-            self.assertEqual(result, [test_category])
+        self.assertEqual(result, [test_category])
 
     def test_get_category_by_id(self):
-        with patch('routers.categories.authenticate_user') as authenticate_user:
-            authenticate_user.return_value = {'user_id': 1}
-            test_category = fake_category()
-            mock_categories_service.exists = lambda id: True
-            mock_categories_service.check_if_private = lambda id: False
-            mock_categories_service.get_by_id = lambda id: test_category
+        user = {'user_id': 1}
+        test_category = fake_category()
+        mock_categories_service.get_context = lambda id, user: CategoryContext(exists=True)
+        mock_categories_service.get_by_id = lambda id: test_category
 
-            result = categories.get_category_by_id(1, 'token')
+        result = asyncio.run(categories.get_category_by_id(1, user))
 
-            self.assertEqual(result, test_category)
+        self.assertEqual(result, test_category)
+
+    def test_get_category_by_id_private_without_access(self):
+        user = {'user_id': 1, 'is_admin': False}
+        mock_categories_service.get_context = lambda id, user: CategoryContext(exists=True, is_private=True)
+
+        result = asyncio.run(categories.get_category_by_id(1, user))
+
+        self.assertEqual(result.status_code, 403)
+
+    def test_get_category_by_id_not_found(self):
+        user = {'user_id': 1, 'is_admin': False}
+        mock_categories_service.get_context = lambda id, user: CategoryContext(exists=False)
+
+        result = asyncio.run(categories.get_category_by_id(1, user))
+
+        self.assertEqual(result.status_code, 404)
 
     # def test_create_category(self):
     #     with patch('routers.categories.authenticate_user') as authenticate_user:
@@ -61,123 +76,111 @@ class TestCategoriesRouter(unittest.TestCase):
     #         self.assertEqual(result, fake_category())
 
     def test_lock_category(self):
-        with patch('routers.categories.authenticate_user') as authenticate_user:
-            authenticate_user.return_value = {'user_id': 1, 'is_admin': True}
-            mock_categories_service.exists = lambda id: True
-            mock_categories_service.lock = lambda id: True
+        user = {'user_id': 1, 'is_admin': True}
+        mock_categories_service.exists = lambda id: True
+        mock_categories_service.lock = lambda id: True
 
-            result = categories.lock_category(1, 'token')
+        result = categories.lock_category(1, user)
 
-            self.assertEqual(result, True)
+        self.assertEqual(result, True)
 
     def test_lock_category_not_admin(self):
-        with patch('routers.categories.authenticate_user') as authenticate_user:
-            authenticate_user.return_value = {'user_id': 1, 'is_admin': False}
-            mock_categories_service.exists = lambda id: True
-            mock_categories_service.lock = lambda id: True
+        user = {'user_id': 1, 'is_admin': False}
+        mock_categories_service.exists = lambda id: True
+        mock_categories_service.lock = lambda id: True
 
-            result = categories.lock_category(1, 'token')
+        result = categories.lock_category(1, user)
 
-            self.assertEqual(result.status_code, 403)
+        self.assertEqual(result.status_code, 403)
 
     def test_lock_category_not_found(self):
-        with patch('routers.categories.authenticate_user') as authenticate_user:
-            authenticate_user.return_value = {'user_id': 1, 'is_admin': True}
-            mock_categories_service.exists = lambda id: False
-            mock_categories_service.lock = lambda id: True
+        user = {'user_id': 1, 'is_admin': True}
+        mock_categories_service.exists = lambda id: False
+        mock_categories_service.lock = lambda id: True
 
-            result = categories.lock_category(1, 'token')
+        result = categories.lock_category(1, user)
 
-            self.assertEqual(result.status_code, 404)
+        self.assertEqual(result.status_code, 404)
 
     def test_make_category_private(self):
-        with patch('routers.categories.authenticate_user') as authenticate_user:
-            authenticate_user.return_value = {'user_id': 1, 'is_admin': True}
-            mock_categories_service.exists = lambda id: True
-            mock_categories_service.make_private = lambda id: True
+        user = {'user_id': 1, 'is_admin': True}
+        mock_categories_service.exists = lambda id: True
+        mock_categories_service.make_private = lambda id: True
 
-            result = categories.make_category_private(1, 'token')
+        result = categories.make_category_private(1, user)
 
-            self.assertEqual(result, True)
+        self.assertEqual(result, True)
 
     def test_make_category_private_not_admin(self):
-        with patch('routers.categories.authenticate_user') as authenticate_user:
-            authenticate_user.return_value = {'user_id': 1, 'is_admin': False}
-            mock_categories_service.exists = lambda id: True
-            mock_categories_service.make_private = lambda id: True
+        user = {'user_id': 1, 'is_admin': False}
+        mock_categories_service.exists = lambda id: True
+        mock_categories_service.make_private = lambda id: True
 
-            result = categories.make_category_private(1, 'token')
+        result = categories.make_category_private(1, user)
 
-            self.assertEqual(result.status_code, 403)
+        self.assertEqual(result.status_code, 403)
 
     def test_make_category_private_not_found(self):
-        with patch('routers.categories.authenticate_user') as authenticate_user:
-            authenticate_user.return_value = {'user_id': 1, 'is_admin': True}
-            mock_categories_service.exists = lambda id: False
-            mock_categories_service.make_private = lambda id: True
+        user = {'user_id': 1, 'is_admin': True}
+        mock_categories_service.exists = lambda id: False
+        mock_categories_service.make_private = lambda id: True
 
-            result = categories.make_category_private(1, 'token')
-            self.assertEqual(result.status_code, 404)
+        result = categories.make_category_private(1, user)
+        self.assertEqual(result.status_code, 404)
 
     def test_unlock_category(self):
-        with patch('routers.categories.authenticate_user') as authenticate_user:
-            authenticate_user.return_value = {'user_id': 1, 'is_admin': True}
-            mock_categories_service.exists = lambda id: True
-            mock_categories_service.unlock = lambda id: True
+        user = {'user_id': 1, 'is_admin': True}
+        mock_categories_service.exists = lambda id: True
+        mock_categories_service.unlock = lambda id: True
 
-            result = categories.unlock_category(1, 'token')
+        result = categories.unlock_category(1, user)
 
-            self.assertEqual(result, True)
+        self.assertEqual(result, True)
 
     def test_unlock_category_not_admin(self):
-        with patch('routers.categories.authenticate_user') as authenticate_user:
-            authenticate_user.return_value = {'user_id': 1, 'is_admin': False}
-            mock_categories_service.exists = lambda id: True
-            mock_categories_service.unlock = lambda id: True
+        user = {'user_id': 1, 'is_admin': False}
+        mock_categories_service.exists = lambda id: True
+        mock_categories_service.unlock = lambda id: True
 
-            result = categories.unlock_category(1, 'token')
+        result = categories.unlock_category(1, user)
 
-            self.assertEqual(result.status_code, 403)
+        self.assertEqual(result.status_code, 403)
 
     def test_unlock_category_not_found(self):
-        with patch('routers.categories.authenticate_user') as authenticate_user:
-            authenticate_user.return_value = {'user_id': 1, 'is_admin': True}
-            mock_categories_service.exists = lambda id: False
-            mock_categories_service.unlock = lambda id: True
+        user = {'user_id': 1, 'is_admin': True}
+        mock_categories_service.exists = lambda id: False
+        mock_categories_service.unlock = lambda id: True
 
-            result = categories.unlock_category(1, 'token')
+        result = categories.unlock_category(1, user)
 
-            self.assertEqual(result.status_code, 404)
+        self.assertEqual(result.status_code, 404)
 
     def test_make_category_public(self):
-        with patch('routers.categories.authenticate_user') as authenticate_user:
-            authenticate_user.return_value = {'user_id': 1, 'is_admin': True}
-            mock_categories_service.exists = lambda id: True
-            mock_categories_service.make_public = lambda id: True
+        user = {'user_id': 1, 'is_admin': True}
+        mock_categories_service.exists = lambda id: True
+        mock_categories_service.make_public = lambda id: True
 
-            result = categories.make_category_public(1, 'token')
+        result = categories.make_category_public(1, user)
 
-            self.assertEqual(result, True)
+        self.assertEqual(result, True)
 
     def test_make_category_public_not_admin(self):
-        with patch('routers.categories.authenticate_user') as authenticate_user:
-            authenticate_user.return_value = {'user_id': 1, 'is_admin': False}
-            mock_categories_service.exists = lambda id: True
-            mock_categories_service.make_public = lambda id: True
+        user = {'user_id': 1, 'is_admin': False}
+        mock_categories_service.exists = lambda id: True
+        mock_categories_service.make_public = lambda id: True
 
-            result = categories.make_category_public(1, 'token')
+        result = categories.make_category_public(1, user)
 
-            self.assertEqual(result.status_code, 403)
+        self.assertEqual(result.status_code, 403)
 
     def test_make_category_public_not_found(self):
-        with patch('routers.categories.authenticate_user') as authenticate_user:
-            authenticate_user.return_value = {'user_id': 1, 'is_admin': True}
-            mock_categories_service.exists = lambda id: False
-            mock_categories_service.make_public = lambda id: True
+        user = {'user_id': 1, 'is_admin': True}
+        mock_categories_service.exists = lambda id: False
+        mock_categories_service.make_public = lambda id: True
 
-            result = categories.make_category_public(1, 'token')
+        result = categories.make_category_public(1, user)
 
-            self.assertEqual(result.status_code, 404)
+        self.assertEqual(result.status_code, 404)
 
 
 if __name__ == '__main__':
@@ -3,12 +3,23 @@ from unittest.mock import patch, Mock
 from common.responses import BadRequest
 from data.models import CategoryResponse, TopicResponse
 from services import categories_service
+from common.cache import TTLCache
 from fastapi.exceptions import HTTPException
 
 
 @patch('services.categories_service.read_query')
 class CategoriesServiceShould(unittest.TestCase):
 
+    def setUp(self):
+        categories_service._snapshot_cache = TTLCache(max_size=1)
+        categories_service._miss_cache = TTLCache(max_size=10)
+        categories_service._last_miss_reload = float('-inf')
+
+    def tearDown(self):
+        categories_service._snapshot_cache = None
+        categories_service._miss_cache = None
+        categories_service._last_miss_reload = float('-inf')
+
     def test_get_categories(self, mock_read_query):
         mock_read_query.return_value = [('Category', 1, 0, 0)]
 
@@ -61,11 +72,97 @@ class CategoriesServiceShould(unittest.TestCase):
         self.assertIsNone(result)
 
     def test_exists(self, mock_read_query):
-        mock_read_query.return_value = [(1, 'Category')]
+        mock_read_query.return_value = [(1, 'Category', 1, 0, 0)]
 
-        result = categories_service.exists(1)
+        self.assertTrue(categories_service.exists(1))
+        mock_read_query.assert_called_once()
 
-        self.assertTrue(result)
+    def test_exists_reloadsSnapshotOnce_whenIdMissing(self, mock_read_query):
+        mock_read_query.side_effect = [[(1, 'Category', 1, 0, 0)], [(1, 'Category', 1, 0, 0), (2, 'New', 1, 0, 0)]]
+
+        self.assertTrue(categories_service.exists(2))
+        self.assertEqual(mock_read_query.call_count, 2)
+
+    def test_get_meta_remembersMiss_insteadOfReloadingAgain(self, mock_read_query):
+        mock_read_query.return_value = [(1, 'Category', 1, 0, 0)]
+
+        self.assertIsNone(categories_service.get_meta(2))
+        self.assertIsNone(categories_service.get_meta(2))
+        self.assertEqual(mock_read_query.call_count, 2)
+
+    @patch('services.categories_service.time.monotonic')
+    def test_get_meta_reloadsOncePerInterval_forDifferentMissingIds(self, mock_monotonic, mock_read_query):
+        mock_read_query.return_value = [(1, 'Category', 1, 0, 0)]
+        mock_monotonic.return_value = 100.0
+
+        self.assertIsNone(categories_service.get_meta(2))
+        self.assertIsNone(categories_service.get_meta(3))
+        self.assertEqual(mock_read_query.call_count, 2)
+
+        mock_monotonic.return_value = 102.0
+        self.assertIsNone(categories_service.get_meta(4))
+        self.assertEqual(mock_read_query.call_count, 3)
+
+    @patch('services.categories_service.on_commit')
+    def test_refresh_snapshot_forgetsMisses(self, mock_on_commit, mock_read_query):
+        mock_read_query.side_effect = [[(1, 'Category', 1, 0, 0)], [(1, 'Category', 1, 0, 0)],
+                                       [(1, 'Category', 1, 0, 0), (2, 'New', 1, 0, 0)]]
+        self.assertIsNone(categories_service.get_meta(2))
+
+        categories_service.refresh_snapshot()
+
+        self.assertIsNotNone(categories_service.get_meta(2))
+
+    @patch('services.categories_service.get_settings')
+    def test_reset_caches_rebuildsCachesWithCurrentSettings(self, mock_get_settings, mock_read_query):
+        mock_get_settings.return_value = Mock(category_snapshot_ttl=5.0, category_miss_reload_interval=2.0)
+
+        categories_service.reset_caches()
+
+        self.assertEqual(categories_service._get_snapshot_cache().ttl, 5.0)
+        self.assertEqual(categories_service._get_miss_cache().ttl, 2.0)
+
+    def test_checks_returnFalse_whenCategoryDoesNotExist(self, mock_read_query):
+        mock_read_query.return_value = []
+
+        self.assertFalse(categories_service.check_if_locked(1))
+        self.assertFalse(categories_service.check_if_private(1))
+        self.assertFalse(categories_service.is_owner(1, 1))
+
+    @patch('services.categories_service.get_user_access', return_value=0)
+    def test_get_context_returnsAllFacts(self, mock_get_user_access, mock_read_query):
+        mock_read_query.return_value = [(1, 'Category', 7, 1, 1)]
+        user = {'user_id': 2}
+
+        result = categories_service.get_context(1, user)
+
+        self.assertEqual(result, categories_service.CategoryContext(True, True, True, 7, 0))
+        mock_get_user_access.assert_called_once_with(user, 1)
+
+    @patch('services.categories_service.get_user_access')
+    def test_get_context_skipsAccess_forPublicCategory(self, mock_get_user_access, mock_read_query):
+        mock_read_query.return_value = [(1, 'Category', 7, 0, 0)]
+
+        result = categories_service.get_context(1, {'user_id': 2})
+
+        self.assertEqual(result, categories_service.CategoryContext(True, False, False, 7, None))
+        mock_get_user_access.assert_not_called()
+
+    def test_get_grant_context_checksUserAndAccess_inOneQuery(self, mock_read_query):
+        mock_read_query.side_effect = [[(1, 'Category', 7, 0, 1)], [(5, 1)]]
+
+        result = categories_service.get_grant_context(1, 5)
+
+        self.assertEqual((result.exists, result.is_private, result.access, result.user_exists), (True, True, 1, True))
+        self.assertEqual(mock_read_query.call_args.args[1], (1, 5))
+
+    def test_get_grant_context_whenUserDoesNotExist(self, mock_read_query):
+        mock_read_query.side_effect = [[(1, 'Category', 7, 0, 1)], []]
+
+        result = categories_service.get_grant_context(1, 5)
+
+        self.assertFalse(result.user_exists)
+        self.assertIsNone(result.access)
 
     def test_cat_name_exists(self, mock_read_query):
         mock_read_query.return_value = [(1, 'Category')]
@@ -82,32 +179,81 @@ class CategoriesServiceShould(unittest.TestCase):
         self.assertFalse(result)
 
     def test_lock(self, mock_read_query):
-        mock_read_query.return_value = [(1, 'Category')]
+        mock_read_query.return_value = [(1, 'Category', 1, 1, 0)]
 
         result = categories_service.lock(1)
 
         self.assertTrue(result)
 
     def test_make_private(self, mock_read_query):
-        mock_read_query.return_value = [(1, 'Category')]
+        mock_read_query.return_value = [(1, 'Category', 1, 0, 1)]
 
         result = categories_service.make_private(1)
 
         self.assertTrue(result)
 
     def test_is_owner(self, mock_read_query):
-        mock_read_query.return_value = [(1, 'Category')]
-
-        result = categories_service.is_owner(1, 1)
-
-        self.assertTrue(result)
-
-    def test_check_user_access(self, mock_read_query):
-        mock_read_query.return_value = [(1, 'Category')]
-
-        result = categories_service.check_user_access(1, 1)
-
-        self.assertTrue(result)
+        mock_read_query.return_value = [(1, 'Category', 1, 0, 0)]
+
+        self.assertTrue(categories_service.is_owner(1, 1))
+        self.assertFalse(categories_service.is_owner(2, 1))
+
+    def test_checks_areServedFromSnapshot(self, mock_read_query):
+        mock_read_query.return_value = [(1, 'Category', 1, 1, 0), (2, 'Private', 1, 0, 1)]
+
+        self.assertTrue(categories_service.check_if_locked(1))
+        self.assertFalse(categories_service.check_if_private(1))
+        self.assertFalse(categories_service.check_if_locked(2))
+        self.assertTrue(categories_service.check_if_private(2))
+        mock_read_query.assert_called_once()
+
+    @patch('services.categories_service.get_by_id')
+    @patch('services.categories_service.update_query')
+    def test_unlock_refreshesSnapshot(self, mock_update_query, mock_get_by_id, mock_read_query):
+        mock_read_query.side_effect = [[(1, 'Category', 1, 1, 0)], [(1, 'Category', 1, 0, 0)]]
+
+        categories_service.unlock(1)
+
+        self.assertFalse(categories_service.check_if_locked(1))
+        self.assertEqual(mock_read_query.call_count, 2)
+
+    @patch('services.categories_service.users_service.get_access_map', return_value={1: 1, 2: 0})
+    def test_check_user_access(self, mock_get_access_map, mock_read_query):
+        self.assertEqual(categories_service.check_user_access(1, 1), 1)
+        self.assertEqual(categories_service.check_user_access(1, 2), 0)
+        self.assertIsNone(categories_service.check_user_access(1, 3))
+        mock_get_access_map.assert_called_with(1)
+
+    @patch('services.categories_service.users_service.permissions_current', return_value=True)
+    def test_get_user_access_readsTokenSnapshot_whenCurrent(self, mock_permissions_current, mock_read_query):
+        user = {'user_id': 1, 'perms': {'3': 1}}
+
+        self.assertEqual(categories_service.get_user_access(user, 3), 1)
+        self.assertIsNone(categories_service.get_user_access(user, 4))
+        mock_read_query.assert_not_called()
+
+    @patch('services.categories_service.users_service.get_access_map', return_value={3: 0})
+    @patch('services.categories_service.users_service.permissions_current', return_value=False)
+    def test_get_user_access_usesAccessMap_whenSnapshotStale(self, mock_permissions_current, mock_get_access_map,
+                                                              mock_read_query):
+        result = categories_service.get_user_access({'user_id': 1, 'perms': {'3': 1}}, 3)
+
+        self.assertEqual(result, 0)
+        mock_get_access_map.assert_called_once_with(1)
+
+    @patch('services.categories_service.users_service.bump_permission_version')
+    @patch('services.categories_service.insert_query')
+    @patch('services.categories_service.update_query')
+    @patch('services.categories_service.get_by_id')
+    @patch('services.categories_service.check_if_private', return_value=True)
+    def test_make_public_bumpsPermissionVersionOfGrantedUsers(self, mock_check_if_private, mock_get_by_id,
+                                                              mock_update_query, mock_insert_query,
+                                                              mock_bump_permission_version, mock_read_query):
+        mock_read_query.return_value = [(2,), (5,)]
+
+        categories_service.make_public(1)
+
+        mock_bump_permission_version.assert_called_once_with(2, 5)
 
 
 
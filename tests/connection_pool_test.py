@@ -0,0 +1,114 @@
+import threading
+import unittest
+from unittest.mock import Mock, patch
+from data.connection_pool import ConnectionPool, PoolTimeoutError, PoolClosedError
+
+
+def fake_connect():
+    return Mock()
+
+
+class ConnectionPoolShould(unittest.TestCase):
+
+    def test_acquire_reusesReleasedConnection(self):
+        pool = ConnectionPool(fake_connect, min_size=0, max_size=2)
+
+        first = pool.acquire()
+        pool.release(first)
+        second = pool.acquire()
+
+        self.assertIs(first, second)
+        self.assertEqual(pool.stats().size, 1)
+
+    def test_acquire_raisesTimeout_whenPoolExhausted(self):
+        pool = ConnectionPool(fake_connect, min_size=0, max_size=1, checkout_timeout=0.01)
+        pool.acquire()
+
+        with self.assertRaises(PoolTimeoutError):
+            pool.acquire()
+
+        self.assertEqual(pool.stats().timeouts, 1)
+
+    def test_acquire_waitsForRelease_whenPoolExhausted(self):
+        pool = ConnectionPool(fake_connect, min_size=0, max_size=1, checkout_timeout=5)
+        conn = pool.acquire()
+        releaser = threading.Timer(0.05, pool.release, (conn,))
+        releaser.start()
+
+        result = pool.acquire()
+
+        releaser.join()
+        self.assertIs(result, conn)
+
+    def test_acquire_discardsConnection_whenHealthCheckFails(self):
+        broken = Mock()
+        broken.ping.side_effect = Exception('gone away')
+        healthy = Mock()
+        connect = Mock(side_effect=[broken, healthy])
+        pool = ConnectionPool(connect, min_size=0, max_size=1, health_check_interval=0)
+        pool.release(pool.acquire())
+
+        result = pool.acquire()
+
+        self.assertIs(result, healthy)
+        broken.close.assert_called_once()
+        self.assertEqual(pool.stats().discarded, 1)
+
+    def test_acquire_closesIdleConnections_pastIdleTimeout(self):
+        pool = ConnectionPool(fake_connect, min_size=0, max_size=2, idle_timeout=10)
+        conn = pool.acquire()
+        pool.release(conn)
+
+        with patch('data.connection_pool.time.monotonic', return_value=10 ** 9):
+            result = pool.acquire()
+
+        self.assertIsNot(result, conn)
+        conn.close.assert_called_once()
+
+    def test_acquire_keepsMinSize_pastIdleTimeout(self):
+        pool = ConnectionPool(fake_connect, min_size=1, max_size=2, idle_timeout=10, health_check_interval=10 ** 10)
+        conn = pool.acquire()
+        pool.release(conn)
+
+        with patch('data.connection_pool.time.monotonic', return_value=10 ** 9):
+            result = pool.acquire()
+
+        self.assertIs(result, conn)
+
+    def test_release_closesConnection_whenDiscarded(self):
+        pool = ConnectionPool(fake_connect, min_size=0, max_size=1)
+        conn = pool.acquire()
+
+        pool.release(conn, discard=True)
+
+        conn.close.assert_called_once()
+        self.assertEqual(pool.stats().size, 0)
+
+    def test_warmUp_opensMinSizeConnections(self):
+        pool = ConnectionPool(fake_connect, min_size=3, max_size=5)
+
+        pool.warm_up()
+
+        self.assertEqual(pool.stats().idle, 3)
+
+    def test_stats_reportsInUseAndCheckouts(self):
+        pool = ConnectionPool(fake_connect, min_size=0, max_size=3)
+        pool.acquire()
+        pool.acquire()
+
+        stats = pool.stats()
+
+        self.assertEqual(stats.in_use, 2)
+        self.assertEqual(stats.checkouts, 2)
+        self.assertEqual(stats.waiting, 0)
+
+    def test_acquire_raises_whenPoolClosed(self):
+        pool = ConnectionPool(fake_connect, min_size=0, max_size=1)
+        pool.close()
+
+        with self.assertRaises(PoolClosedError):
+            pool.acquire()
+
+
+if __name__ == '__main__':
+    unittest.main()
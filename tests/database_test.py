@@ -0,0 +1,122 @@
+import asyncio
+import unittest
+from unittest.mock import MagicMock, Mock, patch
+from data import database
+
+
+def fake_pool():
+    pool = Mock()
+    pool.acquire.side_effect = lambda: MagicMock()
+    return pool
+
+
+class DatabaseShould(unittest.TestCase):
+
+    def test_queries_shareOneConnection_insideTransaction(self):
+        pool = fake_pool()
+        with patch('data.database.get_pool', return_value=pool):
+            with database.transaction():
+                database.read_query('select 1')
+                database.insert_query('insert into t values (1)')
+                database.update_query('update t set a = 2')
+
+        pool.acquire.assert_called_once()
+        conn = pool.release.call_args.args[0]
+        conn.begin.assert_called_once()
+        conn.commit.assert_called_once()
+        pool.release.assert_called_once_with(conn)
+
+    def test_transaction_rollsBack_whenBlockRaises(self):
+        pool = fake_pool()
+        with patch('data.database.get_pool', return_value=pool):
+            with self.assertRaises(ValueError):
+                with database.transaction():
+                    database.update_query('update t set a = 2')
+                    raise ValueError()
+
+        conn = pool.release.call_args.args[0]
+        conn.rollback.assert_called_once()
+        conn.commit.assert_not_called()
+
+    def test_transaction_doesNotCheckOutConnection_withoutQueries(self):
+        pool = fake_pool()
+        with patch('data.database.get_pool', return_value=pool):
+            with database.transaction():
+                pass
+
+        pool.acquire.assert_not_called()
+
+    def test_nestedTransaction_joinsOuterTransaction(self):
+        pool = fake_pool()
+        with patch('data.database.get_pool', return_value=pool):
+            with database.transaction():
+                database.read_query('select 1')
+                with database.transaction():
+                    database.update_query('update t set a = 2')
+
+        pool.acquire.assert_called_once()
+        pool.release.call_args.args[0].commit.assert_called_once()
+
+    def test_onCommit_runsCallbackAfterCommit(self):
+        pool = fake_pool()
+        callback = Mock()
+        with patch('data.database.get_pool', return_value=pool):
+            with database.transaction():
+                database.update_query('update t set a = 2')
+                database.on_commit(callback)
+                callback.assert_not_called()
+
+        callback.assert_called_once()
+
+    def test_onCommit_dropsCallback_onRollback(self):
+        pool = fake_pool()
+        callback = Mock()
+        with patch('data.database.get_pool', return_value=pool):
+            with self.assertRaises(ValueError):
+                with database.transaction():
+                    database.update_query('update t set a = 2')
+                    database.on_commit(callback)
+                    raise ValueError()
+
+        callback.assert_not_called()
+
+    def test_onCommit_runsCallbackAtOnce_outsideTransaction(self):
+        callback = Mock()
+
+        database.on_commit(callback)
+
+        callback.assert_called_once()
+
+    def test_queries_releaseConnection_outsideTransaction(self):
+        pool = fake_pool()
+        with patch('data.database.get_pool', return_value=pool):
+            database.read_query('select 1')
+            database.read_query('select 2')
+
+        self.assertEqual(pool.acquire.call_count, 2)
+        self.assertEqual(pool.release.call_count, 2)
+
+    def test_transactional_runsHandlerInTransaction(self):
+        pool = fake_pool()
+
+        @database.transactional
+        def handler(value):
+            database.update_query('update t set a = ?', (value,))
+            return value
+
+        with patch('data.database.get_pool', return_value=pool):
+            result = handler(5)
+
+        self.assertEqual(result, 5)
+        pool.release.call_args.args[0].commit.assert_called_once()
+
+    def test_readQueryAsync_runsQueryOnExecutor(self):
+        with patch('data.database.read_query', return_value=[(1,)]) as mock_read_query:
+            result = asyncio.run(database.read_query_async('select ?', (1,)))
+
+        self.assertEqual(result, [(1,)])
+        mock_read_query.assert_called_once_with('select ?', (1,))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,4 @@
+import asyncio
 import unittest
 from unittest.mock import Mock
 from common.responses import NotFound, BadRequest
@@ -21,7 +22,7 @@ class MessagesRouterShould(unittest.TestCase):
         msg = MessageText(text="mock-text", receiver_id=1)
         mock_users_service.get_user_by_id = lambda receiver_id: False
 
-        result = messages_router.create_message(msg ,token='mock-token')
+        result = messages_router.create_message(msg ,user={'user_id': 1})
 
         self.assertIsInstance(result, NotFound)
 
@@ -30,7 +31,7 @@ class MessagesRouterShould(unittest.TestCase):
 
         msg = MessageText(text="", receiver_id=1)
         mock_users_service.get_user_by_id = lambda receiver_id: True
-        result = messages_router.create_message(msg ,token='mock-token')
+        result = messages_router.create_message(msg ,user={'user_id': 1})
 
         self.assertIsInstance(result, BadRequest)
 
@@ -38,17 +39,17 @@ class MessagesRouterShould(unittest.TestCase):
 
         msg = MessageText(text="x" * 501, receiver_id=1)        
         mock_users_service.get_user_by_id = lambda receiver_id: True
-        result = messages_router.create_message(msg ,token='mock-token')
+        result = messages_router.create_message(msg ,user={'user_id': 1})
 
         self.assertIsInstance(result, BadRequest)
 
     def test_createMessage_returnsCorrectRestult(self): 
 
         msg = MessageText(text="mock-text", receiver_id=1)
-        mock_messages_service.create = lambda msg, token: "mock-text"
+        mock_messages_service.create = lambda msg, user: "mock-text"
         mock_users_service.get_user_by_id = lambda receiver_id: True
 
-        result = messages_router.create_message(msg ,token='mock-token')
+        result = messages_router.create_message(msg ,user={'user_id': 1})
         
         expected_result = "mock-text" # Няма ЛОГИКААААА
 
@@ -62,7 +63,7 @@ class MessagesRouterShould(unittest.TestCase):
         receiver_id = 1
         mock_users_service.get_user_by_id = lambda receiver_id: False
 
-        result = messages_router.view_conversation(receiver_id,token='mock-token')
+        result = asyncio.run(messages_router.view_conversation(receiver_id,user={'user_id': 1}))
 
         self.assertIsInstance(result, NotFound)
 
@@ -70,9 +71,9 @@ class MessagesRouterShould(unittest.TestCase):
 
         receiver_id = 1
         mock_users_service.get_user_by_id = lambda receiver_id: True
-        mock_messages_service.all_messages = lambda receiver_id, token: False
+        mock_messages_service.all_messages = lambda receiver_id, user: False
 
-        result = messages_router.view_conversation(receiver_id,token='mock-token')
+        result = asyncio.run(messages_router.view_conversation(receiver_id,user={'user_id': 1}))
 
         self.assertIsInstance(result, NotFound)
 
@@ -83,12 +84,12 @@ class MessagesRouterShould(unittest.TestCase):
         #mock_users_service.get_user_by_id = lambda receiver_id: {"id": receiver_id, "username": "receiver_user"}
         mock_users_service.get_user_by_id = lambda receiver_id: True
 
-        mock_messages_service.all_messages = lambda receiver_id, token: [
+        mock_messages_service.all_messages = lambda receiver_id, user: [
             MessageOutput(sender_id=2, message_date="2024-11-11 14:00:00", message_text="Hello!"),
             MessageOutput(sender_id=receiver_id, message_date="2024-11-11 15:00:00", message_text="Hi there!")
         ]
 
-        result = messages_router.view_conversation(receiver_id, token='mock-token')
+        result = asyncio.run(messages_router.view_conversation(receiver_id, user={'user_id': 1}))
 
         expected_result = [
             MessageOutput(sender_id=2, message_date="2024-11-11 14:00:00", message_text="Hello!"),
@@ -99,27 +100,23 @@ class MessagesRouterShould(unittest.TestCase):
 
     def test_viewConversations_returnsNotFound_whenNoData(self):
 
-        mock_messages_service.all_conversations = lambda token: False
-        result = messages_router.view_conversations(token='mock-token')
+        mock_messages_service.all_conversations = lambda user: False
+        result = messages_router.view_conversations(user={'user_id': 1})
 
         self.assertIsInstance(result, NotFound)
 
     def test_viewConversations_returnsCorrectResult(self):
         # Arrange
-        #mock_user_id = 1
-        token = 'mock-token'
-
-        # Mocking authenticate_user to simulate a valid token
-        #mock_authenticate_user.return_value = {'user_id': mock_user_id}
+        user = {'user_id': 1}
 
         # Mock messages_service.all_conversations to return a list of UserResponse objects
-        mock_messages_service.all_conversations = lambda token: [
+        mock_messages_service.all_conversations = lambda user: [
             UserResponseChats(id=2, username="user2"),
             UserResponseChats(id=3, username="user3")
         ]
 
         # Act
-        result = messages_router.view_conversations(token)
+        result = messages_router.view_conversations(user)
 
         # Assert
         expected_result = [
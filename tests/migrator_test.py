@@ -0,0 +1,102 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+from data import migrator
+
+
+def write_migrations(directory, files):
+    for name, content in files.items():
+        Path(directory, name).write_text(content, encoding='utf-8')
+
+
+class Migrator_Should(unittest.TestCase):
+
+    def test_discover_ordersByVersion_andIgnoresOtherFiles(self):
+        with tempfile.TemporaryDirectory() as directory:
+            write_migrations(directory, {'0002_second.sql': '', '0001_first.sql': '', 'notes.txt': ''})
+
+            result = migrator.discover(Path(directory))
+
+        self.assertEqual([(m.version, m.name) for m in result], [(1, 'first'), (2, 'second')])
+
+    def test_discover_raisesValueError_onDuplicateVersions(self):
+        with tempfile.TemporaryDirectory() as directory:
+            write_migrations(directory, {'0001_a.sql': '', '0001_b.sql': ''})
+
+            with self.assertRaises(ValueError):
+                migrator.discover(Path(directory))
+
+    def test_splitStatements_skipsComments(self):
+        sql = '''-- comment; not a statement
+create table a (
+    id int
+);
+
+-- another
+create index ix on a (id);
+'''
+
+        result = migrator.split_statements(sql)
+
+        self.assertEqual(result, ['create table a (\n    id int\n)', 'create index ix on a (id)'])
+
+    def test_splitStatements_keepsCompoundStatementTogether(self):
+        sql = '''BEGIN NOT ATOMIC
+    IF true THEN
+        update a set id = 1;
+    END IF;
+END;
+create index ix on a (id);
+'''
+
+        result = migrator.split_statements(sql)
+
+        self.assertEqual(result, ['BEGIN NOT ATOMIC\n    IF true THEN\n        update a set id = 1;\n    END IF;\nEND',
+                                  'create index ix on a (id)'])
+
+    def test_tokenBlacklistHashMigration_guardsStepsThatReadTokenColumn(self):
+        migration = next(m for m in migrator.discover() if m.version == 5)
+
+        guarded = [s for s in migration.statements() if 'token,' in s or 'SHA2(token' in s]
+
+        self.assertEqual(len(guarded), 1)
+        self.assertTrue(guarded[0].startswith('BEGIN NOT ATOMIC'))
+        self.assertIn("column_name = 'token'", guarded[0])
+
+    def test_bundledMigrations_areDiscovered(self):
+        result = migrator.discover()
+
+        self.assertEqual([m.version for m in result], list(range(1, len(result) + 1)))
+        self.assertTrue(all(m.statements() for m in result))
+
+    @patch('data.migrator.update_query')
+    @patch('data.migrator.read_query', return_value=[(1,)])
+    def test_migrate_appliesOnlyPendingMigrations(self, mock_read_query, mock_update_query):
+        with tempfile.TemporaryDirectory() as directory:
+            write_migrations(directory, {'0001_first.sql': 'create table a (id int);',
+                                         '0002_second.sql': 'create table b (id int);\ncreate table c (id int);'})
+
+            result = migrator.migrate(migrations=migrator.discover(Path(directory)))
+
+        self.assertEqual([m.version for m in result], [2])
+        executed = [call.args[0] for call in mock_update_query.call_args_list]
+        self.assertIn('create table b (id int)', executed)
+        self.assertIn('create table c (id int)', executed)
+        self.assertNotIn('create table a (id int)', executed)
+        self.assertEqual(mock_update_query.call_args.args[1], (2, 'second'))
+
+    @patch('data.migrator.update_query')
+    @patch('data.migrator.read_query', return_value=[])
+    def test_migrate_stopsAtTarget(self, mock_read_query, mock_update_query):
+        with tempfile.TemporaryDirectory() as directory:
+            write_migrations(directory, {'0001_first.sql': 'create table a (id int);',
+                                         '0002_second.sql': 'create table b (id int);'})
+
+            result = migrator.migrate(target=1, migrations=migrator.discover(Path(directory)))
+
+        self.assertEqual([m.version for m in result], [1])
+
+
+if __name__ == '__main__':
+    unittest.main()
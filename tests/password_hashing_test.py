@@ -0,0 +1,117 @@
+import threading
+import unittest
+from dataclasses import replace
+from unittest.mock import patch
+import bcrypt
+from common import password_hashing
+from common.password_hashing import PasswordHashingPool, HashingQueueFullError
+from common.settings import Settings
+
+
+def fake_settings(**changes):
+    settings = Settings(db_user='root', db_password='root', db_host='localhost', db_port=3306, db_name='forum_3',
+                        bcrypt_rounds=4)
+    return lambda: replace(settings, **changes)
+
+
+class PasswordHashingPoolShould(unittest.TestCase):
+
+    def test_run_returnsResult(self):
+        pool = PasswordHashingPool(workers=1, max_queue=0)
+        hashed = bcrypt.hashpw(b'password', bcrypt.gensalt(4))
+
+        self.assertTrue(pool.run(bcrypt.checkpw, b'password', hashed))
+        self.assertFalse(pool.run(bcrypt.checkpw, b'wrong', hashed))
+        self.assertEqual(pool.stats().completed, 2)
+        pool.shutdown()
+
+    def test_run_raisesQueueFull_whenWorkersAndQueueBusy(self):
+        pool = PasswordHashingPool(workers=1, max_queue=1)
+        started = threading.Event()
+        release = threading.Event()
+
+        def block():
+            started.set()
+            release.wait(5)
+
+        running = threading.Thread(target=pool.run, args=(block,))
+        running.start()
+        started.wait(5)
+        queued = threading.Thread(target=pool.run, args=(lambda: None,))
+        queued.start()
+        while pool.stats().queued == 0:
+            pass
+
+        with self.assertRaises(HashingQueueFullError):
+            pool.run(lambda: None)
+
+        stats = pool.stats()
+        self.assertEqual((stats.running, stats.queued, stats.rejected), (1, 1, 1))
+
+        release.set()
+        running.join()
+        queued.join()
+        self.assertEqual(pool.stats().completed, 2)
+        pool.shutdown()
+
+    def test_run_propagatesExceptions(self):
+        pool = PasswordHashingPool(workers=1, max_queue=0)
+
+        def fail():
+            raise ValueError('Invalid salt')
+
+        with self.assertRaises(ValueError):
+            pool.run(fail)
+
+        self.assertEqual(pool.stats().running, 0)
+        pool.shutdown()
+
+    def test_init_rejectsInvalidSizes(self):
+        with self.assertRaises(ValueError):
+            PasswordHashingPool(workers=0)
+
+
+@patch('common.password_hashing.get_hashing_pool', lambda: PasswordHashingPool(workers=1, max_queue=0))
+class PasswordHashingShould(unittest.TestCase):
+
+    @patch('common.password_hashing.get_settings', fake_settings())
+    def test_hashPassword_usesConfiguredRounds(self):
+        hashed = password_hashing.hash_password('password')
+
+        self.assertTrue(hashed.startswith('$2b$04$'))
+        self.assertTrue(password_hashing.check_password('password', hashed))
+        self.assertFalse(password_hashing.check_password('wrong', hashed))
+
+    @patch('common.password_hashing.get_settings', fake_settings())
+    def test_checkPassword_acceptsBytes(self):
+        hashed = bcrypt.hashpw(b'password', bcrypt.gensalt(4))
+
+        self.assertTrue(password_hashing.check_password('password', hashed))
+
+    @patch('common.password_hashing.get_settings', fake_settings(bcrypt_rounds=5))
+    def test_needsRehash_whenRoundsChanged(self):
+        self.assertTrue(password_hashing.needs_rehash(bcrypt.hashpw(b'password', bcrypt.gensalt(4))))
+        self.assertFalse(password_hashing.needs_rehash(bcrypt.hashpw(b'password', bcrypt.gensalt(5))))
+
+    @patch('common.password_hashing.get_settings', fake_settings(password_hash_scheme='argon2'))
+    def test_needsRehash_whenSchemeChanged(self):
+        self.assertTrue(password_hashing.needs_rehash(bcrypt.hashpw(b'password', bcrypt.gensalt(4))))
+
+    def test_schemeOf_rejectsUnknownHash(self):
+        self.assertEqual(password_hashing.scheme_of('$2b$04$' + 'a' * 53), password_hashing.BCRYPT)
+        self.assertEqual(password_hashing.scheme_of('$argon2id$v=19$m=65536,t=3,p=4$salt$hash'),
+                         password_hashing.ARGON2)
+
+        with self.assertRaises(ValueError):
+            password_hashing.scheme_of('plain')
+
+    @unittest.skipIf(password_hashing.argon2 is None, 'argon2-cffi is not installed')
+    @patch('common.password_hashing.get_settings', fake_settings(password_hash_scheme='argon2',
+                                                                 argon2_memory_cost=1024, argon2_time_cost=1))
+    def test_hashPassword_usesArgon2_whenConfigured(self):
+        hashed = password_hashing.hash_password('password')
+
+        self.assertTrue(hashed.startswith('$argon2'))
+        self.assertTrue(password_hashing.check_password('password', hashed))
+        self.assertFalse(password_hashing.check_password('wrong', hashed))
+        self.assertFalse(password_hashing.needs_rehash(hashed))
@@ -3,6 +3,8 @@
 # from common.responses import NotFound, BadRequest, Unauthorized
 # from routers import replies as reply_router
 # from data.models import ReplyText, ReplyResponse
+from services.categories_service import CategoryContext
+from services.topics_service import TopicState
 
 # mock_topics_service = Mock(spec='services.topics_service')
 # mock_replies_service = Mock(spec='services.replies_service')
@@ -94,14 +96,15 @@ class RepliesRouter_Should(unittest.TestCase):
         mock_replies_service.reset_mock()
         mock_categories_service.reset_mock()
         mock_users_service.reset_mock()
+        mock_users_service.is_admin.return_value = False
 
     def test_createReply_returnsNotFound_whenTopicDoesNotExist(self):
         reply_text = ReplyText(text="mock text", topic_id=1)
 
         # Simulate topic not existing
-        mock_topics_service.get_by_id.return_value = None
+        mock_topics_service.get_state.return_value = None
 
-        result = reply_router.create_reply(reply_text, token='mock-token')
+        result = reply_router.create_reply(reply_text, user={'user_id': 1, 'is_admin': False})
         
         self.assertIsInstance(result, NotFound)
 
@@ -109,11 +112,10 @@ class RepliesRouter_Should(unittest.TestCase):
         reply_text = ReplyText(text="mock text", topic_id=1)
 
         # Simulate topic exists and category is locked
-        mock_topics_service.get_by_id.return_value = True
-        mock_topics_service.check_category.return_value = 10
-        mock_categories_service.check_if_locked.return_value = True
+        mock_topics_service.get_state.return_value = TopicState(category_id=10, is_locked=False)
+        mock_categories_service.get_context.return_value = CategoryContext(exists=True, is_locked=True)
 
-        result = reply_router.create_reply(reply_text, token='mock-token')
+        result = reply_router.create_reply(reply_text, user={'user_id': 1, 'is_admin': False})
 
         self.assertIsInstance(result, Unauthorized)
 
@@ -121,14 +123,10 @@ class RepliesRouter_Should(unittest.TestCase):
         reply_text = ReplyText(text="mock text", topic_id=1)
 
         # Set up mock return values for access checks
-        mock_topics_service.get_by_id.return_value = True
-        mock_topics_service.check_category.return_value = 10
-        mock_categories_service.check_if_locked.return_value = False
-        mock_categories_service.check_if_private.return_value = True
-        mock_users_service.authenticate_user.return_value = {'user_id': 1, 'is_admin': False}
-        mock_categories_service.check_user_access.return_value = None
+        mock_topics_service.get_state.return_value = TopicState(category_id=10, is_locked=False)
+        mock_categories_service.get_context.return_value = CategoryContext(exists=True, is_locked=False, is_private=True, access=None)
 
-        result = reply_router.create_reply(reply_text, token='mock-token')
+        result = reply_router.create_reply(reply_text, user={'user_id': 1, 'is_admin': False})
 
         self.assertIsInstance(result, Unauthorized)
         #self.assertEqual(result.content, "Category is private.")
@@ -137,14 +135,10 @@ class RepliesRouter_Should(unittest.TestCase):
         reply_text = ReplyText(text="mock text", topic_id=1)
 
         # Mock the topic and category checks, and set access to read-only
-        mock_topics_service.get_by_id.return_value = True
-        mock_topics_service.check_category.return_value = 10
-        mock_categories_service.check_if_locked.return_value = False
-        mock_categories_service.check_if_private.return_value = True
-        mock_users_service.authenticate_user.return_value = {'user_id': 1, 'is_admin': False}
-        mock_categories_service.check_user_access.return_value = 0
+        mock_topics_service.get_state.return_value = TopicState(category_id=10, is_locked=False)
+        mock_categories_service.get_context.return_value = CategoryContext(exists=True, is_locked=False, is_private=True, access=0)
 
-        result = reply_router.create_reply(reply_text, token='mock-token')
+        result = reply_router.create_reply(reply_text, user={'user_id': 1, 'is_admin': False})
 
         self.assertIsInstance(result, Unauthorized)
         #self.assertEqual(result.content, "You have only read access.")
@@ -153,13 +147,10 @@ class RepliesRouter_Should(unittest.TestCase):
         reply_text = ReplyText(text="mock text", topic_id=1)
 
         # Simulate topic exists but is locked
-        mock_topics_service.get_by_id.return_value = True
-        mock_topics_service.check_category.return_value = 10
-        mock_categories_service.check_if_locked.return_value = False
-        mock_users_service.authenticate_user.return_value = {'user_id': 1, 'is_admin': False}
-        mock_topics_service.check_if_locked.return_value = True
+        mock_topics_service.get_state.return_value = TopicState(category_id=10, is_locked=True)
+        mock_categories_service.get_context.return_value = CategoryContext(exists=True, is_locked=False)
 
-        result = reply_router.create_reply(reply_text, token='mock-token')
+        result = reply_router.create_reply(reply_text, user={'user_id': 1, 'is_admin': False})
 
         self.assertIsInstance(result, Unauthorized)
         #self.assertEqual(result.content, "This topic is locked.")
@@ -168,13 +159,10 @@ class RepliesRouter_Should(unittest.TestCase):
         reply_text = ReplyText(text="", topic_id=1)
 
         # Mock topic existence check
-        mock_topics_service.get_by_id.return_value = True
-        mock_topics_service.check_category.return_value = 10
-        mock_categories_service.check_if_locked.return_value = False
-        mock_users_service.authenticate_user.return_value = {'user_id': 1, 'is_admin': False}
-        mock_topics_service.check_if_locked.return_value = False
+        mock_topics_service.get_state.return_value = TopicState(category_id=10, is_locked=False)
+        mock_categories_service.get_context.return_value = CategoryContext(exists=True, is_locked=False)
 
-        result = reply_router.create_reply(reply_text, token='mock-token')
+        result = reply_router.create_reply(reply_text, user={'user_id': 1, 'is_admin': False})
 
         self.assertIsInstance(result, BadRequest)
         #self.assertEqual(result.content, "Reply text cannot be empty.")
@@ -183,13 +171,10 @@ class RepliesRouter_Should(unittest.TestCase):
         reply_text = ReplyText(text="x" * 201, topic_id=1)
 
         # Mock topic existence check
-        mock_topics_service.get_by_id.return_value = True
-        mock_topics_service.check_category.return_value = 10
-        mock_categories_service.check_if_locked.return_value = False
-        mock_users_service.authenticate_user.return_value = {'user_id': 1, 'is_admin': False}
-        mock_topics_service.check_if_locked.return_value = False
+        mock_topics_service.get_state.return_value = TopicState(category_id=10, is_locked=False)
+        mock_categories_service.get_context.return_value = CategoryContext(exists=True, is_locked=False)
 
-        result = reply_router.create_reply(reply_text, token='mock-token')
+        result = reply_router.create_reply(reply_text, user={'user_id': 1, 'is_admin': False})
 
         self.assertIsInstance(result, BadRequest)
         #self.assertEqual(result.content, "Reply text cannot be more than 200 characters.")
@@ -198,12 +183,8 @@ class RepliesRouter_Should(unittest.TestCase):
         reply_text = ReplyText(text="mock text", topic_id=1)
 
         # Simulate topic and category being accessible
-        mock_topics_service.get_by_id.return_value = True
-        mock_topics_service.check_category.return_value = 10
-        mock_categories_service.check_if_locked.return_value = False
-        mock_topics_service.check_if_locked.return_value = False
-        mock_users_service.authenticate_user.return_value = {'user_id': 1, 'is_admin': False}
-        mock_categories_service.check_if_private.return_value = False
+        mock_topics_service.get_state.return_value = TopicState(category_id=10, is_locked=False)
+        mock_categories_service.get_context.return_value = CategoryContext(exists=True, is_locked=False, is_private=False)
 
         # Simulate reply creation returning a response
         mock_replies_service.create.return_value = ReplyResponse(
@@ -213,7 +194,7 @@ class RepliesRouter_Should(unittest.TestCase):
             reply_text='mock text'
         )
 
-        result = reply_router.create_reply(reply_text, token='mock-token')
+        result = reply_router.create_reply(reply_text, user={'user_id': 1, 'is_admin': False})
 
         self.assertIsInstance(result, ReplyResponse)
         self.assertEqual(result.reply_text, "mock text")
@@ -0,0 +1,54 @@
+import importlib
+import unittest
+from unittest.mock import patch
+from data import schema
+from data.schema import IndexRequirement
+
+
+class Schema_Should(unittest.TestCase):
+
+    def test_missingIndexes_acceptsIndexWithRequiredLeadingColumns(self):
+        requirement = IndexRequirement('messages', ('sender_id', 'receiver_id'), 'messages_service.all_messages')
+        indexes = {'messages': [(('sender_id', 'receiver_id', 'message_date'), False)]}
+
+        self.assertEqual(schema.missing_indexes([requirement], indexes), [])
+
+    def test_missingIndexes_reportsIndexWithWrongColumnOrder(self):
+        requirement = IndexRequirement('messages', ('sender_id', 'receiver_id'), 'messages_service.all_messages')
+        indexes = {'messages': [(('receiver_id', 'sender_id'), False)]}
+
+        self.assertEqual(schema.missing_indexes([requirement], indexes), [requirement])
+
+    def test_missingIndexes_requiresFulltextIndexForFulltextRequirement(self):
+        requirement = IndexRequirement('topics', ('top_name',), 'topics_service.get_topics', fulltext=True)
+        indexes = {'topics': [(('top_name',), False)]}
+
+        self.assertEqual(schema.missing_indexes([requirement], indexes), [requirement])
+
+    @patch('data.schema.read_query')
+    def test_existingIndexes_groupsColumnsByIndex(self, mock_read_query):
+        mock_read_query.return_value = [('votes', 'PRIMARY', 'user_id', 'BTREE'),
+                                        ('votes', 'PRIMARY', 'reply_id', 'BTREE'),
+                                        ('topics', 'ft_topics_top_name', 'top_name', 'FULLTEXT')]
+
+        result = schema.existing_indexes()
+
+        self.assertEqual(result, {'votes': [(('user_id', 'reply_id'), False)],
+                                  'topics': [(('top_name',), True)]})
+
+    def test_requiredIndexes_pointAtExistingServiceFunctions(self):
+        for requirement in schema.REQUIRED_INDEXES:
+            for used_by in requirement.used_by.split(', '):
+                module_name, function_name = used_by.split('.')
+                module = importlib.import_module(f'services.{module_name}')
+
+                self.assertTrue(hasattr(module, function_name), used_by)
+
+    def test_requiredIndexes_areListedOnce(self):
+        keys = [(r.table, r.columns, r.fulltext) for r in schema.REQUIRED_INDEXES]
+
+        self.assertEqual(len(keys), len(set(keys)))
+
+
+if __name__ == '__main__':
+    unittest.main()
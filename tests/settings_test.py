@@ -0,0 +1,78 @@
+import os
+import unittest
+from unittest.mock import patch
+from common import settings
+
+
+fake_credentials = {'user': 'file_user',
+                    'password': 'file_pass',
+                    'host': 'file_host',
+                    'port': 3307,
+                    'database': 'file_db'}
+
+
+@patch('common.settings.load_dotenv')
+@patch('common.settings.credentials_reader', return_value=fake_credentials)
+class SettingsShould(unittest.TestCase):
+
+    def tearDown(self):
+        settings._settings = None
+
+    @patch.dict(os.environ, {}, clear=True)
+    def test_loadSettings_usesCredentialsFile(self, mock_credentials_reader, mock_load_dotenv):
+        result = settings.load_settings()
+
+        self.assertEqual(result.db_user, 'file_user')
+        self.assertEqual(result.db_port, 3307)
+        self.assertEqual(result.db_name, 'file_db')
+        self.assertEqual(result.db_pool_max_size, 10)
+        self.assertIsNone(result.jwt_secret_key)
+
+    @patch.dict(os.environ, {'DB_HOST': 'env_host', 'DB_PORT': '3308', 'DB_POOL_MAX_SIZE': '25',
+                             'JWT_SECRET_KEY': 'secret'}, clear=True)
+    def test_loadSettings_prefersEnvironment(self, mock_credentials_reader, mock_load_dotenv):
+        result = settings.load_settings()
+
+        self.assertEqual(result.db_host, 'env_host')
+        self.assertEqual(result.db_port, 3308)
+        self.assertEqual(result.db_pool_max_size, 25)
+        self.assertEqual(result.jwt_secret_key, 'secret')
+
+    @patch.dict(os.environ, {'PASSWORD_HASHING_WORKERS': '8', 'PASSWORD_HASHING_QUEUE_SIZE': '32'}, clear=True)
+    def test_loadSettings_rejectsHashingLimitsAboveHalfTheRequestThreads(self, mock_credentials_reader,
+                                                                          mock_load_dotenv):
+        with self.assertRaises(ValueError):
+            settings.load_settings()
+
+    @patch.dict(os.environ, {'PASSWORD_HASHING_WORKERS': '8', 'PASSWORD_HASHING_QUEUE_SIZE': '32',
+                             'REQUEST_THREADS': '80'}, clear=True)
+    def test_loadSettings_acceptsHashingLimitsWithEnoughRequestThreads(self, mock_credentials_reader,
+                                                                        mock_load_dotenv):
+        result = settings.load_settings()
+
+        self.assertEqual(result.request_threads, 80)
+
+    def test_getSettings_readsCredentialsOnce(self, mock_credentials_reader, mock_load_dotenv):
+        settings._settings = None
+
+        first = settings.get_settings()
+        second = settings.get_settings()
+
+        self.assertIs(first, second)
+        mock_credentials_reader.assert_called_once()
+
+    def test_reloadSettings_replacesCurrentSettings(self, mock_credentials_reader, mock_load_dotenv):
+        settings._settings = None
+        first = settings.get_settings()
+
+        with patch.dict(os.environ, {'JWT_SECRET_KEY': 'rotated'}):
+            reloaded = settings.reload_settings()
+
+        self.assertIsNot(first, reloaded)
+        self.assertIs(settings.get_settings(), reloaded)
+        self.assertEqual(reloaded.jwt_secret_key, 'rotated')
+        mock_load_dotenv.assert_called_with(override=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
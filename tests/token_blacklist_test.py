@@ -0,0 +1,54 @@
+import unittest
+from common.token_blacklist import TokenBlacklist, token_hash
+
+
+class TokenBlacklist_Should(unittest.TestCase):
+
+    def test_tokenHash_isSha256Digest(self):
+        self.assertEqual(len(token_hash('a.b.c')), 32)
+        self.assertEqual(token_hash('a.b.c'), token_hash('a.b.c'))
+        self.assertNotEqual(token_hash('a.b.c'), token_hash('a.b.d'))
+
+    def test_contains_addedHash(self):
+        blacklist = TokenBlacklist()
+
+        blacklist.add(token_hash('a.b.c'), 100.0)
+
+        self.assertIn(token_hash('a.b.c'), blacklist)
+        self.assertNotIn(token_hash('x.y.z'), blacklist)
+
+    def test_purgeExpired_keepsUnexpiredAndUnknownExpiry(self):
+        blacklist = TokenBlacklist()
+        blacklist.add(b'expired', 100.0)
+        blacklist.add(b'valid', 300.0)
+        blacklist.add(b'unknown', None)
+
+        removed = blacklist.purge_expired(now=200.0)
+
+        self.assertEqual(removed, 1)
+        self.assertNotIn(b'expired', blacklist)
+        self.assertIn(b'valid', blacklist)
+        self.assertIn(b'unknown', blacklist)
+
+    def test_update_onlyMovesWatermarkForward(self):
+        blacklist = TokenBlacklist()
+        blacklist.replace({}, synced_until=10)
+
+        blacklist.update({b'a': None}, synced_until=20)
+        blacklist.update({b'b': None}, synced_until=15)
+        blacklist.update({}, synced_until=None)
+
+        self.assertEqual(blacklist.synced_until, 20)
+        self.assertEqual(len(blacklist), 2)
+
+    def test_replace_marksLoaded(self):
+        blacklist = TokenBlacklist()
+
+        blacklist.replace({b'a': None}, synced_until=5)
+
+        self.assertTrue(blacklist.loaded)
+        self.assertEqual(blacklist.synced_until, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
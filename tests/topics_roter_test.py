@@ -1,9 +1,12 @@
+import asyncio
 import unittest
 from unittest.mock import Mock, patch
 from fastapi.exceptions import HTTPException
 from common.responses import BadRequest, Unauthorized, NotFound, Forbidden
 from routers import topics
-from data.models import TopicResponse, CategoryResponse, TopicCreation
+from data.models import TopicResponse, CategoryResponse, TopicCreation, ReplyPage
+from services.categories_service import CategoryContext
+from services.topics_service import TopicState
 
 
 mock_topics_service = Mock(spec='services.topics_service')
@@ -56,18 +59,61 @@ class TestTopicsRouter(unittest.TestCase):
     #
     #         self.assertEqual(result, [test_topic])
 
-    def test_get_topic_by_id(self):
-        with patch('routers.topics.authenticate_user') as authenticate_user:
-            authenticate_user.return_value = {'user_id': 1}
-            test_topic = fake_topic()
-            mock_topics_service.check_category = lambda id: 1
-            mock_topics_service.check_if_private = lambda id: False
-            mock_topics_service.exists = lambda id: True
-            mock_topics_service.get_by_id = lambda id: test_topic
+    @patch('routers.topics.categories_service.get_context')
+    def test_get_topic_by_id(self, mock_context):
+        user = {'user_id': 1, 'is_admin': False}
+        test_topic = fake_topic()
+        mock_topics_service.get_state = lambda id: TopicState(category_id=1, is_locked=False)
+        mock_context.return_value = CategoryContext(exists=True)
+        mock_topics_service.get_by_id = Mock(return_value=test_topic)
 
-            result = topics.get_topic_by_id(1, 'token')
+        result = asyncio.run(topics.get_topic_by_id(1, user, 'replies', 20, None))
 
-            self.assertEqual(result, test_topic)
+        self.assertEqual(result, test_topic)
+        mock_topics_service.get_by_id.assert_called_once_with(1, 20, None)
+
+    @patch('routers.topics.categories_service.get_context')
+    def test_get_topic_by_id_without_replies(self, mock_context):
+        user = {'user_id': 1, 'is_admin': False}
+        mock_topics_service.get_state = lambda id: TopicState(category_id=1, is_locked=False)
+        mock_context.return_value = CategoryContext(exists=True)
+        mock_topics_service.get_by_id = Mock(return_value=fake_topic())
+
+        asyncio.run(topics.get_topic_by_id(1, user, 'none', 20, None))
+
+        mock_topics_service.get_by_id.assert_called_once_with(1, 0, None)
+
+    def test_get_topic_by_id_topic_not_found(self):
+        user = {'user_id': 1, 'is_admin': False}
+        mock_topics_service.get_state = lambda id: None
+
+        result = asyncio.run(topics.get_topic_by_id(1, user, 'replies', 20, None))
+
+        self.assertEqual(result.status_code, 404)
+
+    @patch('routers.topics.categories_service.get_context')
+    def test_get_topic_replies(self, mock_context):
+        user = {'user_id': 1, 'is_admin': False}
+        mock_topics_service.get_state = lambda id: TopicState(category_id=1, is_locked=False)
+        mock_context.return_value = CategoryContext(exists=True)
+        mock_topics_service.get_replies = Mock(return_value=([], 'next'))
+
+        result = asyncio.run(topics.get_topic_replies(1, user, 20, None, 'score'))
+
+        self.assertEqual(result, ReplyPage(replies=[], next_cursor='next'))
+        mock_topics_service.get_replies.assert_called_once_with(1, 20, None, 'score')
+
+    @patch('routers.topics.categories_service.get_context')
+    def test_get_topic_replies_private_category(self, mock_context):
+        user = {'user_id': 1, 'is_admin': False}
+        mock_topics_service.get_state = lambda id: TopicState(category_id=1, is_locked=False)
+        mock_context.return_value = CategoryContext(exists=True, is_private=True, access=None)
+        mock_topics_service.get_replies = Mock()
+
+        result = asyncio.run(topics.get_topic_replies(1, user, 20, None, 'date'))
+
+        self.assertEqual(result.status_code, 401)
+        mock_topics_service.get_replies.assert_not_called()
 
     # def test_create_topic(self):
     #     with patch('routers.topics.authenticate_user') as authenticate_user:
@@ -114,119 +160,108 @@ class TestTopicsRouter(unittest.TestCase):
             # self.assertEqual(result.status_code, 403)
 
     def test_lock_topic(self):
-        with patch('routers.topics.authenticate_user') as authenticate_user:
-            authenticate_user.return_value = {'user_id': 1, 'is_admin': True}
-            mock_topics_service.exists = lambda id: True
-            mock_topics_service.lock = lambda id: True
+        user = {'user_id': 1, 'is_admin': True}
+        mock_topics_service.exists = lambda id: True
+        mock_topics_service.lock = lambda id: True
 
-            result = topics.lock_topic(1, 'token')
+        result = topics.lock_topic(1, user)
 
-            self.assertEqual(result, True)
+        self.assertEqual(result, True)
 
     def test_lock_topic_not_admin(self):
-        with patch('routers.topics.authenticate_user') as authenticate_user:
-            authenticate_user.return_value = {'user_id': 1, 'is_admin': False}
-            mock_topics_service.exists = lambda id: True
-            mock_topics_service.lock = lambda id: True
+        user = {'user_id': 1, 'is_admin': False}
+        mock_topics_service.exists = lambda id: True
+        mock_topics_service.lock = lambda id: True
 
-            result = topics.lock_topic(1, 'token')
+        result = topics.lock_topic(1, user)
 
-            self.assertEqual(result.status_code, 403)
+        self.assertEqual(result.status_code, 403)
 
     def test_lock_topic_not_found(self):
-        with patch('routers.topics.authenticate_user') as authenticate_user:
-            authenticate_user.return_value = {'user_id': 1, 'is_admin': True}
-            mock_topics_service.exists = lambda id: False
-            mock_topics_service.lock = lambda id: True
+        user = {'user_id': 1, 'is_admin': True}
+        mock_topics_service.exists = lambda id: False
+        mock_topics_service.lock = lambda id: True
 
-            result = topics.lock_topic(1, 'token')
+        result = topics.lock_topic(1, user)
 
-            self.assertEqual(result.status_code, 404)
+        self.assertEqual(result.status_code, 404)
 
     def test_unlock_topic(self):
-        with patch('routers.topics.authenticate_user') as authenticate_user:
-            authenticate_user.return_value = {'user_id': 1, 'is_admin': True}
-            mock_topics_service.exists = lambda id: True
-            mock_topics_service.unlock = lambda id: True
+        user = {'user_id': 1, 'is_admin': True}
+        mock_topics_service.exists = lambda id: True
+        mock_topics_service.unlock = lambda id: True
 
-            result = topics.unlock_topic(1, 'token')
+        result = topics.unlock_topic(1, user)
 
-            self.assertEqual(result, True)
+        self.assertEqual(result, True)
 
     def test_unlock_topic_not_admin(self):
-        with patch('routers.topics.authenticate_user') as authenticate_user:
-            authenticate_user.return_value = {'user_id': 1, 'is_admin': False}
-            mock_topics_service.exists = lambda id: True
-            mock_topics_service.unlock = lambda id: True
+        user = {'user_id': 1, 'is_admin': False}
+        mock_topics_service.exists = lambda id: True
+        mock_topics_service.unlock = lambda id: True
 
-            result = topics.unlock_topic(1, 'token')
+        result = topics.unlock_topic(1, user)
 
-            self.assertEqual(result.status_code, 403)
+        self.assertEqual(result.status_code, 403)
 
     def test_unlock_topic_not_found(self):
-        with patch('routers.topics.authenticate_user') as authenticate_user:
-            authenticate_user.return_value = {'user_id': 1, 'is_admin': True}
-            mock_topics_service.exists = lambda id: False
-            mock_topics_service.unlock = lambda id: True
+        user = {'user_id': 1, 'is_admin': True}
+        mock_topics_service.exists = lambda id: False
+        mock_topics_service.unlock = lambda id: True
 
-            result = topics.unlock_topic(1, 'token')
+        result = topics.unlock_topic(1, user)
 
-            self.assertEqual(result.status_code, 404)
+        self.assertEqual(result.status_code, 404)
 
     def test_choose_best_reply(self):
-        with patch('routers.topics.authenticate_user') as authenticate_user:
-            authenticate_user.return_value = {'user_id': 1}
-            mock_topics_service.exists = lambda id: True
-            mock_replies_service.reply_exists = lambda id: True
-            mock_topics_service.is_owner = lambda user_id, topic_id: True
-            mock_topics_service.reply_belongs_to_topic = lambda reply_id, topic_id: True
-            mock_topics_service.make_best_reply = lambda topic_id, reply_id: True
+        user = {'user_id': 1}
+        mock_topics_service.exists = lambda id: True
+        mock_replies_service.reply_exists = lambda id: True
+        mock_topics_service.is_owner = lambda user_id, topic_id: True
+        mock_topics_service.reply_belongs_to_topic = lambda reply_id, topic_id: True
+        mock_topics_service.make_best_reply = lambda topic_id, reply_id: True
 
-            result = topics.choose_best_reply(1, 1, 'token')
+        result = topics.choose_best_reply(1, 1, user)
 
-            self.assertEqual(result, True)
+        self.assertEqual(result, True)
 
     def test_choose_best_reply_topic_not_found(self):
-        with patch('routers.topics.authenticate_user') as authenticate_user:
-            authenticate_user.return_value = {'user_id': 1}
-            mock_topics_service.exists = lambda id: False
+        user = {'user_id': 1}
+        mock_topics_service.exists = lambda id: False
 
-            result = topics.choose_best_reply(1, 1, 'token')
+        result = topics.choose_best_reply(1, 1, user)
 
-            self.assertEqual(result.status_code, 404)
+        self.assertEqual(result.status_code, 404)
 
     def test_choose_best_reply_reply_not_found(self):
-        with patch('routers.topics.authenticate_user') as authenticate_user:
-            authenticate_user.return_value = {'user_id': 1}
-            mock_topics_service.exists = lambda id: True
-            mock_replies_service.reply_exists = lambda id: False
+        user = {'user_id': 1}
+        mock_topics_service.exists = lambda id: True
+        mock_replies_service.reply_exists = lambda id: False
 
-            result = topics.choose_best_reply(1, 1, 'token')
+        result = topics.choose_best_reply(1, 1, user)
 
-            self.assertEqual(result.status_code, 404)
+        self.assertEqual(result.status_code, 404)
 
     def test_choose_best_reply_not_owner(self):
-        with patch('routers.topics.authenticate_user') as authenticate_user:
-            authenticate_user.return_value = {'user_id': 1}
-            mock_topics_service.exists = lambda id: True
-            mock_replies_service.reply_exists = lambda id: True
-            mock_topics_service.is_owner = lambda user_id, topic_id: False
+        user = {'user_id': 1}
+        mock_topics_service.exists = lambda id: True
+        mock_replies_service.reply_exists = lambda id: True
+        mock_topics_service.is_owner = lambda user_id, topic_id: False
 
-            result = topics.choose_best_reply(1, 1, 'token')
+        result = topics.choose_best_reply(1, 1, user)
 
-            self.assertEqual(result.status_code, 403)
+        self.assertEqual(result.status_code, 403)
 
     def test_choose_best_reply_reply_not_belongs_to_topic(self):
-        with patch('routers.topics.authenticate_user') as authenticate_user:
-            authenticate_user.return_value = {'user_id': 1}
-            mock_topics_service.exists = lambda id: True
-            mock_replies_service.reply_exists = lambda id: True
-            mock_topics_service.is_owner = lambda user_id, topic_id: True
-            mock_topics_service.reply_belongs_to_topic = lambda reply_id, topic_id: False
+        user = {'user_id': 1}
+        mock_topics_service.exists = lambda id: True
+        mock_replies_service.reply_exists = lambda id: True
+        mock_topics_service.is_owner = lambda user_id, topic_id: True
+        mock_topics_service.reply_belongs_to_topic = lambda reply_id, topic_id: False
 
-            result = topics.choose_best_reply(1, 1, 'token')
+        result = topics.choose_best_reply(1, 1, user)
 
-            self.assertEqual(result.status_code, 400)
+        self.assertEqual(result.status_code, 400)
 
 
 if __name__ == '__main__':
@@ -1,30 +1,37 @@
+import math
 import unittest
 from unittest.mock import patch, Mock
 from datetime import datetime
 from common.responses import BadRequest
+from common.settings import Settings
 from data.models import CategoryResponse, TopicResponse, Topic, Reply, ReplyResponse
 from services import categories_service, topics_service
 from fastapi.exceptions import HTTPException
 
 
-@patch('services.topics_service.read_query', autospec=True)
-class TopicsServiceShould(unittest.TestCase):
+def fake_settings():
+    return Settings(db_user='root', db_password='root', db_host='localhost', db_port=3306, db_name='forum_3',
+                    hot_half_life=3600.0)
 
-    def test_view_replies(self, mock_read_query):
-        mock_read_query.return_value = [(1, '2024-11-08 18:19:15', 'Reply')]
 
-        result = topics_service.view_replies(1)
+def sql_exponent(params, at):
+    # The exponent hot_update computes in SQL when given the time of the event
+    log_weight, epoch, rate = params[:3]
+    return log_weight + (at - epoch) * rate
 
-        self.assertEqual(result, [ReplyResponse(
-            user_id=1,
-            reply_date=datetime(2024, 11, 8, 18, 19, 15),
-            reply_text='Reply'
-        )])
+
+def logaddexp(a, b):
+    # What the assignment built by hot_update computes in SQL
+    return max(a, b) + math.log(1 + math.exp(-abs(a - b)))
+
+
+@patch('services.topics_service.read_query', autospec=True)
+class TopicsServiceShould(unittest.TestCase):
 
     def test_get_by_id(self, mock_read_query):
-        mock_read_query.side_effect = [[(1, 'Topic', 1, '2024-11-08 18:19:15', 0, 0)], [(1, '2024-11-08 18:19:15', 'Reply')]]
+        mock_read_query.side_effect = [[(1, 'Topic', 1, '2024-11-08 18:19:15', 0, 0, 0, '2024-11-08 18:19:15', 0, 0.0)], [(7, 1, '2024-11-08 18:19:15', 'Reply')]]
 
-        result = topics_service.get_by_id(1)
+        result = topics_service.get_by_id(1, 10)
 
         self.assertEqual(result, TopicResponse(
             top_name='Topic',
@@ -32,19 +39,20 @@ class TopicsServiceShould(unittest.TestCase):
             topic_date='2024-11-08 18:19:15',
             is_locked=0,
             best_reply_id=0,
+            last_activity='2024-11-08 18:19:15',
             replies=[ReplyResponse(user_id=1, reply_date=datetime(2024, 11, 8, 18, 19, 15), reply_text='Reply')]
         ))
 
     def test_get_by_id_when_topic_does_not_exist(self, mock_read_query):
         mock_read_query.return_value = []
 
-        result = topics_service.get_by_id(1)
+        result = topics_service.get_by_id(1, 10)
         self.assertIsNone(result)
 
     def test_get_by_id_when_topic_has_no_replies(self, mock_read_query):
-        mock_read_query.side_effect = [[(1, 'Topic', 1, '2024-11-08 18:19:15', 0, 0)], []]
+        mock_read_query.side_effect = [[(1, 'Topic', 1, '2024-11-08 18:19:15', 0, 0, 0, '2024-11-08 18:19:15', 0, 0.0)], []]
 
-        result = topics_service.get_by_id(1)
+        result = topics_service.get_by_id(1, 10)
 
         self.assertEqual(result, TopicResponse(
             top_name='Topic',
@@ -52,13 +60,14 @@ class TopicsServiceShould(unittest.TestCase):
             topic_date='2024-11-08 18:19:15',
             is_locked=0,
             best_reply_id=0,
+            last_activity='2024-11-08 18:19:15',
             replies=[]
         ))
 
     def test_get_by_id_when_topic_has_multiple_replies(self, mock_read_query):
-        mock_read_query.side_effect = [[(1, 'Topic', 1, '2024-11-08 18:19:15', 0, 0)], [(1, '2024-11-08 18:19:15', 'Reply1'), (2, '2024-11-08 18:19:15', 'Reply2')]]
+        mock_read_query.side_effect = [[(1, 'Topic', 1, '2024-11-08 18:19:15', 0, 0, 0, '2024-11-08 18:19:15', 0, 0.0)], [(7, 1, '2024-11-08 18:19:15', 'Reply1'), (8, 2, '2024-11-08 18:19:15', 'Reply2')]]
 
-        result = topics_service.get_by_id(1)
+        result = topics_service.get_by_id(1, 10)
 
         self.assertEqual(result, TopicResponse(
             top_name='Topic',
@@ -66,10 +75,229 @@ class TopicsServiceShould(unittest.TestCase):
             topic_date='2024-11-08 18:19:15',
             is_locked=0,
             best_reply_id=0,
+            last_activity='2024-11-08 18:19:15',
             replies=[ReplyResponse(user_id=1, reply_date=datetime(2024, 11, 8, 18, 19, 15), reply_text='Reply1'),
                      ReplyResponse(user_id=2, reply_date=datetime(2024, 11, 8, 18, 19, 15), reply_text='Reply2')]
         ))
 
+    def test_get_by_id_without_replies_reads_only_the_topic(self, mock_read_query):
+        mock_read_query.return_value = [(1, 'Topic', 1, '2024-11-08 18:19:15', 0, 0, 0, '2024-11-08 18:19:15', 0, 0.0)]
+
+        result = topics_service.get_by_id(1)
+
+        self.assertIsNone(result.replies)
+        mock_read_query.assert_called_once()
+
+    def test_get_by_id_returns_cursor_of_next_replies(self, mock_read_query):
+        replies = [(id, 1, '2024-11-08 18:19:15', f'Reply{id}', 0, 0) for id in (7, 8, 9)]
+        mock_read_query.side_effect = [[(1, 'Topic', 1, '2024-11-08 18:19:15', 0, 0, 0, '2024-11-08 18:19:15', 0, 0.0)], replies]
+
+        result = topics_service.get_by_id(1, 2)
+
+        self.assertEqual(len(result.replies), 2)
+        self.assertEqual(topics_service._decode_cursor(result.replies_next_cursor, 'replies', 'date'), (None, 8))
+        self.assertEqual(mock_read_query.call_args.args[1], (1, 3))
+
+    def test_get_replies_seeks_past_cursor(self, mock_read_query):
+        mock_read_query.return_value = [(9, 1, '2024-11-08 18:19:15', 'Reply', 2, 1)]
+        cursor = topics_service._encode_cursor('replies', 'date', None, 8)
+
+        replies, next_cursor = topics_service.get_replies(1, 20, cursor)
+
+        sql, params = mock_read_query.call_args.args
+        self.assertIn('id > ?', sql)
+        self.assertNotIn('offset', sql)
+        self.assertEqual(params, (1, 8, 21))
+        self.assertEqual((replies[0].upvotes, replies[0].downvotes), (2, 1))
+        self.assertIsNone(next_cursor)
+
+    def test_get_replies_sorts_by_score(self, mock_read_query):
+        mock_read_query.return_value = [(id, 1, '2024-11-08 18:19:15', f'Reply{id}', 5 - id, 0) for id in (1, 2, 3)]
+
+        replies, next_cursor = topics_service.get_replies(1, 2, sort_by='score')
+
+        sql, params = mock_read_query.call_args.args
+        self.assertIn('order by score desc, id desc', sql)
+        self.assertEqual(params, (1, 3))
+        self.assertEqual([reply.upvotes for reply in replies], [4, 3])
+        self.assertEqual(topics_service._decode_cursor(next_cursor, 'replies', 'score'), (3, 2))
+
+    def test_get_replies_seeks_past_score_cursor(self, mock_read_query):
+        mock_read_query.return_value = []
+        cursor = topics_service._encode_cursor('replies', 'score', 3, 2)
+
+        topics_service.get_replies(1, 20, cursor, 'score')
+
+        sql, params = mock_read_query.call_args.args
+        self.assertIn('score < ? or (score = ? and id < ?)', sql)
+        self.assertEqual(params, (1, 3, 3, 2, 21))
+
+    def test_get_replies_rejects_cursor_of_other_sort(self, mock_read_query):
+        cursor = topics_service._encode_cursor('replies', 'date', None, 8)
+
+        with self.assertRaises(HTTPException):
+            topics_service.get_replies(1, 20, cursor, 'score')
+
+        mock_read_query.assert_not_called()
+
+    def test_get_replies_rejects_topic_cursor(self, mock_read_query):
+        cursor = topics_service._encode_cursor('topic_date', 'asc', '2024-11-08', 8)
+
+        with self.assertRaises(HTTPException) as context:
+            topics_service.get_replies(1, 20, cursor)
+
+        self.assertEqual(context.exception.status_code, 400)
+        mock_read_query.assert_not_called()
+
+    def test_view_replies_for_topics(self, mock_read_query):
+        mock_read_query.return_value = [(1, 7, 1, '2024-11-08 18:19:15', 'Reply1'), (1, 8, 2, '2024-11-08 18:19:15', 'Reply2')]
+
+        result = topics_service.view_replies_for_topics([1, 2], 10)
+
+        self.assertEqual(result, {1: ([ReplyResponse(user_id=1, reply_date=datetime(2024, 11, 8, 18, 19, 15), reply_text='Reply1'),
+                                       ReplyResponse(user_id=2, reply_date=datetime(2024, 11, 8, 18, 19, 15), reply_text='Reply2')],
+                                      None),
+                                  2: ([], None)})
+        mock_read_query.assert_called_once()
+        self.assertEqual(mock_read_query.call_args.args[1], (1, 11, 2, 11))
+
+    def test_view_replies_for_topics_limits_each_topic(self, mock_read_query):
+        mock_read_query.return_value = [(1, id, 1, '2024-11-08 18:19:15', f'Reply{id}', 0, 0) for id in (7, 8, 9)]
+
+        result = topics_service.view_replies_for_topics([1], 2)
+
+        replies, next_cursor = result[1]
+        self.assertEqual(len(replies), 2)
+        self.assertEqual(topics_service._decode_cursor(next_cursor, 'replies', 'date'), (None, 8))
+
+    def test_view_replies_for_topics_when_no_topics(self, mock_read_query):
+        result = topics_service.view_replies_for_topics([], 10)
+
+        self.assertEqual(result, {})
+        mock_read_query.assert_not_called()
+
+    def test_get_topics_uses_constant_number_of_queries(self, mock_read_query):
+        topic_rows = [(id, f'Topic{id}', 1, '2024-11-08 18:19:15', 0, None, 0, '2024-11-08 18:19:15', 0, 0.0, '2024-11-08 18:19:15') for id in range(1, 101)]
+        mock_read_query.side_effect = [topic_rows, [(5, 1, 1, '2024-11-08 18:19:15', 'Reply')]]
+
+        result, next_cursor = topics_service.get_topics({'user_id': 1, 'is_admin': 0}, None, 'topic_date', 'asc', 100,
+                                                        replies_limit=10)
+
+        self.assertEqual(len(result), 100)
+        self.assertEqual(len(result[4].replies), 1)
+        self.assertEqual(result[0].replies, [])
+        self.assertIsNone(next_cursor)
+        self.assertEqual(mock_read_query.call_count, 2)
+
+    def test_get_topics_embeds_no_replies_by_default(self, mock_read_query):
+        topic_rows = [(id, f'Topic{id}', 1, '2024-11-08 18:19:15', 0, None, 0, '2024-11-08 18:19:15', 0, 0.0, '2024-11-08 18:19:15') for id in range(1, 4)]
+        mock_read_query.return_value = topic_rows
+
+        result, _ = topics_service.get_topics({'user_id': 1, 'is_admin': 1}, None, 'topic_date', 'asc', 10)
+
+        self.assertTrue(all(topic.replies is None for topic in result))
+        mock_read_query.assert_called_once()
+
+    def test_get_topics_filters_private_categories_in_sql_for_non_admins(self, mock_read_query):
+        mock_read_query.return_value = []
+
+        topics_service.get_topics({'user_id': 7, 'is_admin': 0}, 'eng', 'top_name', 'desc', 10)
+
+        sql, params = mock_read_query.call_args.args
+        self.assertIn('private_cat_access', sql)
+        self.assertEqual(params, (7, '+eng*', 11))
+
+    def test_get_topics_skips_access_filter_for_admins(self, mock_read_query):
+        mock_read_query.return_value = []
+
+        topics_service.get_topics({'user_id': 1, 'is_admin': 1}, None, 'topic_date', 'asc', 10)
+
+        sql, params = mock_read_query.call_args.args
+        self.assertNotIn('private_cat_access', sql)
+        self.assertEqual(params, (11,))
+
+    def test_get_topics_searches_with_fulltext_prefix_terms(self, mock_read_query):
+        mock_read_query.return_value = []
+
+        topics_service.get_topics({'user_id': 1, 'is_admin': 1}, 'forum +api', 'topic_date', 'asc', 10)
+
+        sql, params = mock_read_query.call_args.args
+        self.assertIn('match(t.top_name) against (? in boolean mode)', sql)
+        self.assertNotIn('like', sql)
+        self.assertEqual(params, ('+forum* +api*', 11))
+
+    def test_get_topics_searches_reply_text_when_requested(self, mock_read_query):
+        mock_read_query.return_value = []
+
+        topics_service.get_topics({'user_id': 1, 'is_admin': 1}, 'api', 'topic_date', 'asc', 10, in_replies=True)
+
+        sql, params = mock_read_query.call_args.args
+        self.assertIn('match(r.reply_text) against (? in boolean mode)', sql)
+        self.assertEqual(params, ('+api*', '+api*', 11))
+
+    def test_get_topics_sorts_by_relevance(self, mock_read_query):
+        mock_read_query.return_value = []
+        cursor = topics_service._encode_cursor('relevance', 'desc', 1.5, 9)
+
+        topics_service.get_topics({'user_id': 1, 'is_admin': 1}, 'api', 'relevance', 'desc', 10, cursor)
+
+        sql, params = mock_read_query.call_args.args
+        self.assertIn('order by match(t.top_name) against (? in boolean mode) desc, t.id desc', sql)
+        self.assertEqual(params, ('+api*', '+api*', '+api*', 1.5, '+api*', 1.5, 9, '+api*', 11))
+
+    def test_get_topics_returns_nothing_when_search_has_no_words(self, mock_read_query):
+        result = topics_service.get_topics({'user_id': 1, 'is_admin': 1}, '+*', 'topic_date', 'asc', 10)
+
+        self.assertEqual(result, ([], None))
+        mock_read_query.assert_not_called()
+
+    def test_get_topics_rejects_relevance_without_search(self, mock_read_query):
+        with self.assertRaises(HTTPException) as context:
+            topics_service.get_topics({'user_id': 1, 'is_admin': 1}, None, 'relevance', 'desc', 10)
+
+        self.assertEqual(context.exception.status_code, 400)
+
+    def test_get_topics_returns_next_cursor_when_more_rows_exist(self, mock_read_query):
+        topic_rows = [(id, f'Topic{id}', 1, datetime(2024, 11, 8), 0, None, 0, datetime(2024, 11, 8), 0, 0.0, f'Topic{id}') for id in range(1, 4)]
+        mock_read_query.return_value = topic_rows
+
+        result, next_cursor = topics_service.get_topics({'user_id': 1, 'is_admin': 1}, None, 'top_name', 'asc', 2)
+
+        self.assertEqual(len(result), 2)
+        self.assertEqual(topics_service._decode_cursor(next_cursor, 'top_name', 'asc'), ('Topic2', 2))
+
+    def test_get_topics_seeks_past_cursor(self, mock_read_query):
+        mock_read_query.return_value = []
+        cursor = topics_service._encode_cursor('topic_date', 'desc', datetime(2024, 11, 8, 18, 19, 15), 42)
+
+        topics_service.get_topics({'user_id': 1, 'is_admin': 1}, None, 'topic_date', 'desc', 10, cursor)
+
+        sql, params = mock_read_query.call_args.args
+        self.assertIn('t.topic_date < ? or (t.topic_date = ? and t.id < ?)', sql)
+        self.assertNotIn('offset', sql)
+        self.assertEqual(params, ('2024-11-08 18:19:15', '2024-11-08 18:19:15', 42, 11))
+
+    def test_get_topics_sorts_by_last_activity(self, mock_read_query):
+        topic_rows = [(id, f'Topic{id}', 1, datetime(2024, 11, 8), 0, None, 3, datetime(2024, 11, 9, id), 5, 0.0,
+                       datetime(2024, 11, 9, id)) for id in (3, 2, 1)]
+        mock_read_query.return_value = topic_rows
+
+        result, next_cursor = topics_service.get_topics({'user_id': 1, 'is_admin': 1}, None, 'last_activity', 'desc', 2)
+
+        sql, _ = mock_read_query.call_args.args
+        self.assertIn('order by t.last_activity desc, t.id desc', sql)
+        self.assertEqual((result[0].reply_count, result[0].last_activity, result[0].score), (3, '2024-11-09 03:00:00', 5))
+        self.assertEqual(topics_service._decode_cursor(next_cursor, 'last_activity', 'desc'), ('2024-11-09 02:00:00', 2))
+
+    def test_get_topics_rejects_cursor_of_other_sort(self, mock_read_query):
+        cursor = topics_service._encode_cursor('top_name', 'asc', 'Topic', 1)
+
+        with self.assertRaises(HTTPException) as context:
+            topics_service.get_topics({'user_id': 1, 'is_admin': 1}, None, 'topic_date', 'asc', 10, cursor)
+
+        self.assertEqual(context.exception.status_code, 400)
+        mock_read_query.assert_not_called()
+
     def test_exists(self, mock_read_query):
         mock_read_query.return_value = [(1, 'Topic')]
 
@@ -84,12 +312,157 @@ class TopicsServiceShould(unittest.TestCase):
 
         self.assertFalse(result)
 
-    def test_check_category(self, mock_read_query):
-        mock_read_query.return_value = [(1, 'Category')]
+    def test_get_state(self, mock_read_query):
+        mock_read_query.return_value = [(3, 1)]
+
+        result = topics_service.get_state(1)
+
+        self.assertEqual(result, topics_service.TopicState(category_id=3, is_locked=True))
+        mock_read_query.assert_called_once_with('select category_id, is_locked from topics where id = ?', (1,))
+
+    def test_get_state_when_topic_does_not_exist(self, mock_read_query):
+        mock_read_query.return_value = []
+
+        result = topics_service.get_state(1)
+
+        self.assertIsNone(result)
+
+    @patch('services.topics_service.update_query')
+    def test_recompute_counters_repairs_in_batches(self, mock_update_query, mock_read_query):
+        mock_read_query.side_effect = [[(1,), (2,)], [(5,)], []]
+        mock_update_query.side_effect = [1, 0]
 
-        result = topics_service.check_category(1)
+        result = topics_service.recompute_counters(2)
 
         self.assertEqual(result, 1)
+        self.assertEqual(mock_read_query.call_args_list[1].args[1], (2, 2))
+        self.assertEqual(mock_update_query.call_args_list[0].args[1], (1, 2) * 3)
+        self.assertEqual(mock_update_query.call_args_list[1].args[1], (5, 5) * 3)
+
+    @patch('services.topics_service.get_settings')
+    def test_hot_parts_halve_per_half_life(self, mock_get_settings, mock_read_query):
+        mock_get_settings.return_value = fake_settings()
+        now = topics_service.HOT_EPOCH + 10 * 3600
+
+        fresh, _ = topics_service.hot_parts([(now, 1)])
+        older, _ = topics_service.hot_parts([(now - 3600, 1)])
+
+        self.assertAlmostEqual(fresh - older, math.log(2))
+
+    @patch('services.topics_service.get_settings')
+    def test_hot_score_returns_floor_when_downvotes_outweigh_activity(self, mock_get_settings, mock_read_query):
+        mock_get_settings.return_value = fake_settings()
+        now = topics_service.HOT_EPOCH
+
+        hot_pos, hot_neg = topics_service.hot_parts([(now, 1), (now, -2)])
+
+        self.assertEqual(topics_service.hot_score(hot_pos, hot_neg), topics_service.HOT_FLOOR)
+        self.assertGreater(hot_pos, topics_service.HOT_FLOOR)
+
+    @patch('services.topics_service.time.time')
+    @patch('services.topics_service.get_settings')
+    def test_hot_update_adds_event_in_log_space(self, mock_get_settings, mock_time, mock_read_query):
+        mock_get_settings.return_value = fake_settings()
+        created = topics_service.HOT_EPOCH + 1000
+        mock_time.return_value = created + 1800
+        current, _ = topics_service.hot_parts([(created, 1)])
+
+        sql, params = topics_service.hot_update(2)
+        updated = logaddexp(current, params[0])
+
+        self.assertEqual(sql, 'hot_pos = greatest(hot_pos, ?) + ln(1 + exp(-abs(hot_pos - ?)))')
+        self.assertAlmostEqual(updated, topics_service.hot_parts([(created, 1), (created + 1800, 2)])[0])
+
+    @patch('services.topics_service.time.time')
+    @patch('services.topics_service.get_settings')
+    def test_hot_update_adds_downvotes_to_negative_sum(self, mock_get_settings, mock_time, mock_read_query):
+        mock_get_settings.return_value = fake_settings()
+        created = topics_service.HOT_EPOCH
+        mock_time.return_value = created + 60
+
+        sql, params = topics_service.hot_update(-1, 't')
+        updated = logaddexp(topics_service.HOT_FLOOR, params[0])
+
+        self.assertEqual(sql, 't.hot_neg = greatest(t.hot_neg, ?) + ln(1 + exp(-abs(t.hot_neg - ?)))')
+        self.assertAlmostEqual(updated, topics_service.hot_parts([(created + 60, -1)])[1])
+
+    @patch('services.topics_service.time.time')
+    @patch('services.topics_service.get_settings')
+    def test_hot_update_keeps_activity_when_vote_flips_back(self, mock_get_settings, mock_time, mock_read_query):
+        mock_get_settings.return_value = fake_settings()
+        created = topics_service.HOT_EPOCH
+        hot_pos, hot_neg = topics_service.hot_parts([(created, 1), (created, 1)])
+
+        for weight in (-2, 2):
+            mock_time.return_value = created
+            _, params = topics_service.hot_update(weight)
+            if weight > 0:
+                hot_pos = logaddexp(hot_pos, params[0])
+            else:
+                hot_neg = logaddexp(hot_neg, params[0])
+
+        self.assertAlmostEqual(topics_service.hot_score(hot_pos, hot_neg),
+                               topics_service.hot_score(*topics_service.hot_parts([(created, 1), (created, 1)])))
+
+    @patch('services.topics_service.get_settings')
+    def test_hot_update_counts_event_at_given_time(self, mock_get_settings, mock_read_query):
+        mock_get_settings.return_value = fake_settings()
+        replied = topics_service.HOT_EPOCH + 5000
+
+        sql, params = topics_service.hot_update(-2, 't', 'unix_timestamp(r.reply_date)')
+
+        self.assertEqual(sql, 't.hot_neg = greatest(t.hot_neg, (? + (unix_timestamp(r.reply_date) - ?) * ?))'
+                              ' + ln(1 + exp(-abs(t.hot_neg - (? + (unix_timestamp(r.reply_date) - ?) * ?))))')
+        self.assertAlmostEqual(sql_exponent(params, replied), topics_service.hot_parts([(replied, -2)])[1])
+
+    @patch('services.topics_service.update_many')
+    @patch('services.topics_service.time.time')
+    @patch('services.topics_service.get_settings')
+    def test_incremental_hot_score_matches_recompute_after_fresh_downvote(self, mock_get_settings, mock_time,
+                                                                          mock_update_many, mock_read_query):
+        mock_get_settings.return_value = fake_settings()
+        created = topics_service.HOT_EPOCH + 1000
+        replies = [created + 60 * i for i in range(1, 11)]
+
+        hot_pos, hot_neg = topics_service.hot_parts([(created, 1)])
+        for replied in replies:
+            mock_time.return_value = replied
+            hot_pos = logaddexp(hot_pos, topics_service.hot_update(1)[1][0])
+        mock_time.return_value = created + 2 * 86400
+        _, params = topics_service.hot_update(-1, 't', 'unix_timestamp(r.reply_date)')
+        hot_neg = logaddexp(hot_neg, sql_exponent(params, replies[-1]))
+
+        mock_read_query.side_effect = [[(1, created, 10, -1)],
+                                       [(1, replied, 0, 0) for replied in replies[:-1]] + [(1, replies[-1], 0, 1)],
+                                       []]
+        topics_service.recompute_hot_scores()
+        recomputed = mock_update_many.call_args.args[1][0]
+
+        incremental = topics_service.hot_score(hot_pos, hot_neg)
+        self.assertGreater(incremental, topics_service.HOT_FLOOR)
+        self.assertAlmostEqual(incremental, topics_service.hot_score(recomputed[0], recomputed[1]))
+
+    @patch('services.topics_service.update_many')
+    @patch('services.topics_service.get_settings')
+    def test_recompute_hot_scores_skips_topics_changed_meanwhile(self, mock_get_settings, mock_update_many, mock_read_query):
+        mock_get_settings.return_value = fake_settings()
+        created = topics_service.HOT_EPOCH
+        mock_read_query.side_effect = [[(1, created, 1, 2), (2, created, 0, 0)],
+                                       [(1, created + 60, 3, 1)],
+                                       []]
+        mock_update_many.return_value = 2
+
+        result = topics_service.recompute_hot_scores(2)
+
+        self.assertEqual(result, 2)
+        sql, rows = mock_update_many.call_args.args
+        self.assertIn('reply_count = ? and score = ?', sql)
+        self.assertEqual(rows[0][2:], (1, 1, 2))
+        expected = topics_service.hot_parts([(created, 1), (created + 60, 4), (created + 60, -1)])
+        self.assertAlmostEqual(rows[0][0], expected[0])
+        self.assertAlmostEqual(rows[0][1], expected[1])
+        self.assertEqual(rows[1][:2], topics_service.hot_parts([(created, 1)]))
+        self.assertEqual(rows[1][1], topics_service.HOT_FLOOR)
 
     def test_topic_name_exists(self, mock_read_query):
         mock_read_query.return_value = [(1, 'Topic')]
@@ -3,7 +3,8 @@ from unittest.mock import Mock, patch
 from fastapi.exceptions import HTTPException
 from common.responses import BadRequest, Unauthorized, NotFound, Forbidden
 from routers import users as users_router
-from data.models import User, LoginData, UserCategoryAccess, UserAccessResponse
+from data.models import User, LoginData, UserCategoryAccess, UserAccessResponse, AccessGrant
+from services.categories_service import CategoryContext
 
 
 def fake_user():
@@ -114,422 +115,367 @@ class UsersRouter_Should(unittest.TestCase):
         self.assertEqual(result.body, b'Invalid token')
         mock_blacklist_user.assert_called_once_with(token)
 
-    @patch('routers.users.categories_service.exists')
-    def test_giveUserReadAccess_when_categoryDoesNotExist(self, mock_exists):
+    @patch('routers.users.categories_service.get_grant_context')
+    def test_giveUserReadAccess_when_categoryDoesNotExist(self, mock_context):
         # Arrange
         user_category = UserCategoryAccess(user_id=1, category_id=999)
-        token = "valid.token"
-        mock_exists.return_value = False
+        user = {'user_id': 1, 'is_admin': True}
+        mock_context.return_value = CategoryContext(exists=False)
 
         # Act
-        result = users_router.give_user_read_access(user_category, token)
+        result = users_router.give_user_read_access(user_category, user)
 
         # Assert
         self.assertIsInstance(result, NotFound)
         self.assertEqual(result.body, b'Category does not exist!')
-        mock_exists.assert_called_once_with(user_category.category_id)
+        mock_context.assert_called_once_with(user_category.category_id, user_category.user_id)
 
-    @patch('routers.users.categories_service.exists')
-    @patch('routers.users.categories_service.check_if_private')
-    @patch('routers.users.users_service.authenticate_user')
-    def test_giveUserReadAccess_when_categoryNotPrivate(self, mock_auth, mock_check_private, mock_exists):
+    @patch('routers.users.categories_service.get_grant_context')
+    def test_giveUserReadAccess_when_categoryNotPrivate(self, mock_context):
         # Arrange
         user_category = UserCategoryAccess(user_id=1, category_id=1)
-        token = 'valid_token'
-        mock_auth.return_value = {'is_admin': True}
-        mock_exists.return_value = True
-        mock_check_private.return_value = False
+        user = {'is_admin': True}
+        mock_context.return_value = CategoryContext(exists=True, is_private=False)
 
         # Act
-        result = users_router.give_user_read_access(user_category, token)
+        result = users_router.give_user_read_access(user_category, user)
 
         # Assert
         self.assertIsInstance(result, BadRequest)
         self.assertEqual(result.body, f'Category {user_category.category_id} is not private.'.encode())
-        mock_check_private.assert_called_once_with(user_category.category_id)
+        mock_context.assert_called_once_with(user_category.category_id, user_category.user_id)
 
-    @patch('routers.users.categories_service.exists')
-    @patch('routers.users.users_service.check_if_private')
-    @patch('routers.users.users_service.user_id_exists')
-    def test_giveUserReadAccess_when_userDoesNotExist(self, mock_user_exists, mock_check_private, mock_exists):
+    @patch('routers.users.categories_service.get_grant_context')
+    def test_giveUserReadAccess_when_userDoesNotExist(self, mock_context):
         # Arrange
         user_category = UserCategoryAccess(user_id=999, category_id=1)
-        token = "valid.token"
-        mock_exists.return_value = True
-        mock_check_private.return_value = True
-        mock_user_exists.return_value = False
+        user = {'user_id': 1, 'is_admin': True}
+        mock_context.return_value = CategoryContext(exists=True, is_private=True, user_exists=False)
 
         # Act
-        result = users_router.give_user_read_access(user_category, token)
+        result = users_router.give_user_read_access(user_category, user)
 
         # Assert
         self.assertIsInstance(result, NotFound)
         self.assertEqual(result.body, f'User with id {user_category.user_id} does not exist!'.encode())
-        mock_user_exists.assert_called_once_with(user_category.user_id)
+        mock_context.assert_called_once_with(user_category.category_id, user_category.user_id)
 
-    @patch('routers.users.categories_service.exists')
-    @patch('routers.users.users_service.check_if_private')
-    @patch('routers.users.users_service.user_id_exists')
-    @patch('routers.users.users_service.authenticate_user')
+    @patch('routers.users.categories_service.get_grant_context')
     @patch('routers.users.users_service.is_admin')
-    def test_giveUserReadAccess_when_notAdmin(self, mock_is_admin, mock_auth, mock_user_exists, 
-                                            mock_check_private, mock_exists):
+    def test_giveUserReadAccess_when_notAdmin(self, mock_is_admin, mock_context):
         # Arrange
         user_category = UserCategoryAccess(user_id=1, category_id=1)
-        token = "valid.token"
-        mock_exists.return_value = True
-        mock_check_private.return_value = True
-        mock_user_exists.return_value = True
-        mock_auth.return_value = {'is_admin': False}
+        user = {'is_admin': False}
+        mock_context.return_value = CategoryContext(exists=True, is_private=True)
         mock_is_admin.return_value = False
 
         # Act
-        result = users_router.give_user_read_access(user_category, token)
+        result = users_router.give_user_read_access(user_category, user)
 
         # Assert
         self.assertIsInstance(result, Forbidden)
         self.assertEqual(result.body, b'Only Neo can access this endpoint')
 
-    @patch('routers.users.categories_service.exists')
-    @patch('routers.users.users_service.check_if_private')
-    @patch('routers.users.users_service.user_id_exists')
-    @patch('routers.users.users_service.authenticate_user')
+    @patch('routers.users.categories_service.get_grant_context')
     @patch('routers.users.users_service.is_admin')
     @patch('routers.users.users_service.give_user_r_access')
-    def test_giveUserReadAccess_when_adminSuccess(self, mock_give_access, mock_is_admin, mock_auth, 
-                                                mock_user_exists, mock_check_private, mock_exists):
+    def test_giveUserReadAccess_when_adminSuccess(self, mock_give_access, mock_is_admin, mock_context):
         # Arrange
         user_category = UserCategoryAccess(user_id=1, category_id=1)
-        token = "valid.token"
-        mock_exists.return_value = True
-        mock_check_private.return_value = True
-        mock_user_exists.return_value = True
-        mock_auth.return_value = {'is_admin': True}
+        user = {'is_admin': True}
+        mock_context.return_value = CategoryContext(exists=True, is_private=True)
         mock_is_admin.return_value = True
         mock_give_access.return_value = "Read access granted"
 
         # Act
-        result = users_router.give_user_read_access(user_category, token)
+        result = users_router.give_user_read_access(user_category, user)
 
         # Assert
         self.assertEqual(result, "Read access granted")
         mock_give_access.assert_called_once_with(user_category.user_id, user_category.category_id)
 
-    @patch('routers.users.categories_service.exists')
-    def test_giveUserWriteAccess_when_categoryDoesNotExist(self, mock_exists):
+    @patch('routers.users.categories_service.get_grant_context')
+    def test_giveUserWriteAccess_when_categoryDoesNotExist(self, mock_context):
         # Arrange
         user_category = UserCategoryAccess(user_id=1, category_id=999)
-        token = "valid.token"
-        mock_exists.return_value = False
+        user = {'user_id': 1, 'is_admin': True}
+        mock_context.return_value = CategoryContext(exists=False)
 
         # Act
-        result = users_router.give_user_write_access(user_category, token)
+        result = users_router.give_user_write_access(user_category, user)
 
         # Assert
         self.assertIsInstance(result, NotFound)
         self.assertEqual(result.body, b'Category does not exist!')
-        mock_exists.assert_called_once_with(user_category.category_id)
+        mock_context.assert_called_once_with(user_category.category_id, user_category.user_id)
 
-    @patch('routers.users.categories_service.exists')
-    @patch('routers.users.categories_service.check_if_private')
-    def test_giveUserWriteAccess_when_categoryNotPrivate(self, mock_check_private, mock_exists):
+    @patch('routers.users.categories_service.get_grant_context')
+    def test_giveUserWriteAccess_when_categoryNotPrivate(self, mock_context):
         # Arrange
         user_category = UserCategoryAccess(user_id=1, category_id=1)
-        token = "valid.token"
-        mock_exists.return_value = True
-        mock_check_private.return_value = False
+        user = {'user_id': 1, 'is_admin': True}
+        mock_context.return_value = CategoryContext(exists=True, is_private=False)
 
         # Act
-        result = users_router.give_user_write_access(user_category, token)
+        result = users_router.give_user_write_access(user_category, user)
 
         # Assert
         self.assertIsInstance(result, BadRequest)
         self.assertEqual(result.body, f'Category {user_category.category_id} is not private.'.encode())
-        mock_check_private.assert_called_once_with(user_category.category_id)
+        mock_context.assert_called_once_with(user_category.category_id, user_category.user_id)
 
-    @patch('routers.users.categories_service.exists')
-    @patch('routers.users.users_service.check_if_private')
-    @patch('routers.users.users_service.user_id_exists')
-    def test_giveUserWriteAccess_when_userDoesNotExist(self, mock_user_exists, mock_check_private, mock_exists):
+    @patch('routers.users.categories_service.get_grant_context')
+    def test_giveUserWriteAccess_when_userDoesNotExist(self, mock_context):
         # Arrange
         user_category = UserCategoryAccess(user_id=999, category_id=1)
-        token = "valid.token"
-        mock_exists.return_value = True
-        mock_check_private.return_value = True
-        mock_user_exists.return_value = False
+        user = {'user_id': 1, 'is_admin': True}
+        mock_context.return_value = CategoryContext(exists=True, is_private=True, user_exists=False)
 
         # Act
-        result = users_router.give_user_write_access(user_category, token)
+        result = users_router.give_user_write_access(user_category, user)
 
         # Assert
         self.assertIsInstance(result, NotFound)
         self.assertEqual(result.body, f'User with id {user_category.user_id} does not exist!'.encode())
-        mock_user_exists.assert_called_once_with(user_category.user_id)
+        mock_context.assert_called_once_with(user_category.category_id, user_category.user_id)
 
-    @patch('routers.users.categories_service.exists')
-    @patch('routers.users.users_service.check_if_private')
-    @patch('routers.users.users_service.user_id_exists')
-    @patch('routers.users.users_service.authenticate_user')
+    @patch('routers.users.categories_service.get_grant_context')
     @patch('routers.users.users_service.is_admin')
-    def test_giveUserWriteAccess_when_notAdmin(self, mock_is_admin, mock_auth, mock_user_exists, 
-                                            mock_check_private, mock_exists):
+    def test_giveUserWriteAccess_when_notAdmin(self, mock_is_admin, mock_context):
         # Arrange
         user_category = UserCategoryAccess(user_id=1, category_id=1)
-        token = "valid.token"
-        mock_exists.return_value = True
-        mock_check_private.return_value = True
-        mock_user_exists.return_value = True
-        mock_auth.return_value = {'is_admin': False}
+        user = {'is_admin': False}
+        mock_context.return_value = CategoryContext(exists=True, is_private=True)
         mock_is_admin.return_value = False
 
         # Act
-        result = users_router.give_user_write_access(user_category, token)
+        result = users_router.give_user_write_access(user_category, user)
 
         # Assert
         self.assertIsInstance(result, Forbidden)
         self.assertEqual(result.body, b'Only Neo can access this endpoint')
 
-    @patch('routers.users.categories_service.exists')
-    @patch('routers.users.users_service.check_if_private')
-    @patch('routers.users.users_service.user_id_exists')
-    @patch('routers.users.users_service.authenticate_user')
+    @patch('routers.users.categories_service.get_grant_context')
     @patch('routers.users.users_service.is_admin')
     @patch('routers.users.users_service.give_user_w_access')
-    def test_giveUserWriteAccess_when_adminSuccess(self, mock_give_access, mock_is_admin, mock_auth, 
-                                                mock_user_exists, mock_check_private, mock_exists):
+    def test_giveUserWriteAccess_when_adminSuccess(self, mock_give_access, mock_is_admin, mock_context):
         # Arrange
         user_category = UserCategoryAccess(user_id=1, category_id=1)
-        token = "valid.token"
-        mock_exists.return_value = True
-        mock_check_private.return_value = True
-        mock_user_exists.return_value = True
-        mock_auth.return_value = {'is_admin': True}
+        user = {'is_admin': True}
+        mock_context.return_value = CategoryContext(exists=True, is_private=True)
         mock_is_admin.return_value = True
         mock_give_access.return_value = "Write access granted"
 
         # Act
-        result = users_router.give_user_write_access(user_category, token)
+        result = users_router.give_user_write_access(user_category, user)
 
         # Assert
         self.assertEqual(result, "Write access granted")
         mock_give_access.assert_called_once_with(user_category.user_id, user_category.category_id)
 
-    @patch('routers.users.categories_service.exists')
-    @patch('routers.users.users_service.check_if_private')
-    @patch('routers.users.users_service.user_id_exists')
-    @patch('routers.users.users_service.authenticate_user')
+    @patch('routers.users.categories_service.get_grant_context')
     @patch('routers.users.users_service.is_admin')
     @patch('routers.users.users_service.give_user_w_access')
-    def test_giveUserWriteAccess_when_userAlreadyHasAccess(self, mock_give_access, mock_is_admin, 
-                                                        mock_auth, mock_user_exists, mock_check_private, mock_exists):
+    def test_giveUserWriteAccess_when_userAlreadyHasAccess(self, mock_give_access, mock_is_admin, mock_context):
         # Arrange
         user_category = UserCategoryAccess(user_id=1, category_id=1)
-        token = "valid.token"
-        mock_exists.return_value = True
-        mock_check_private.return_value = True
-        mock_user_exists.return_value = True
-        mock_auth.return_value = {'is_admin': True}
+        user = {'is_admin': True}
+        mock_context.return_value = CategoryContext(exists=True, is_private=True)
         mock_is_admin.return_value = True
         mock_give_access.return_value = None
 
         # Act
-        result = users_router.give_user_write_access(user_category, token)
+        result = users_router.give_user_write_access(user_category, user)
 
         # Assert
         self.assertIsInstance(result, BadRequest)
         self.assertEqual(result.body, 
             f'User with id {user_category.user_id} already has write access for category with id {user_category.category_id}!'.encode())
         
-    @patch('routers.users.categories_service.exists')
-    def test_revokeUserAccess_when_categoryDoesNotExist(self, mock_exists):
+    @patch('routers.users.categories_service.get_grant_context')
+    def test_revokeUserAccess_when_categoryDoesNotExist(self, mock_context):
         # Arrange
         user_category = UserCategoryAccess(user_id=1, category_id=999)
-        token = "valid.token"
-        mock_exists.return_value = False
+        user = {'user_id': 1, 'is_admin': True}
+        mock_context.return_value = CategoryContext(exists=False)
 
         # Act
-        result = users_router.revoke_user_access(token, user_category)
+        result = users_router.revoke_user_access(user, user_category)
 
         # Assert
         self.assertIsInstance(result, NotFound)
         self.assertEqual(result.body, b'Category does not exist!')
-        mock_exists.assert_called_once_with(user_category.category_id)
+        mock_context.assert_called_once_with(user_category.category_id, user_category.user_id)
 
-    @patch('routers.users.categories_service.exists')
-    @patch('routers.users.users_service.check_if_private')
-    def test_revokeUserAccess_when_categoryNotPrivate(self, mock_check_private, mock_exists):
+    @patch('routers.users.categories_service.get_grant_context')
+    def test_revokeUserAccess_when_categoryNotPrivate(self, mock_context):
         # Arrange
         user_category = UserCategoryAccess(user_id=1, category_id=1)
-        token = "valid.token"
-        mock_exists.return_value = True
-        mock_check_private.return_value = False
+        user = {'user_id': 1, 'is_admin': True}
+        mock_context.return_value = CategoryContext(exists=True, is_private=False)
 
         # Act
-        result = users_router.revoke_user_access(token, user_category)
+        result = users_router.revoke_user_access(user, user_category)
 
         # Assert
         self.assertIsInstance(result, BadRequest)
         self.assertEqual(result.body, f'Category {user_category.category_id} is not private.'.encode())
-        mock_check_private.assert_called_once_with(user_category.category_id)
+        mock_context.assert_called_once_with(user_category.category_id, user_category.user_id)
 
-    @patch('routers.users.categories_service.exists')
-    @patch('routers.users.users_service.check_if_private')
-    @patch('routers.users.users_service.user_id_exists')
-    def test_revokeUserAccess_when_userDoesNotExist(self, mock_user_exists, mock_check_private, mock_exists):
+    @patch('routers.users.categories_service.get_grant_context')
+    def test_revokeUserAccess_when_userDoesNotExist(self, mock_context):
         # Arrange
         user_category = UserCategoryAccess(user_id=999, category_id=1)
-        token = "valid.token"
-        mock_exists.return_value = True
-        mock_check_private.return_value = True
-        mock_user_exists.return_value = False
+        user = {'user_id': 1, 'is_admin': True}
+        mock_context.return_value = CategoryContext(exists=True, is_private=True, user_exists=False)
 
         # Act
-        result = users_router.revoke_user_access(token, user_category)
+        result = users_router.revoke_user_access(user, user_category)
 
         # Assert
         self.assertIsInstance(result, NotFound)
         self.assertEqual(result.body, f'User with id {user_category.user_id} does not exist!'.encode())
-        mock_user_exists.assert_called_once_with(user_category.user_id)
+        mock_context.assert_called_once_with(user_category.category_id, user_category.user_id)
 
-    @patch('routers.users.categories_service.exists')
-    @patch('routers.users.users_service.check_if_private')
-    @patch('routers.users.users_service.user_id_exists')
-    @patch('routers.users.users_service.authenticate_user')
+    @patch('routers.users.categories_service.get_grant_context')
     @patch('routers.users.users_service.is_admin')
-    def test_revokeUserAccess_when_notAdmin(self, mock_is_admin, mock_auth, mock_user_exists, 
-                                            mock_check_private, mock_exists):
+    def test_revokeUserAccess_when_notAdmin(self, mock_is_admin, mock_context):
         # Arrange
         user_category = UserCategoryAccess(user_id=1, category_id=1)
-        token = "valid.token"
-        mock_exists.return_value = True
-        mock_check_private.return_value = True
-        mock_user_exists.return_value = True
-        mock_auth.return_value = {'is_admin': False}
+        user = {'is_admin': False}
+        mock_context.return_value = CategoryContext(exists=True, is_private=True)
         mock_is_admin.return_value = False
 
         # Act
-        result = users_router.revoke_user_access(token, user_category)
+        result = users_router.revoke_user_access(user, user_category)
 
         # Assert
         self.assertIsInstance(result, Forbidden)
         self.assertEqual(result.body, b'Only Neo can access this endpoint')
 
-    @patch('routers.users.categories_service.exists')
-    @patch('routers.users.users_service.check_if_private')
-    @patch('routers.users.users_service.user_id_exists')
-    @patch('routers.users.users_service.authenticate_user')
+    @patch('routers.users.categories_service.get_grant_context')
     @patch('routers.users.users_service.is_admin')
     @patch('routers.users.users_service.revoke_access')
-    def test_revokeUserAccess_when_adminSuccess(self, mock_revoke_access, mock_is_admin, mock_auth, 
-                                                mock_user_exists, mock_check_private, mock_exists):
+    def test_revokeUserAccess_when_adminSuccess(self, mock_revoke_access, mock_is_admin, mock_context):
         # Arrange
         user_category = UserCategoryAccess(user_id=1, category_id=1)
-        token = "valid.token"
-        mock_exists.return_value = True
-        mock_check_private.return_value = True
-        mock_user_exists.return_value = True
-        mock_auth.return_value = {'is_admin': True}
+        user = {'is_admin': True}
+        mock_context.return_value = CategoryContext(exists=True, is_private=True)
         mock_is_admin.return_value = True
         mock_revoke_access.return_value = "Access revoked"
 
         # Act
-        result = users_router.revoke_user_access(token, user_category)
+        result = users_router.revoke_user_access(user, user_category)
 
         # Assert
         self.assertEqual(result, "Access revoked")
         mock_revoke_access.assert_called_once_with(user_category.user_id, user_category.category_id)
 
-    @patch('routers.users.categories_service.exists')
-    @patch('routers.users.users_service.check_if_private')
-    @patch('routers.users.users_service.user_id_exists')
-    @patch('routers.users.users_service.authenticate_user')
+    @patch('routers.users.categories_service.get_grant_context')
     @patch('routers.users.users_service.is_admin')
     @patch('routers.users.users_service.revoke_access')
-    def test_revokeUserAccess_when_userHasNoAccess(self, mock_revoke_access, mock_is_admin, 
-                                                   mock_auth, mock_user_exists, mock_check_private, mock_exists):
+    def test_revokeUserAccess_when_userHasNoAccess(self, mock_revoke_access, mock_is_admin, mock_context):
         # Arrange
         user_category = UserCategoryAccess(user_id=1, category_id=1)
-        token = "valid.token"
-        mock_exists.return_value = True
-        mock_check_private.return_value = True
-        mock_user_exists.return_value = True
-        mock_auth.return_value = {'is_admin': True}
+        user = {'is_admin': True}
+        mock_context.return_value = CategoryContext(exists=True, is_private=True)
         mock_is_admin.return_value = True
         mock_revoke_access.return_value = None
 
         # Act
-        result = users_router.revoke_user_access(token, user_category)
+        result = users_router.revoke_user_access(user, user_category)
 
         # Assert
         self.assertIsInstance(result, BadRequest)
         self.assertEqual(result.body, 
             f'User with id {user_category.user_id} has no existing access for category with id {user_category.category_id}!'.encode())
         
-    @patch('routers.users.categories_service.exists')
-    def test_viewPrivilegedUsers_when_categoryDoesNotExist(self, mock_exists):
+    @patch('routers.users.users_service.apply_access_grants')
+    @patch('routers.users.users_service.is_admin')
+    def test_updateUsersAccess_when_notAdmin(self, mock_is_admin, mock_apply_access_grants):
+        # Arrange
+        grants = [AccessGrant(user_id=1, category_id=1, access='read')]
+        user = {'is_admin': False}
+        mock_is_admin.return_value = False
+
+        # Act
+        result = users_router.update_users_access(grants, user)
+
+        # Assert
+        self.assertIsInstance(result, Forbidden)
+        self.assertEqual(result.body, b'Only Neo can access this endpoint')
+        mock_apply_access_grants.assert_not_called()
+
+    @patch('routers.users.users_service.apply_access_grants')
+    @patch('routers.users.users_service.is_admin')
+    def test_updateUsersAccess_when_admin(self, mock_is_admin, mock_apply_access_grants):
+        # Arrange
+        grants = [AccessGrant(user_id=1, category_id=1, access='read')]
+        user = {'is_admin': True}
+        mock_is_admin.return_value = True
+        mock_apply_access_grants.return_value = ['result']
+
+        # Act
+        result = users_router.update_users_access(grants, user)
+
+        # Assert
+        self.assertEqual(result, ['result'])
+        mock_apply_access_grants.assert_called_once_with(grants)
+
+    @patch('routers.users.categories_service.get_context')
+    def test_viewPrivilegedUsers_when_categoryDoesNotExist(self, mock_context):
         # Arrange
         category_id = 999
-        token = "valid.token"
-        mock_exists.return_value = False
+        user = {'user_id': 1, 'is_admin': True}
+        mock_context.return_value = CategoryContext(exists=False)
 
         # Act
-        result = users_router.view_privileged_users(token, category_id)
+        result = users_router.view_privileged_users(user, category_id)
 
         # Assert
         self.assertIsInstance(result, NotFound)
         self.assertEqual(result.body, b'Category does not exist!')
-        mock_exists.assert_called_once_with(category_id)
+        mock_context.assert_called_once_with(category_id)
 
-    @patch('routers.users.categories_service.exists')
-    @patch('routers.users.users_service.check_if_private')
-    def test_viewPrivilegedUsers_when_categoryNotPrivate(self, mock_check_private, mock_exists):
+    @patch('routers.users.categories_service.get_context')
+    def test_viewPrivilegedUsers_when_categoryNotPrivate(self, mock_context):
         # Arrange
         category_id = 1
-        token = "valid.token"
-        mock_exists.return_value = True
-        mock_check_private.return_value = False
+        user = {'user_id': 1, 'is_admin': True}
+        mock_context.return_value = CategoryContext(exists=True, is_private=False)
 
         # Act
-        result = users_router.view_privileged_users(token, category_id)
+        result = users_router.view_privileged_users(user, category_id)
 
         # Assert
         self.assertIsInstance(result, BadRequest)
         self.assertEqual(result.body, f'Category {category_id} is not private.'.encode())
-        mock_check_private.assert_called_once_with(category_id)
+        mock_context.assert_called_once_with(category_id)
 
-    @patch('routers.users.categories_service.exists')
-    @patch('routers.users.users_service.check_if_private')
-    @patch('routers.users.users_service.authenticate_user')
+    @patch('routers.users.categories_service.get_context')
     @patch('routers.users.users_service.is_admin')
-    def test_viewPrivilegedUsers_when_notAdmin(self, mock_is_admin, mock_auth, mock_check_private, mock_exists):
+    def test_viewPrivilegedUsers_when_notAdmin(self, mock_is_admin, mock_context):
         # Arrange
         category_id = 1
-        token = "valid.token"
-        mock_exists.return_value = True
-        mock_check_private.return_value = True
-        mock_auth.return_value = {'is_admin': False}
+        user = {'is_admin': False}
+        mock_context.return_value = CategoryContext(exists=True, is_private=True)
         mock_is_admin.return_value = False
 
         # Act
-        result = users_router.view_privileged_users(token, category_id)
+        result = users_router.view_privileged_users(user, category_id)
 
         # Assert
         self.assertIsInstance(result, Forbidden)
         self.assertEqual(result.body, b'Only Neo can access this endpoint')
 
-    @patch('routers.users.categories_service.exists')
-    @patch('routers.users.users_service.check_if_private')
-    @patch('routers.users.users_service.authenticate_user')
+    @patch('routers.users.categories_service.get_context')
     @patch('routers.users.users_service.is_admin')
     @patch('routers.users.view_privileged_users')
-    def test_viewPrivilegedUsers_when_adminSuccess(self, mock_view_privileged, mock_is_admin, mock_auth, 
-                                                   mock_check_private, mock_exists):
+    def test_viewPrivilegedUsers_when_adminSuccess(self, mock_view_privileged, mock_is_admin, mock_context):
         # Arrange
         category_id = 1
-        token = "valid.token"
-        mock_exists.return_value = True
-        mock_check_private.return_value = True
-        mock_auth.return_value = {'is_admin': True}
+        user = {'is_admin': True}
+        mock_context.return_value = CategoryContext(exists=True, is_private=True)
         mock_is_admin.return_value = True
         mock_view_privileged.return_value = [
             UserAccessResponse(id=1, email="test@example.com", username="testuser", first_name="Test", last_name="User", access='read'),
@@ -537,7 +483,7 @@ class UsersRouter_Should(unittest.TestCase):
         ]
 
         # Act
-        result = users_router.view_privileged_users(token, category_id)
+        result = users_router.view_privileged_users(user, category_id)
 
         # Assert
         self.assertEqual(len(result), 2)
@@ -547,4 +493,4 @@ class UsersRouter_Should(unittest.TestCase):
         self.assertEqual(result[0].first_name, "Test")
         self.assertEqual(result[0].last_name, "User")
         self.assertEqual(result[0].access, 'read')
-        mock_view_privileged.assert_called_once_with(token, category_id)
\ No newline at end of file
+        mock_view_privileged.assert_called_once_with(user, category_id)
\ No newline at end of file
@@ -2,13 +2,15 @@ import math
 import unittest
 from unittest.mock import patch, Mock
 
+from common.cache import TTLCache
+from common.password_hashing import HashingQueueFullError
 from common.responses import Unauthorized, NoContent
-from data.models import User
+from common.settings import Settings
+from data.models import User, AccessGrant
 from services import users_service
 from services.users_service import check_if_username_exists
 from fastapi.exceptions import HTTPException
 from datetime import timezone, timedelta, datetime
-import os
 import jwt
 
 
@@ -23,9 +25,25 @@ def fake_admin():
     admin.is_admin = True
     return admin
 
+
+BCRYPT_HASH = '$2b$12$' + 'a' * 53
+
+
+def fake_settings():
+    return Settings(db_user='root', db_password='root', db_host='localhost', db_port=3306, db_name='forum_3',
+                    jwt_secret_key='test_secret')
+
 @patch('services.users_service.read_query')
 class UserServiceShould(unittest.TestCase):
 
+    def setUp(self):
+        users_service._identity_cache = TTLCache()
+        users_service._access_cache = TTLCache()
+
+    def tearDown(self):
+        users_service._identity_cache = None
+        users_service._access_cache = None
+
 
     def test_checkIfUserExists_when_usernameExists(self, mock_read_query):
         # Arrange
@@ -97,10 +115,40 @@ class UserServiceShould(unittest.TestCase):
         self.assertEqual(result.last_name, 'last-name')
 
 
+    @patch('services.users_service.hash_password')
+    def test_createUser_hashesBeforeFirstQuery(self, mock_hash_password, mock_read_query):
+        # Arrange
+        calls = []
+        mock_hash_password.side_effect = lambda password: calls.append('hash') or 'hashed'
+        mock_read_query.side_effect = lambda *args: calls.append('query') or []
+
+        # Act
+        with patch('services.users_service.insert_query', return_value=1):
+            users_service.create_user('test@email.com', 'test', 'password123.', 'first-name', 'last-name')
+
+        # Assert
+        self.assertEqual(calls, ['hash', 'query', 'query'])
+
+    @patch('services.users_service.check_password')
+    def test_loginUser_raises503_whenHashingQueueFull(self, mock_check_password, mock_read_query):
+        # Arrange
+        mock_read_query.return_value = [(1, 'test_user', 'hashed_pass', 0)]
+        mock_check_password.side_effect = HashingQueueFullError()
+        login_data = Mock()
+        login_data.username = 'test_user'
+        login_data.password = 'password123'
+
+        # Act & Assert
+        with self.assertRaises(HTTPException) as context:
+            users_service.login_user(login_data)
+
+        self.assertEqual(context.exception.status_code, 503)
+
+    @patch('services.users_service.needs_rehash', Mock(return_value=False))
     @patch('bcrypt.checkpw')
     def test_loginUser_whenCredentialsValid(self, mock_checkpw, mock_read_query):
         # Arrange
-        mock_user_data = [(1, 'test_user', 'hashed_pass', 0)]
+        mock_user_data = [(1, 'test_user', BCRYPT_HASH, 0)]
         mock_read_query.return_value = mock_user_data
         mock_checkpw.return_value = True
         login_data = Mock()
@@ -132,10 +180,11 @@ class UserServiceShould(unittest.TestCase):
         mock_checkpw.assert_not_called()
 
     
+    @patch('services.users_service.needs_rehash', Mock(return_value=False))
     @patch('bcrypt.checkpw')
     def test_loginUser_whenPasswordIncorrect(self, mock_checkpw, mock_read_query):
         # Arrange
-        mock_user_data = [(1, 'test_user', 'hashed_pass', False)]
+        mock_user_data = [(1, 'test_user', BCRYPT_HASH, False)]
         mock_read_query.return_value = mock_user_data
         mock_checkpw.return_value = False
         login_data = Mock()
@@ -151,7 +200,53 @@ class UserServiceShould(unittest.TestCase):
         mock_checkpw.assert_called_once()
 
    
-    @patch.dict(os.environ, {'JWT_SECRET_KEY': 'test_secret'}) # Temporary change my secret key for the test
+    @patch('services.users_service.update_query')
+    @patch('services.users_service.hash_password')
+    @patch('services.users_service.needs_rehash')
+    def test_rehashPassword_updatesHash_whenOutdated(self, mock_needs_rehash, mock_hash_password,
+                                                     mock_update_query, mock_read_query):
+        # Arrange
+        mock_needs_rehash.return_value = True
+        mock_hash_password.return_value = 'new_hash'
+
+        # Act
+        users_service.rehash_password(1, 'password123', 'old_hash')
+
+        # Assert
+        mock_hash_password.assert_called_once_with('password123')
+        self.assertEqual(mock_update_query.call_args.args[1], ('new_hash', 1, 'old_hash'))
+
+    @patch('services.users_service.update_query')
+    @patch('services.users_service.hash_password')
+    @patch('services.users_service.needs_rehash')
+    def test_rehashPassword_doesNothing_whenUpToDate(self, mock_needs_rehash, mock_hash_password,
+                                                     mock_update_query, mock_read_query):
+        # Arrange
+        mock_needs_rehash.return_value = False
+
+        # Act
+        users_service.rehash_password(1, 'password123', 'old_hash')
+
+        # Assert
+        mock_hash_password.assert_not_called()
+        mock_update_query.assert_not_called()
+
+    @patch('services.users_service.update_query')
+    @patch('services.users_service.hash_password')
+    @patch('services.users_service.needs_rehash')
+    def test_rehashPassword_skips_whenHashingQueueFull(self, mock_needs_rehash, mock_hash_password,
+                                                       mock_update_query, mock_read_query):
+        # Arrange
+        mock_needs_rehash.return_value = True
+        mock_hash_password.side_effect = HashingQueueFullError()
+
+        # Act
+        users_service.rehash_password(1, 'password123', 'old_hash')
+
+        # Assert
+        mock_update_query.assert_not_called()
+
+    @patch('services.users_service.get_settings', fake_settings)  # Temporary change my secret key for the test
     @patch('services.users_service.datetime')
     def test_createToken_returns_validToken(self, mock_datetime, mock_read_query):
         # Arrange
@@ -159,6 +254,7 @@ class UserServiceShould(unittest.TestCase):
         mock_datetime.now.return_value = today
         
         user_data = [(1, 'testuser', 'password', True)]  # Mock user data tuple
+        mock_read_query.return_value = [(3, 5, 0), (3, 7, 1)]
         expected_payload = {
             'user_id': 1,
             'username': 'testuser',
@@ -175,8 +271,10 @@ class UserServiceShould(unittest.TestCase):
         self.assertEqual(decoded_token['username'], expected_payload['username'])
         self.assertEqual(decoded_token['is_admin'], expected_payload['is_admin'])
         self.assertEqual(decoded_token['exp'], math.floor(expected_payload['exp'].timestamp()))
+        self.assertEqual(decoded_token['perm_ver'], 3)
+        self.assertEqual(decoded_token['perms'], {'5': 0, '7': 1})
 
-    @patch.dict(os.environ, {'JWT_SECRET_KEY': 'test_secret'})  # Temporary change my secret key for the test
+    @patch('services.users_service.get_settings', fake_settings)  # Temporary change my secret key for the test
     def test_decodeToken_when_validToken(self, mock_ready_query):
         # Arrange
         payload = {'user_id': 1, 'username': 'testuser', 'is_admin': True}
@@ -190,7 +288,7 @@ class UserServiceShould(unittest.TestCase):
         self.assertEqual(decoded_payload['username'], payload['username'])
         self.assertEqual(decoded_payload['is_admin'], payload['is_admin'])
 
-    @patch.dict(os.environ, {'JWT_SECRET_KEY': 'test_secret'})  # Temporary change my secret key for the test
+    @patch('services.users_service.get_settings', fake_settings)  # Temporary change my secret key for the test
     def test_decodeToken_when_invalidToken(self, mock_read_query):
         # Arrange
         invalid_token = "invalid.token.here"
@@ -223,13 +321,14 @@ class UserServiceShould(unittest.TestCase):
         # Assert
         self.assertFalse(result)
         
+    @patch('services.users_service.blacklist_service.is_revoked', return_value=False)
     @patch('services.users_service.decode_token')
     @patch('services.users_service.user_exists')
-    @patch.dict(os.environ, {'JWT_SECRET_KEY': 'test_secret'})  # Temporary change my secret key for the test
-    def test_authenticateUser_when_validToken(self, mock_user_exists, mock_decode_token, mock_read_query):
+    @patch('services.users_service.get_settings', fake_settings)  # Temporary change my secret key for the test
+    def test_authenticateUser_when_validToken(self, mock_user_exists, mock_decode_token, mock_is_revoked,
+                                              mock_read_query):
         # Arrange
         token = jwt.encode({'user_id': 1, 'username': 'testuser', 'is_admin': True}, 'test_secret', algorithm='HS256')
-        mock_read_query.return_value = []
         mock_decode_token.return_value = {'user_id': 1, 'username': 'testuser', 'is_admin': True}
         mock_user_exists.return_value = True
 
@@ -240,14 +339,15 @@ class UserServiceShould(unittest.TestCase):
         self.assertEqual(user_data['user_id'], 1)
         self.assertEqual(user_data['username'], 'testuser')
         self.assertEqual(user_data['is_admin'], True)
-        mock_read_query.assert_called_once_with('''select * from tokens_blacklist where token = ?;''', (token,))
+        mock_is_revoked.assert_called_once_with(token)
+        mock_read_query.assert_not_called()
         mock_decode_token.assert_called_once_with(token)
         mock_user_exists.assert_called_once_with({'user_id': 1, 'username': 'testuser', 'is_admin': True})
 
-    def test_authenticateUser_when_tokenInBlacklist(self, mock_read_query):
+    @patch('services.users_service.blacklist_service.is_revoked', return_value=True)
+    def test_authenticateUser_when_tokenInBlacklist(self, mock_is_revoked, mock_read_query):
         # Arrange
         token = "some.token.here"
-        mock_read_query.return_value = [token]
 
         # Act & Assert
         with self.assertRaises(HTTPException) as context:
@@ -255,13 +355,14 @@ class UserServiceShould(unittest.TestCase):
 
         self.assertEqual(context.exception.status_code, 401)
         self.assertEqual(context.exception.detail, 'Invalid token')
-        mock_read_query.assert_called_once_with('''select * from tokens_blacklist where token = ?;''', (token,))
+        mock_is_revoked.assert_called_once_with(token)
+        mock_read_query.assert_not_called()
 
+    @patch('services.users_service.blacklist_service.is_revoked', return_value=False)
     @patch('services.users_service.decode_token')
-    def test_authenticateUser_when_invalidToken(self, mock_decode_token, mock_read_query):
+    def test_authenticateUser_when_invalidToken(self, mock_decode_token, mock_is_revoked, mock_read_query):
         # Arrange
         token = "invalid.token.here"
-        mock_read_query.return_value = []
         mock_decode_token.side_effect = HTTPException(status_code=401, detail='Invalid token')
 
         # Act & Assert
@@ -270,13 +371,14 @@ class UserServiceShould(unittest.TestCase):
 
         self.assertEqual(context.exception.status_code, 401)
         self.assertEqual(context.exception.detail, 'Invalid token')
-        mock_read_query.assert_called_once_with('''select * from tokens_blacklist where token = ?;''', (token,))
+        mock_is_revoked.assert_called_once_with(token)
+        mock_read_query.assert_not_called()
         mock_decode_token.assert_called_once_with(token)
 
     def test_userExists_when_userExists(self, mock_read_query):
             # Arrange
             user_data = {'user_id': 1, 'username': 'testuser'}
-            mock_read_query.return_value = [(1, 'testuser')]
+            mock_read_query.return_value = [(1, 'testuser', 0, 0)]
 
             # Act
             result = users_service.user_exists(user_data)
@@ -285,61 +387,169 @@ class UserServiceShould(unittest.TestCase):
             self.assertTrue(result)
             mock_read_query.assert_called_once()
 
-    def test_userExists_when_userDoesNotExist(self, mock_read_query):
+    def test_userExists_servesWarmUserFromCache(self, mock_read_query):
         # Arrange
         user_data = {'user_id': 1, 'username': 'testuser'}
-        mock_read_query.return_value = []
+        mock_read_query.return_value = [(1, 'testuser', 0, 0)]
 
         # Act
-        result = users_service.user_exists(user_data)
+        first = users_service.user_exists(user_data)
+        second = users_service.user_exists(user_data)
 
         # Assert
-        self.assertFalse(result)
+        self.assertTrue(first)
+        self.assertTrue(second)
         mock_read_query.assert_called_once()
+        self.assertNotIn('*', mock_read_query.call_args.args[0])
 
-    @patch('services.users_service.decode_token')
-    @patch('services.users_service.user_exists')
-    def test_authenticateUser_when_userDoesNotExist(self, mock_user_exists, mock_decode_token, mock_read_query):
+    def test_userExists_queriesAgain_whenUsernameDiffersFromCache(self, mock_read_query):
         # Arrange
-        token = jwt.encode({'user_id': 1, 'username': 'testuser', 'is_admin': True}, 'test_secret', algorithm='HS256')
-        mock_read_query.return_value = []
-        mock_decode_token.return_value = {'user_id': 1, 'username': 'testuser', 'is_admin': True}
-        mock_user_exists.return_value = False
+        mock_read_query.side_effect = [[(1, 'testuser', 0, 0)], []]
+        users_service.user_exists({'user_id': 1, 'username': 'testuser'})
+
+        # Act
+        result = users_service.user_exists({'user_id': 1, 'username': 'renamed'})
+
+        # Assert
+        self.assertFalse(result)
+        self.assertEqual(mock_read_query.call_count, 2)
+
+    def test_invalidateIdentity_forcesReload(self, mock_read_query):
+        # Arrange
+        mock_read_query.side_effect = [[(1, 'testuser', 0, 0)], []]
+        users_service.user_exists({'user_id': 1, 'username': 'testuser'})
+
+        # Act
+        users_service.invalidate_identity(1)
+        result = users_service.user_exists({'user_id': 1, 'username': 'testuser'})
+
+        # Assert
+        self.assertFalse(result)
+        self.assertEqual(mock_read_query.call_count, 2)
+
+    def test_getPermissions_returnsVersionOnly_whenNoGrants(self, mock_read_query):
+        # Arrange
+        mock_read_query.return_value = [(2, None, None)]
+
+        # Act
+        result = users_service.get_permissions(1)
+
+        # Assert
+        self.assertEqual(result, (2, {}))
+
+    def test_permissionsCurrent_whenVersionMatches(self, mock_read_query):
+        # Arrange
+        mock_read_query.return_value = [(1, 'testuser', 0, 4)]
 
         # Act & Assert
-        with self.assertRaises(HTTPException) as context:
-            users_service.authenticate_user(token)
+        self.assertTrue(users_service.permissions_current(
+            {'user_id': 1, 'username': 'testuser', 'perm_ver': 4, 'perms': {}}))
+        self.assertFalse(users_service.permissions_current(
+            {'user_id': 1, 'username': 'testuser', 'perm_ver': 3, 'perms': {}}))
+        mock_read_query.assert_called_once()
 
-        self.assertEqual(context.exception.status_code, 401)
-        self.assertEqual(context.exception.detail, 'Invalid user')
-        mock_read_query.assert_called_once_with('''select * from tokens_blacklist where token = ?;''', (token,))
-        mock_decode_token.assert_called_once_with(token)
-        mock_user_exists.assert_called_once_with({'user_id': 1, 'username': 'testuser', 'is_admin': True})
+    def test_permissionsCurrent_isFalse_forTokenWithoutSnapshot(self, mock_read_query):
+        # Act & Assert
+        self.assertFalse(users_service.permissions_current({'user_id': 1, 'username': 'testuser'}))
+        mock_read_query.assert_not_called()
 
-    def test_userIdExists_when_userExists(self, mock_read_query):
+    @patch('services.users_service.update_query')
+    def test_bumpPermissionVersion_updatesUsers_andDropsCachedIdentities(self, mock_update_query, mock_read_query):
         # Arrange
-        user_id = 1
-        mock_read_query.return_value = [(1,)]
+        mock_read_query.return_value = [(1, 'testuser', 0, 0)]
+        users_service.get_identity(1, 'testuser')
 
         # Act
-        result = users_service.user_id_exists(user_id)
+        users_service.bump_permission_version(1, 2)
 
         # Assert
-        self.assertTrue(result)
+        self.assertEqual(mock_update_query.call_args.args[1], (1, 2))
+        self.assertIn('in (?, ?)', mock_update_query.call_args.args[0].lower())
+        users_service.get_identity(1, 'testuser')
+        self.assertEqual(mock_read_query.call_count, 2)
+
+    @patch('services.users_service.get_settings')
+    def test_resetCaches_rebuildsCachesWithCurrentSettings(self, mock_get_settings, mock_read_query):
+        # Arrange
+        mock_get_settings.return_value = Mock(identity_cache_size=5, identity_cache_ttl=1.0,
+                                              access_cache_size=7, access_cache_ttl=2.0)
+
+        # Act
+        users_service.reset_caches()
+
+        # Assert
+        self.assertEqual((users_service._get_identity_cache().max_size, users_service._get_access_cache().ttl),
+                         (5, 2.0))
+
+    @patch('services.users_service.IN_CHUNK_SIZE', 2)
+    @patch('services.users_service.update_query')
+    def test_bumpPermissionVersion_chunksUserIds(self, mock_update_query, mock_read_query):
+        # Act
+        users_service.bump_permission_version(1, 2, 3)
+
+        # Assert
+        self.assertEqual([(1, 2), (3,)], [call.args[1] for call in mock_update_query.call_args_list])
+
+    def test_getAccessMap_loadsOnce_thenServesFromCache(self, mock_read_query):
+        # Arrange
+        mock_read_query.return_value = [(3, 0), (5, 1)]
+
+        # Act
+        first = users_service.get_access_map(1)
+        second = users_service.get_access_map(1)
+
+        # Assert
+        self.assertEqual(first, {3: 0, 5: 1})
+        self.assertIs(first, second)
         mock_read_query.assert_called_once()
 
-    def test_userIdExists_when_userDoesNotExist(self, mock_read_query):
+    @patch('services.users_service.update_query')
+    def test_bumpPermissionVersion_dropsCachedAccessMap(self, mock_update_query, mock_read_query):
         # Arrange
-        user_id = 1
+        mock_read_query.side_effect = [[(3, 0)], [(3, 1)]]
+        users_service.get_access_map(1)
+
+        # Act
+        users_service.bump_permission_version(1)
+        result = users_service.get_access_map(1)
+
+        # Assert
+        self.assertEqual(result, {3: 1})
+        self.assertEqual(mock_read_query.call_count, 2)
+
+    def test_userExists_when_userDoesNotExist(self, mock_read_query):
+        # Arrange
+        user_data = {'user_id': 1, 'username': 'testuser'}
         mock_read_query.return_value = []
 
         # Act
-        result = users_service.user_id_exists(user_id)
+        result = users_service.user_exists(user_data)
 
         # Assert
         self.assertFalse(result)
         mock_read_query.assert_called_once()
 
+    @patch('services.users_service.blacklist_service.is_revoked', return_value=False)
+    @patch('services.users_service.decode_token')
+    @patch('services.users_service.user_exists')
+    def test_authenticateUser_when_userDoesNotExist(self, mock_user_exists, mock_decode_token, mock_is_revoked,
+                                                    mock_read_query):
+        # Arrange
+        token = jwt.encode({'user_id': 1, 'username': 'testuser', 'is_admin': True}, 'test_secret', algorithm='HS256')
+        mock_decode_token.return_value = {'user_id': 1, 'username': 'testuser', 'is_admin': True}
+        mock_user_exists.return_value = False
+
+        # Act & Assert
+        with self.assertRaises(HTTPException) as context:
+            users_service.authenticate_user(token)
+
+        self.assertEqual(context.exception.status_code, 401)
+        self.assertEqual(context.exception.detail, 'Invalid user')
+        mock_is_revoked.assert_called_once_with(token)
+        mock_read_query.assert_not_called()
+        mock_decode_token.assert_called_once_with(token)
+        mock_user_exists.assert_called_once_with({'user_id': 1, 'username': 'testuser', 'is_admin': True})
+
     def test_getUserById_when_userExists(self, mock_read_query):
         # Arrange
         user_id = 1
@@ -365,11 +575,11 @@ class UserServiceShould(unittest.TestCase):
         mock_read_query.assert_called_once()
 
     @patch('services.users_service.authenticate_user')
-    @patch('services.users_service.insert_query')
-    def test_blacklistUser_when_validToken(self, mock_insert_query, mock_authenticate_user, mock_read_query):
+    @patch('services.users_service.blacklist_service.revoke')
+    def test_blacklistUser_when_validToken(self, mock_revoke, mock_authenticate_user, mock_read_query):
         # Arrange
         token = "valid.token.here"
-        mock_authenticate_user.return_value = {'user_id': 1, 'username': 'testuser', 'is_admin': True}
+        mock_authenticate_user.return_value = {'user_id': 1, 'username': 'testuser', 'is_admin': True, 'exp': 1700000000}
 
         # Act
         result = users_service.blacklist_user(token)
@@ -377,7 +587,7 @@ class UserServiceShould(unittest.TestCase):
         # Assert
         self.assertEqual(result, 'User successfully logged out.')
         mock_authenticate_user.assert_called_once_with(token)
-        mock_insert_query.assert_called_once()
+        mock_revoke.assert_called_once_with(token, 1700000000)
 
     @patch('services.users_service.authenticate_user')
     def test_blacklistUser_when_unauthorizedUser(self, mock_authenticate_user, mock_read_query):
@@ -393,143 +603,218 @@ class UserServiceShould(unittest.TestCase):
         self.assertEqual(context.exception.detail, 'Invalid token')
         mock_authenticate_user.assert_called_once_with(token)
 
-    def test_checkIfPrivate_when_categoryIsPrivate(self, mock_read_query):
-        # Arrange
-        category_id = 1
-        mock_read_query.return_value = [(1, 'some_data')]
-
-        # Act
-        result = users_service.check_if_private(category_id)
-
-        # Assert
-        self.assertTrue(result)
-        mock_read_query.assert_called_once()
-
-    def test_checkIfPrivate_when_categoryIsNotPrivate(self, mock_read_query):
-        # Arrange
-        category_id = 1
-        mock_read_query.return_value = []
-
-        # Act
-        result = users_service.check_if_private(category_id)
-
-        # Assert
-        self.assertFalse(result)
-        mock_read_query.assert_called_once()
-
-    def test_giveUserRAccess_when_userHasReadAccess(self, mock_read_query):
+    @patch('services.users_service.bump_permission_version')
+    @patch('services.users_service.update_query')
+    def test_giveUserRAccess_when_userHasReadAccess(self, mock_update_query, mock_bump_permission_version, mock_read_query):
         # Arrange
         user_id = 1
         category_id = 1
-        mock_read_query.side_effect = [[(1, 1, 0)], []]  # First query returns data (read access exists)
+        mock_update_query.return_value = 0  # Row already held access_type 0
 
         # Act
         result = users_service.give_user_r_access(user_id, category_id)
 
         # Assert
         self.assertIsNone(result)
-        mock_read_query.assert_called_once()
+        mock_update_query.assert_called_once()
+        mock_read_query.assert_not_called()
+        mock_bump_permission_version.assert_not_called()
 
+    @patch('services.users_service.bump_permission_version')
     @patch('services.users_service.update_query')
-    def test_giveUserRAccess_when_userHasWriteAccess(self, mock_update_query, mock_read_query):
+    def test_giveUserRAccess_when_userHasWriteAccess(self, mock_update_query, mock_bump_permission_version, mock_read_query):
         # Arrange
         user_id = 1
         category_id = 1
-        mock_read_query.side_effect = [[], [(1, 1, 1)]]  # Second query returns data (write access exists)
+        mock_update_query.return_value = 2  # Existing row updated
 
         # Act
         result = users_service.give_user_r_access(user_id, category_id)
 
         # Assert
         self.assertEqual(result, f'Write access changed to read for user with id {user_id} for category with id {category_id}.')
-        self.assertEqual(mock_read_query.call_count, 2)
-        mock_update_query.assert_called_once()
+        self.assertEqual(mock_update_query.call_args.args[1], (user_id, category_id, 0))
+        mock_read_query.assert_not_called()
+        mock_bump_permission_version.assert_called_once_with(user_id)
 
-    @patch('services.users_service.insert_query')
-    def test_giveUserRAccess_when_userHasNoAccess(self, mock_insert_query, mock_read_query):
+    @patch('services.users_service.bump_permission_version')
+    @patch('services.users_service.update_query')
+    def test_giveUserRAccess_when_userHasNoAccess(self, mock_update_query, mock_bump_permission_version, mock_read_query):
         # Arrange
         user_id = 1
         category_id = 1
-        mock_read_query.side_effect = [[], []]  # Both queries return empty (no access exists)
+        mock_update_query.return_value = 1  # Row inserted
 
         # Act
         result = users_service.give_user_r_access(user_id, category_id)
 
         # Assert
         self.assertEqual(result, f'Read access for category with id {category_id} has been given to user with id {user_id}.')
-        self.assertEqual(mock_read_query.call_count, 2)
-        mock_insert_query.assert_called_once()
+        self.assertIn('on duplicate key update', mock_update_query.call_args.args[0])
+        mock_bump_permission_version.assert_called_once_with(user_id)
 
-    def test_giveUserWAccess_when_userHasWriteAccess(self, mock_read_query):
+    @patch('services.users_service.bump_permission_version')
+    @patch('services.users_service.update_query')
+    def test_giveUserWAccess_when_userHasWriteAccess(self, mock_update_query, mock_bump_permission_version, mock_read_query):
         # Arrange
         user_id = 1
         category_id = 1
-        mock_read_query.side_effect = [[(1, 1, 1)], []]  # First query returns data (write access exists)
+        mock_update_query.return_value = 0  # Row already held access_type 1
 
         # Act
         result = users_service.give_user_w_access(user_id, category_id)
 
         # Assert
         self.assertIsNone(result)
-        mock_read_query.assert_called_once()
+        mock_update_query.assert_called_once()
+        mock_bump_permission_version.assert_not_called()
 
+    @patch('services.users_service.bump_permission_version')
     @patch('services.users_service.update_query')
-    def test_giveUserWAccess_when_userHasReadAccess(self, mock_update_query, mock_read_query):
+    def test_giveUserWAccess_when_userHasReadAccess(self, mock_update_query, mock_bump_permission_version, mock_read_query):
         # Arrange
         user_id = 1
         category_id = 1
-        mock_read_query.side_effect = [[], [(1, 1, 0)]]  # Second query returns data (read access exists)
+        mock_update_query.return_value = 2  # Existing row updated
 
         # Act
         result = users_service.give_user_w_access(user_id, category_id)
 
         # Assert
         self.assertEqual(result, f'Read access changed to write for user with id {user_id} for category with id {category_id}.')
-        self.assertEqual(mock_read_query.call_count, 2)
-        mock_update_query.assert_called_once()
+        mock_bump_permission_version.assert_called_once_with(user_id)
 
-    @patch('services.users_service.insert_query')
-    def test_giveUserWAccess_when_userHasNoAccess(self, mock_insert_query, mock_read_query):
+    @patch('services.users_service.bump_permission_version')
+    @patch('services.users_service.update_query')
+    def test_giveUserWAccess_when_userHasNoAccess(self, mock_update_query, mock_bump_permission_version, mock_read_query):
         # Arrange
         user_id = 1
         category_id = 1
-        mock_read_query.side_effect = [[], []]  # Both queries return empty (no access exists)
+        mock_update_query.return_value = 1  # Row inserted
 
         # Act
         result = users_service.give_user_w_access(user_id, category_id)
 
         # Assert
         self.assertEqual(result, f'Write access for category with id {category_id} has been given to user with id {user_id}.')
-        self.assertEqual(mock_read_query.call_count, 2)
-        mock_insert_query.assert_called_once()
+        self.assertEqual(mock_update_query.call_args.args[1], (user_id, category_id, 1))
+        mock_read_query.assert_not_called()
+        mock_bump_permission_version.assert_called_once_with(user_id)
 
-    @patch('services.users_service.insert_query')
-    def test_revokeAccess_when_accessExists(self, mock_insert_query, mock_read_query):
+    @patch('services.users_service.bump_permission_version')
+    @patch('services.users_service.update_query')
+    def test_revokeAccess_when_accessExists(self, mock_update_query, mock_bump_permission_version, mock_read_query):
         # Arrange
         user_id = 1
         category_id = 1
-        mock_read_query.return_value = [(1, 1, 1)]  # Access exists
+        mock_update_query.return_value = 1  # Row deleted
 
         # Act
         result = users_service.revoke_access(user_id, category_id)
 
         # Assert
         self.assertIsInstance(result, NoContent)
-        mock_read_query.assert_called_once()
-        mock_insert_query.assert_called_once()
+        mock_update_query.assert_called_once()
+        mock_read_query.assert_not_called()
+        mock_bump_permission_version.assert_called_once_with(user_id)
 
-    def test_revokeAccess_when_accessDoesNotExist(self, mock_read_query):
+    @patch('services.users_service.bump_permission_version')
+    @patch('services.users_service.update_query')
+    def test_revokeAccess_when_accessDoesNotExist(self, mock_update_query, mock_bump_permission_version, mock_read_query):
         # Arrange
         user_id = 1
         category_id = 1
-        mock_read_query.return_value = []  # No access exists
+        mock_update_query.return_value = 0  # Nothing deleted
 
         # Act
         result = users_service.revoke_access(user_id, category_id)
 
         # Assert
         self.assertIsNone(result)
-        mock_read_query.assert_called_once()
+        mock_bump_permission_version.assert_not_called()
+
+    @patch('services.users_service.bump_permission_version')
+    @patch('services.users_service.update_many')
+    def test_applyAccessGrants_returnsStatusPerItem(self, mock_update_many, mock_bump_permission_version, mock_read_query):
+        # Arrange
+        grants = [AccessGrant(user_id=1, category_id=1, access='read'),
+                  AccessGrant(user_id=2, category_id=1, access='write'),
+                  AccessGrant(user_id=3, category_id=1, access='write'),
+                  AccessGrant(user_id=4, category_id=1, access='none'),
+                  AccessGrant(user_id=5, category_id=1, access='none'),
+                  AccessGrant(user_id=1, category_id=1, access='write'),
+                  AccessGrant(user_id=1, category_id=2, access='read'),
+                  AccessGrant(user_id=1, category_id=3, access='read'),
+                  AccessGrant(user_id=6, category_id=1, access='read')]
+        mock_read_query.side_effect = [
+            [(1, 1), (2, 0)],                   # categories
+            [(1,), (2,), (3,), (4,), (5,)],     # users
+            [(2, 1, 0), (3, 1, 1), (4, 1, 0)],  # current grants
+        ]
+
+        # Act
+        result = users_service.apply_access_grants(grants)
+
+        # Assert
+        self.assertEqual([item.status for item in result],
+                         ['granted', 'changed', 'unchanged', 'revoked', 'no_access', 'duplicate',
+                          'category_not_private', 'category_not_found', 'user_not_found'])
+        self.assertEqual(3, mock_read_query.call_count)
+        self.assertEqual([(1, 1, 0), (2, 1, 1)], mock_update_many.call_args_list[0].args[1])
+        self.assertEqual([(4, 1)], mock_update_many.call_args_list[1].args[1])
+        self.assertEqual({1, 2, 4}, set(mock_bump_permission_version.call_args.args))
+
+    @patch('services.users_service.bump_permission_version')
+    @patch('services.users_service.update_many')
+    def test_applyAccessGrants_writesNothing_when_nothingChanges(self, mock_update_many, mock_bump_permission_version, mock_read_query):
+        # Arrange
+        grants = [AccessGrant(user_id=1, category_id=1, access='read')]
+        mock_read_query.side_effect = [[(1, 1)], [(1,)], [(1, 1, 0)]]
+
+        # Act
+        result = users_service.apply_access_grants(grants)
+
+        # Assert
+        self.assertEqual('unchanged', result[0].status)
+        mock_update_many.assert_not_called()
+        mock_bump_permission_version.assert_called_once_with()
+
+    @patch('services.users_service.IN_CHUNK_SIZE', 2)
+    @patch('services.users_service.bump_permission_version')
+    @patch('services.users_service.update_many')
+    def test_applyAccessGrants_chunksUserLookups(self, mock_update_many, mock_bump_permission_version, mock_read_query):
+        # Arrange
+        grants = [AccessGrant(user_id=user_id, category_id=1, access='read') for user_id in range(1, 4)]
+        mock_read_query.side_effect = [[(1, 1)], [(1,), (2,)], [(3,)], [], []]
+
+        # Act
+        result = users_service.apply_access_grants(grants)
+
+        # Assert
+        self.assertEqual(['granted'] * 3, [item.status for item in result])
+        self.assertEqual(5, mock_read_query.call_count)
+        mock_update_many.assert_called_once()
+
+    @patch('services.users_service.bump_permission_version')
+    @patch('services.users_service.update_many')
+    def test_applyAccessGrants_readsCurrentGrantsOfAllCategories_inOneQuery(self, mock_update_many,
+                                                                          mock_bump_permission_version,
+                                                                          mock_read_query):
+        # Arrange
+        grants = [AccessGrant(user_id=1, category_id=1, access='read'),
+                  AccessGrant(user_id=2, category_id=2, access='write'),
+                  AccessGrant(user_id=2, category_id=3, access='read')]
+        mock_read_query.side_effect = [[(1, 1), (2, 1), (3, 0)], [(1,), (2,)], [(2, 2, 1)]]
+
+        # Act
+        result = users_service.apply_access_grants(grants)
+
+        # Assert
+        self.assertEqual(['granted', 'unchanged', 'category_not_private'], [item.status for item in result])
+        self.assertEqual(3, mock_read_query.call_count)
+        sql, params = mock_read_query.call_args.args
+        self.assertIn('(user_id, category_id) in ((?, ?), (?, ?))', sql)
+        self.assertEqual({(1, 1), (2, 2)}, set(zip(params[::2], params[1::2])))
 
     def test_viewPrivilegedUsers_when_usersExist(self, mock_read_query):
         # Arrange
@@ -40,7 +40,7 @@ class VotesRouter_Should(unittest.TestCase):
         # mock_create_token.return_value = mock_payload
         # token = mock_create_token.return_value
 
-        result = votes_router.put_vote(reply_id, vote, token='mock-token')
+        result = votes_router.put_vote(reply_id, vote, user={'user_id': 1})
 
         self.assertIsInstance(result, NotFound)
 
@@ -52,7 +52,7 @@ class VotesRouter_Should(unittest.TestCase):
         mock_replies_service.reply_exists = lambda reply_id: True
         mock_votes_service.vote = lambda x,y,z: "You voted with upvote"
 
-        result = votes_router.put_vote(reply_id, vote, token='mock-token')
+        result = votes_router.put_vote(reply_id, vote, user={'user_id': 1})
 
         self.assertEqual(result, "You voted with upvote")
 
@@ -61,9 +61,9 @@ class VotesRouter_Should(unittest.TestCase):
         reply_id = 1
         vote = VoteResult(vote="upvote")
         mock_replies_service.reply_exists = lambda reply_id: True
-        mock_votes_service.vote = lambda reply_id, vote , token: "Vote changed to upvote"
+        mock_votes_service.vote = lambda reply_id, vote, user: "Vote changed to upvote"
 
-        result = votes_router.put_vote(reply_id, vote, token='mock-token')
+        result = votes_router.put_vote(reply_id, vote, user={'user_id': 1})
 
         self.assertEqual(result, "Vote changed to upvote")
 
@@ -72,8 +72,8 @@ class VotesRouter_Should(unittest.TestCase):
         reply_id = 1
         vote = VoteResult(vote="upvote")
         mock_replies_service.reply_exists = lambda reply_id: True
-        mock_votes_service.vote = lambda reply_id, vote , token: "The vote is already upvote"
+        mock_votes_service.vote = lambda reply_id, vote, user: "The vote is already upvote"
 
-        result = votes_router.put_vote(reply_id, vote, token='mock-token')
+        result = votes_router.put_vote(reply_id, vote, user={'user_id': 1})
 
         self.assertEqual(result, "The vote is already upvote")
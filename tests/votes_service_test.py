@@ -6,48 +6,76 @@ from services import votes_service as service
 class VotesService_Should(TestCase):
 
     def test_vote_insertsNewVote_whenNoExistingVote(self):
-        with patch('services.votes_service.authenticate_user') as mock_auth_user, \
-             patch('services.votes_service.read_query') as mock_read_query, \
-             patch('services.votes_service.insert_query') as mock_insert_query:
+        with patch('services.votes_service.read_query') as mock_read_query, \
+             patch('services.votes_service.insert_query') as mock_insert_query, \
+             patch('services.votes_service.count_vote') as mock_count_vote:
 
             reply_id = 1
-            token = 'mock-token'
             vote = VoteResult(vote='upvote')
-            mock_auth_user.return_value = {'user_id': 1}
+            user = {'user_id': 1}
             mock_read_query.return_value = []
             mock_insert_query.return_value = 1
 
-            result = service.vote(reply_id, vote, token)
+            result = service.vote(reply_id, vote, user)
 
             self.assertEqual(result, "You voted with upvote")
+            mock_count_vote.assert_called_once_with(reply_id, 1, 0)
 
 
     def test_vote_updatesVote_whenExistingVoteDiffers(self):
-        with patch('services.votes_service.authenticate_user') as mock_auth_user, \
-             patch('services.votes_service.read_query') as mock_read_query, \
-             patch('services.votes_service.update_query') as mock_update_query:
+        with patch('services.votes_service.read_query') as mock_read_query, \
+             patch('services.votes_service.update_query') as mock_update_query, \
+             patch('services.votes_service.count_vote') as mock_count_vote:
 
             reply_id = 1
-            token = 'mock-token'
             vote = VoteResult(vote='upvote')
-            mock_auth_user.return_value = {'user_id': 1}
+            user = {'user_id': 1}
             mock_read_query.return_value = [(1, 1, 0)]
             mock_update_query.return_value = 1
 
-            result = service.vote(reply_id, vote, token)
+            result = service.vote(reply_id, vote, user)
 
             self.assertEqual(result, "Vote changed to upvote")
+            mock_count_vote.assert_called_once_with(reply_id, 1, -1)
 
 
     def test_vote_returnsMessage_whenVoteAlreadyExists(self):
-        with patch('services.votes_service.authenticate_user') as mock_auth_user, \
-             patch('services.votes_service.read_query') as mock_read_query:
+        with patch('services.votes_service.read_query') as mock_read_query:
 
             reply_id = 1
-            token = 'mock-token'
             vote = VoteResult(vote='upvote')
-            mock_auth_user.return_value = {'user_id': 1}
+            user = {'user_id': 1}
             mock_read_query.return_value = [(1, 2, 1)]
 
-            result = service.vote(reply_id, vote, token)
+            result = service.vote(reply_id, vote, user)
             self.assertEqual(result, "The vote is already upvote")
+
+
+    def test_vote_leavesScore_whenConcurrentChangeAlreadyApplied(self):
+        with patch('services.votes_service.read_query') as mock_read_query, \
+             patch('services.votes_service.update_query') as mock_update_query, \
+             patch('services.votes_service.count_vote') as mock_count_vote:
+
+            reply_id = 1
+            vote = VoteResult(vote='downvote')
+            user = {'user_id': 1}
+            mock_read_query.return_value = [(1, 1, 1)]
+            mock_update_query.return_value = 0
+
+            result = service.vote(reply_id, vote, user)
+
+            self.assertEqual(result, "Vote changed to downvote")
+            mock_count_vote.assert_not_called()
+
+
+    def test_countVote_updatesReplyAndTopicInOneStatement(self):
+        with patch('services.votes_service.update_query') as mock_update_query:
+
+            service.count_vote(7, 0, 1)
+
+            sql, params = mock_update_query.call_args.args
+            self.assertIn('r.upvotes = r.upvotes + ?, r.downvotes = r.downvotes + ?', sql)
+            self.assertIn('t.hot_neg = ', sql)
+            self.assertIn('unix_timestamp(r.reply_date)', sql)
+            self.assertEqual((params[:3], params[-1]), ((0, 1, -1), 7))
+            mock_update_query.assert_called_once()